@@ -0,0 +1,193 @@
+"""Module for admission control and load shedding of API requests."""
+
+import asyncio
+import logging
+import math
+import os
+import re
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Pattern, Sequence, Tuple
+
+from fastapi import status
+from fastapi.responses import JSONResponse
+
+# logs for debug
+logger = logging.getLogger(__name__)
+
+# weight of the newest request in the average service time
+SERVICE_TIME_WEIGHT = 0.1
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed instead of admitted."""
+
+    def __init__(self, status_code: int, retry_after: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.detail = detail
+
+class AdmissionLimiter:
+    """Concurrency budget with a bounded FIFO wait queue.
+
+    Up to max_concurrent requests run at once and up to max_queue more
+    wait, each for at most queue_timeout seconds. A full queue is rejected
+    at once with 429 and a wait that runs out with 503, both with a
+    Retry-After estimated from the queue and the average service time.
+    """
+
+    def __init__(self, name: str, max_concurrent: int, max_queue: int, queue_timeout: float = 2.0):
+        if max_concurrent < 1 or max_queue < 0 or queue_timeout < 0:
+            raise ValueError(f"Invalid admission budget for {name}")
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._service_time = 0.0
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+        self.peak_queued = 0
+        self._queued_total = 0
+        self._wait_total = 0.0
+
+    @classmethod
+    def from_env(cls, name: str, max_concurrent: int, max_queue: int, queue_timeout: float = 2.0) -> "AdmissionLimiter":
+        """Budget with defaults overridden by ADMISSION_<NAME>_CONCURRENCY, _QUEUE and _TIMEOUT."""
+        prefix = f"ADMISSION_{name.upper()}"
+        return cls(
+            name,
+            int(os.environ.get(f"{prefix}_CONCURRENCY", max_concurrent)),
+            int(os.environ.get(f"{prefix}_QUEUE", max_queue)),
+            float(os.environ.get(f"{prefix}_TIMEOUT", queue_timeout))
+        )
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def retry_after(self) -> int:
+        """Seconds until the current queue is likely to have drained."""
+        drain = (self.queued + 1) * self._service_time / self.max_concurrent
+        return max(1, math.ceil(drain))
+
+    async def acquire(self) -> None:
+        if self.in_flight < self.max_concurrent and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            return
+        if self.queued >= self.max_queue:
+            self.rejected_queue_full += 1
+            raise AdmissionRejected(
+                status.HTTP_429_TOO_MANY_REQUESTS, self.retry_after(),
+                f"Too many {self.name} requests waiting"
+            )
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.peak_queued = max(self.peak_queued, self.queued)
+        started = time.monotonic()
+        try:
+            # wait() leaves the future alone, so a slot handed over at the
+            # deadline is seen as done below instead of being lost
+            await asyncio.wait([waiter], timeout=self.queue_timeout)
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+        finally:
+            self._queued_total += 1
+            self._wait_total += time.monotonic() - started
+        if waiter.done():
+            self.admitted += 1
+            return
+        self._abandon(waiter)
+        self.rejected_timeout += 1
+        raise AdmissionRejected(
+            status.HTTP_503_SERVICE_UNAVAILABLE, self.retry_after(),
+            f"Timed out waiting for a {self.name} slot"
+        )
+
+    def _abandon(self, waiter: asyncio.Future) -> None:
+        if waiter.done() and not waiter.cancelled():
+            # the slot was already handed to this request
+            self.release()
+            return
+        waiter.cancel()
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def release(self, service_time: Optional[float] = None) -> None:
+        if service_time is not None:
+            self._service_time += SERVICE_TIME_WEIGHT * (service_time - self._service_time)
+        # hand the slot straight to the oldest waiter
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def stats(self) -> Dict:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "queue_timeout": self.queue_timeout,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "peak_queued": self.peak_queued,
+            "admitted": self.admitted,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_timeout": self.rejected_timeout,
+            "avg_queue_wait_ms": round(1000 * self._wait_total / self._queued_total, 3) if self._queued_total else 0.0,
+            "avg_service_ms": round(1000 * self._service_time, 3)
+        }
+
+Rule = Tuple[str, Pattern, AdmissionLimiter]
+
+def admission_rule(method: str, path: str, limiter: AdmissionLimiter) -> Rule:
+    """Rule sending requests with a method and a path regex to a budget."""
+    return method.upper(), re.compile(path), limiter
+
+class AdmissionMiddleware:
+    """ASGI middleware admitting matching requests through their budget.
+
+    Requests that match no rule, such as health checks and websockets,
+    pass straight through.
+    """
+
+    def __init__(self, app, rules: Sequence[Rule]):
+        self.app = app
+        self.rules = list(rules)
+
+    def _limiter(self, method: str, path: str) -> Optional[AdmissionLimiter]:
+        for rule_method, pattern, limiter in self.rules:
+            if rule_method == method and pattern.fullmatch(path):
+                return limiter
+        return None
+
+    async def __call__(self, scope, receive, send):
+        limiter = self._limiter(scope["method"], scope["path"]) if scope["type"] == "http" else None
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await limiter.acquire()
+        except AdmissionRejected as e:
+            logger.warning(f"Shed {scope['method']} {scope['path']}: {e.detail}")
+            response = JSONResponse(
+                {"detail": e.detail}, status_code=e.status_code,
+                headers={"Retry-After": str(e.retry_after)}
+            )
+            await response(scope, receive, send)
+            return
+
+        started = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release(time.monotonic() - started)
@@ -1,8 +1,53 @@
 """Database connection and configuration module."""
 
+import csv
+import io
+import re
+from datetime import date, datetime, timedelta, timezone
 import psycopg2
 from psycopg2.extensions import connection
-from typing import Optional, Any
+from typing import Optional, Any, List, Sequence, Tuple
+
+from app.game.hand_formatter import format_winnings
+
+# columns written for each hand, in insert order
+HAND_COLUMNS = (
+    "hand_id", "stack", "positions", "hand1", "hand2", "hand3",
+    "hand4", "hand5", "hand6", "actions", "winnings", "community_cards"
+)
+
+# widths of the VARCHAR columns of the hands table
+COLUMN_WIDTHS = {
+    "hand_id": 255, "positions": 60, "hand1": 5, "hand2": 5, "hand3": 5,
+    "hand4": 5, "hand5": 5, "hand6": 5, "actions": 400, "winnings": 100,
+    "community_cards": 20
+}
+
+# monthly partitions created ahead of the current month
+PARTITION_MONTHS_AHEAD = 3
+
+HANDS_TABLE_QUERY = """
+    CREATE TABLE IF NOT EXISTS hands (
+        id INTEGER NOT NULL DEFAULT nextval('hands_id_seq'),
+        hand_id VARCHAR(255),
+        stack INTEGER,
+        positions VARCHAR(60),
+        hand1 VARCHAR(5),
+        hand2 VARCHAR(5),
+        hand3 VARCHAR(5),
+        hand4 VARCHAR(5),
+        hand5 VARCHAR(5),
+        hand6 VARCHAR(5),
+        actions VARCHAR(400),
+        winnings VARCHAR(100),
+        community_cards VARCHAR(20),
+        created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+        -- unique keys of a partitioned table must hold the partition key
+        PRIMARY KEY (id, created_at)
+    ) PARTITION BY RANGE (created_at)
+"""
+
+PARTITION_BOUND = re.compile(r"TO \('([^']+)'\)")
 
 
 def get_db_connection() -> Optional[connection]:
@@ -32,36 +77,239 @@ def init_db(conn: connection) -> None:
     """
     Initialize database tables if they don't exist.
 
+    Hands are range-partitioned by ingest time into monthly partitions;
+    a table from before partitioning becomes the partition of all older
+    rows.
+
     Args:
         conn (connection): Database connection object.
     """
     try:
         cursor = conn.cursor()
-        create_table_query = """
-            CREATE TABLE IF NOT EXISTS hands (
-                id SERIAL PRIMARY KEY,
-                hand_id VARCHAR(255),
-                stack INTEGER,
-                positions VARCHAR(60),
-                hand1 VARCHAR(5),
-                hand2 VARCHAR(5),
-                hand3 VARCHAR(5),
-                hand4 VARCHAR(5),
-                hand5 VARCHAR(5),
-                hand6 VARCHAR(5),
-                actions VARCHAR(400),
-                winnings VARCHAR(100)
+        cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass('hands')")
+        row = cursor.fetchone()
+        legacy = row is not None and row[0] == "r"
+        if legacy:
+            _detach_legacy_table(cursor)
+
+        cursor.execute("CREATE SEQUENCE IF NOT EXISTS hands_id_seq")
+        cursor.execute(HANDS_TABLE_QUERY)
+        # tables created before the board was stored
+        cursor.execute(
+            "ALTER TABLE hands ADD COLUMN IF NOT EXISTS community_cards VARCHAR(20)"
+        )
+        if legacy:
+            cursor.execute(
+                "ALTER TABLE hands ATTACH PARTITION hands_legacy "
+                "FOR VALUES FROM (MINVALUE) TO (%s)",
+                (month_start(date.today()),)
             )
-        """
-        cursor.execute(create_table_query)
+        # tables partitioned before ids were kept unique
+        cursor.execute(
+            "SELECT 1 FROM pg_constraint WHERE conrelid = 'hands'::regclass AND contype = 'p'"
+        )
+        if cursor.fetchone() is None:
+            cursor.execute("ALTER TABLE hands ADD PRIMARY KEY (id, created_at)")
+        cursor.execute("DROP INDEX IF EXISTS hands_id_idx")
+        cursor.execute("CREATE INDEX IF NOT EXISTS hands_hand_id_idx ON hands (hand_id)")
+        # monthly partitions first, so their rows never land in the default
+        ensure_partitions(conn)
+        # rows outside every monthly partition land here instead of failing
+        cursor.execute("CREATE TABLE IF NOT EXISTS hands_default PARTITION OF hands DEFAULT")
         conn.commit()
         print("Table 'hands' is ready to use")
     except Exception as error:
+        conn.rollback()
         print(f"Error initializing database: {error}")
     finally:
         cursor.close()
 
 
+def _detach_legacy_table(cursor: Any) -> None:
+    """Turn an unpartitioned hands table into a partition of older rows."""
+    start = month_start(date.today())
+    cursor.execute("ALTER TABLE hands RENAME TO hands_legacy")
+    cursor.execute("ALTER INDEX IF EXISTS hands_hand_id_idx RENAME TO hands_legacy_hand_id_idx")
+    # the id sequence must outlive the partition once it is archived
+    cursor.execute("ALTER SEQUENCE IF EXISTS hands_id_seq OWNED BY NONE")
+    cursor.execute(
+        "ALTER TABLE hands_legacy ADD COLUMN IF NOT EXISTS community_cards VARCHAR(20)"
+    )
+    # a constant default fills existing rows without rewriting the table
+    cursor.execute(
+        "ALTER TABLE hands_legacy ADD COLUMN created_at TIMESTAMPTZ NOT NULL DEFAULT %s",
+        (start - timedelta(microseconds=1),)
+    )
+    print("Converting table 'hands' to a partitioned table")
+
+
+def month_start(day: date, months: int = 0) -> datetime:
+    """First instant in UTC of the month a number of months after day."""
+    month = day.year * 12 + day.month - 1 + months
+    return datetime(month // 12, month % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def ensure_partitions(conn: connection, months_ahead: int = PARTITION_MONTHS_AHEAD,
+                      today: Optional[date] = None) -> List[str]:
+    """
+    Create the monthly partitions of the current and coming months.
+
+    Rows of a new month that already landed in the default partition are
+    moved into its partition before it is attached, since attaching fails
+    while the default partition holds rows of its range.
+
+    Args:
+        conn (connection): Database connection object.
+        months_ahead (int): Months after the current one to create.
+        today (Optional[date]): Day to count from, today by default.
+
+    Returns:
+        List[str]: Names of the partitions, created or already there.
+    """
+    today = today or date.today()
+    names = []
+    try:
+        _create_partitions(conn, today, months_ahead, names)
+    except Exception:
+        conn.rollback()
+        raise
+    conn.commit()
+    return names
+
+
+def _create_partitions(conn: connection, today: date, months_ahead: int, names: List[str]) -> None:
+    """Create the missing partitions in one transaction, adding every name to names."""
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT to_regclass('hands_default') IS NOT NULL")
+        has_default = cursor.fetchone()[0]
+        for months in range(months_ahead + 1):
+            start, end = month_start(today, months), month_start(today, months + 1)
+            name = f"hands_p{start:%Y%m}"
+            names.append(name)
+            cursor.execute("SELECT to_regclass(%s) IS NOT NULL", (name,))
+            if cursor.fetchone()[0]:
+                continue
+            cursor.execute(f"CREATE TABLE {name} (LIKE hands INCLUDING DEFAULTS)")
+            if has_default:
+                # no new rows of the month may reach the default until it is attached
+                cursor.execute("LOCK TABLE hands_default IN ACCESS EXCLUSIVE MODE")
+                cursor.execute(
+                    f"WITH moved AS (DELETE FROM hands_default "
+                    f"WHERE created_at >= %s AND created_at < %s RETURNING *) "
+                    f"INSERT INTO {name} SELECT * FROM moved",
+                    (start, end)
+                )
+            cursor.execute(
+                f"ALTER TABLE hands ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)",
+                (start, end)
+            )
+
+
+def list_partitions(conn: connection) -> List[Tuple[str, Optional[datetime]]]:
+    """
+    List the partitions of the hands table.
+
+    Args:
+        conn (connection): Database connection object.
+
+    Returns:
+        List[Tuple[str, Optional[datetime]]]: Name and exclusive upper
+            bound of each partition, oldest first; None for the default.
+    """
+    with conn.cursor() as cursor:
+        # bounds are printed in the session time zone
+        cursor.execute("SET LOCAL TimeZone = 'UTC'")
+        cursor.execute("""
+            SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+            FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = 'hands'::regclass
+        """)
+        rows = cursor.fetchall()
+    conn.commit()
+    partitions = [(name, partition_upper_bound(bound)) for name, bound in rows]
+    far_future = datetime.max.replace(tzinfo=timezone.utc)
+    return sorted(partitions, key=lambda p: p[1] or far_future)
+
+
+def partition_upper_bound(bound: str) -> Optional[datetime]:
+    """
+    Parse the upper bound of a partition bound expression.
+
+    Args:
+        bound (str): Expression like "FOR VALUES FROM (...) TO ('...')".
+
+    Returns:
+        Optional[datetime]: Exclusive upper bound, None without one.
+    """
+    match = PARTITION_BOUND.search(bound or "")
+    if not match:
+        return None
+    text = match.group(1)
+    # postgres writes offsets as +00, fromisoformat wants +00:00 before 3.11
+    if re.search(r"[+-]\d\d$", text):
+        text += ":00"
+    return datetime.fromisoformat(text)
+
+
+def detach_partition(conn: connection, name: str) -> None:
+    """
+    Detach a partition from the hands table and drop it.
+
+    Args:
+        conn (connection): Database connection object.
+        name (str): Partition name.
+    """
+    with conn.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE hands DETACH PARTITION {name}")
+        cursor.execute(f"DROP TABLE {name}")
+    conn.commit()
+
+
+def hand_row(hand_result: Any) -> Tuple:
+    """
+    Build the hands table row of an evaluated hand.
+
+    Args:
+        hand_result (Any): Hand result object containing game data.
+
+    Returns:
+        Tuple: Values in HAND_COLUMNS order.
+    """
+    # extracting hands
+    hands = [""] * 6
+    for i, player in enumerate(hand_result.players):
+        if i < 6:  # ensure not exceed the number of hand columns
+            hands[i] = player.cards
+
+    return (
+        hand_result.hand_id,
+        hand_result.stack_size,
+        hand_result.positions,
+        hands[0], hands[1], hands[2],
+        hands[3], hands[4], hands[5],
+        hand_result.actions,
+        format_winnings(hand_result.payoffs),
+        hand_result.community_cards
+    )
+
+
+def row_error(row: Tuple) -> Optional[str]:
+    """
+    Check that a row fits the hands table columns.
+
+    Args:
+        row (Tuple): Values in HAND_COLUMNS order.
+
+    Returns:
+        Optional[str]: Error message, None if the row fits.
+    """
+    for column, value in zip(HAND_COLUMNS, row):
+        width = COLUMN_WIDTHS.get(column)
+        if width and value is not None and len(value) > width:
+            return f"Column {column} is longer than {width} characters"
+    return None
+
+
 def save_evaluated_hand(connection: connection, hand_result: Any) -> bool:
     """
     Save an evaluated poker hand to the database.
@@ -76,37 +324,14 @@ def save_evaluated_hand(connection: connection, hand_result: Any) -> bool:
     try:
         cursor = connection.cursor()
 
-        # extracting hands
-        hands = [""] * 6
-        for i, player in enumerate(hand_result.players):
-            if i < 6:  # ensure not exceed the number of hand columns
-                hands[i] = player.cards
-
-        # formatting payoffs
-        formatted_winnings = "; ".join([
-            f"Player {i + 1}: {'+' + str(payoff) if payoff > 0 else str(payoff)}"
-            for i, payoff in enumerate(hand_result.payoffs)
-        ])
-
         # inserting to db query
-        insert_query = """
-            INSERT INTO hands (
-                hand_id, stack, positions, hand1, hand2, hand3,
-                hand4, hand5, hand6, actions, winnings
-            )
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        insert_query = f"""
+            INSERT INTO hands ({", ".join(HAND_COLUMNS)})
+            VALUES ({", ".join(["%s"] * len(HAND_COLUMNS))})
         """
 
         # executing query
-        cursor.execute(insert_query, (
-            hand_result.hand_id,
-            hand_result.stack_size,
-            hand_result.positions,
-            hands[0], hands[1], hands[2],
-            hands[3], hands[4], hands[5],
-            hand_result.actions,
-            formatted_winnings
-        ))
+        cursor.execute(insert_query, hand_row(hand_result))
 
         connection.commit()
         return True
@@ -114,4 +339,40 @@ def save_evaluated_hand(connection: connection, hand_result: Any) -> bool:
         print(f"Error while saving hand to database: {error}")
         return False
     finally:
-        cursor.close() 
\ No newline at end of file
+        cursor.close()
+
+
+def save_evaluated_hands(connection: connection, hand_results: Sequence[Any]) -> int:
+    """
+    Bulk load evaluated hands with COPY in one transaction.
+
+    Args:
+        connection (connection): Database connection object.
+        hand_results (Sequence[Any]): Hand result objects containing game data.
+
+    Returns:
+        int: Number of rows loaded.
+
+    Raises:
+        psycopg2.Error: If the load fails; nothing from the batch is kept.
+    """
+    buffer = io.StringIO()
+    # quoted so empty strings stay empty instead of NULL
+    writer = csv.writer(buffer, quoting=csv.QUOTE_NONNUMERIC)
+    for hand_result in hand_results:
+        writer.writerow(hand_row(hand_result))
+    buffer.seek(0)
+
+    cursor = connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY hands ({', '.join(HAND_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+            buffer
+        )
+        connection.commit()
+        return len(hand_results)
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
@@ -0,0 +1,190 @@
+"""Module for validating many hands at once with array operations."""
+
+import logging
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.models import HandInfo
+from app.game.game_validator import (
+    MAX_PLAYERS, MIN_PLAYERS, VALID_CARDS, VALID_POSITIONS, VALID_SUITS,
+    GameValidationError, validate_actions, validate_betting_rounds,
+    validate_cards, validate_players, validate_positions
+)
+
+# logs for debug
+logger = logging.getLogger(__name__)
+
+POSITION_CODES = {position: i for i, position in enumerate(sorted(VALID_POSITIONS))}
+REQUIRED_POSITIONS = (1 << POSITION_CODES['BTN']) | (1 << POSITION_CODES['BB'])
+# position codes of empty and unknown positions
+NO_POSITION = -2
+BAD_POSITION = -1
+
+# card characters to rank and suit numbers, -1 where invalid; suits are case-insensitive
+RANK_CODES = np.full(256, -1, dtype=np.int16)
+SUIT_CODES = np.full(256, -1, dtype=np.int16)
+for _i, _rank in enumerate(sorted(VALID_CARDS, key="23456789TJQKA".index)):
+    RANK_CODES[ord(_rank)] = _i
+for _i, _suit in enumerate(sorted(VALID_SUITS)):
+    SUIT_CODES[ord(_suit)] = SUIT_CODES[ord(_suit.upper())] = _i
+
+# a hand as fixed-width text: hole cards joined by '|' and board cards by
+# spaces, so a card string of the wrong length moves a separator off its slot
+HOLE_WIDTH = 5
+BOARD_WIDTH = 3
+BOARD_SLOTS = 5
+HOLE_TEXT = HOLE_WIDTH * MAX_PLAYERS
+RECORD_WIDTH = HOLE_TEXT + BOARD_WIDTH * BOARD_SLOTS
+HOLE_SEPARATOR = ord("|")
+
+# ids and stacks are packed into int64 arrays
+INT64_MIN, INT64_MAX = int(np.iinfo(np.int64).min), int(np.iinfo(np.int64).max)
+
+def _fits_int64(values: List[int]) -> bool:
+    return all(INT64_MIN <= v <= INT64_MAX for v in values)
+
+def _any_duplicates(values: np.ndarray, valid: np.ndarray) -> np.ndarray:
+    """Whether each row has two equal valid values, for (N, K) arrays."""
+    # padding gets distinct negative values so it never matches
+    padded = np.where(valid, values, -1 - np.arange(values.shape[1]) - (1 << 20))
+    ordered = np.sort(padded, axis=1)
+    return (ordered[:, 1:] == ordered[:, :-1]).any(axis=1)
+
+def _card_numbers(chars: np.ndarray) -> np.ndarray:
+    """Card numbers of (..., 2) rank and suit characters, -1 for invalid cards."""
+    ranks, suits = RANK_CODES[chars[..., 0]], SUIT_CODES[chars[..., 1]]
+    return np.where((ranks >= 0) & (suits >= 0), ranks * 4 + suits, -1)
+
+def validate_hands(hands: Sequence[HandInfo]) -> List[Optional[str]]:
+    """Validate hands in one pass and return an error message per hand.
+
+    Entries are None for valid hands and otherwise the message that
+    validate_hand_info would raise. Counts, players, positions and cards
+    are checked with array operations over the whole batch; only hands
+    that fail a check, and the action history of the rest, go through the
+    per-hand validators.
+    """
+    n = len(hands)
+    errors: List[Optional[str]] = [None] * n
+    if not n:
+        return errors
+
+    counts = np.array([len(h.players) for h in hands])
+    seated = np.arange(MAX_PLAYERS) < counts[:, None]
+
+    # basic checks, in the order validate_hand_info runs them
+    basic = [
+        (np.array([not h.hand_id for h in hands]), "Hand ID is required"),
+        (counts == 0, "Players list cannot be empty"),
+        ((counts < MIN_PLAYERS) | (counts > MAX_PLAYERS),
+         f"Number of players must be between {MIN_PLAYERS} and {MAX_PLAYERS}"),
+        (np.array([h.stack_size <= 0 for h in hands]), "Stack size must be positive"),
+    ]
+    failed = np.zeros(n, dtype=bool)
+    for mask, message in basic:
+        for i in np.flatnonzero(mask & ~failed):
+            errors[i] = message
+        failed |= mask
+
+    # one pass over the objects, everything after it works on arrays
+    id_rows, stack_rows, position_rows, board_counts, records, record_lengths = [], [], [], [], [], []
+    out_of_range: List[Optional[str]] = []
+    for hand_info in hands:
+        seats = hand_info.players[:MAX_PLAYERS]
+        empty = MAX_PLAYERS - len(seats)
+        seat_ids, seat_stacks = [p.id for p in seats], [p.stack for p in seats]
+        # a value that does not fit fails this hand only, zeros keep the arrays packable
+        if not _fits_int64(seat_stacks):
+            out_of_range.append("Stack out of range")
+            seat_stacks = [0] * len(seats)
+        elif not _fits_int64(seat_ids):
+            out_of_range.append("Player ID out of range")
+            seat_ids = [0] * len(seats)
+        else:
+            out_of_range.append(None)
+        id_rows.append(seat_ids + [0] * empty)
+        stack_rows.append(seat_stacks + [0] * empty)
+        position_rows.append(
+            [POSITION_CODES.get(p.position, BAD_POSITION if p.position else NO_POSITION) for p in seats]
+            + [NO_POSITION] * empty
+        )
+        board = hand_info.community_cards.split() if hand_info.community_cards else []
+        board_counts.append(len(board))
+        hole_text = "|".join([p.cards or "" for p in seats]) + "|"
+        board_text = " ".join(board) + " "
+        record_lengths.append((len(hole_text), len(board_text)))
+        board_width = RECORD_WIDTH - HOLE_TEXT
+        records.append(hole_text[:HOLE_TEXT].ljust(HOLE_TEXT) + board_text[:board_width].ljust(board_width))
+    for i, message in enumerate(out_of_range):
+        if message and not failed[i]:
+            errors[i] = message
+            failed[i] = True
+    ids = np.array(id_rows, dtype=np.int64)
+    stacks = np.array(stack_rows, dtype=np.int64)
+    positions = np.array(position_rows, dtype=np.int64)
+    board_counts = np.array(board_counts, dtype=np.int64)
+    text = np.frombuffer("".join(records).encode("ascii", "replace"), dtype=np.uint8).reshape(n, RECORD_WIDTH)
+    hole = text[:, :HOLE_TEXT].reshape(n, MAX_PLAYERS, HOLE_WIDTH)
+    board_text = text[:, HOLE_TEXT:].reshape(n, BOARD_SLOTS, BOARD_WIDTH)
+    lengths = np.array(record_lengths, dtype=np.int64).reshape(n, 2)
+
+    held = np.where(seated & (positions >= 0), 1 << np.maximum(positions, 0), 0)
+    held = np.bitwise_or.reduce(held, axis=1)
+
+    # four characters per seat, with every separator where it belongs
+    hole_cards = _card_numbers(hole[:, :, :4].reshape(n, MAX_PLAYERS, 2, 2)).reshape(n, 2 * MAX_PLAYERS)
+    hole_valid = np.repeat(seated, 2, axis=1)
+    hole_ok = (
+        (lengths[:, 0] == HOLE_WIDTH * np.minimum(counts, MAX_PLAYERS))
+        & ((hole[:, :, 4] == HOLE_SEPARATOR) | ~seated).all(axis=1)
+    )
+
+    board_cards = _card_numbers(board_text[:, :, :2])
+    board_valid = np.arange(BOARD_SLOTS) < board_counts[:, None]
+    board_ok = (
+        np.isin(board_counts, (0, 3, 4, 5))
+        & ((lengths[:, 1] == BOARD_WIDTH * board_counts) | (board_counts == 0))
+    )
+
+    cards = np.concatenate([hole_cards, board_cards], axis=1)
+    card_valid = np.concatenate([hole_valid, board_valid], axis=1)
+    stages: List[tuple] = [
+        (_any_duplicates(ids, seated) | (seated & (stacks < 0)).any(axis=1),
+         lambda h: validate_players(h.players)),
+        ((seated & (positions < 0)).any(axis=1) | _any_duplicates(positions, seated)
+         | ((held & REQUIRED_POSITIONS) != REQUIRED_POSITIONS),
+         lambda h: validate_positions(h.players)),
+        (~hole_ok | ~board_ok | (card_valid & (cards < 0)).any(axis=1)
+         | _any_duplicates(cards, card_valid),
+         validate_cards),
+    ]
+    for mask, check in stages:
+        # flagged hands get the exact message from the per-hand check
+        for i in np.flatnonzero(mask & ~failed):
+            errors[i] = _message(check, hands[i])
+            failed[i] = errors[i] is not None
+
+    # actions are a sequential state machine checked per hand, but they only
+    # depend on the actions, player ids and board size, which repeat a lot
+    histories: Dict[tuple, Optional[str]] = {}
+    for i in np.flatnonzero(~failed):
+        key = (hands[i].actions, tuple(id_rows[i][:counts[i]]), int(board_counts[i]))
+        if key not in histories:
+            histories[key] = _message(_validate_history, hands[i])
+        errors[i] = histories[key]
+
+    logger.debug(f"Validated {n} hands, {sum(e is not None for e in errors)} invalid")
+    return errors
+
+def _validate_history(hand_info: HandInfo) -> None:
+    validate_actions(hand_info)
+    validate_betting_rounds(hand_info)
+
+def _message(check: Callable[[HandInfo], None], hand_info: HandInfo) -> Optional[str]:
+    """Error message of a per-hand check, None if it passes."""
+    try:
+        check(hand_info)
+    except (GameValidationError, ValueError) as e:
+        return str(e)
+    return None
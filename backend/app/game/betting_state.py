@@ -0,0 +1,125 @@
+"""Module for validating poker actions one at a time."""
+
+import logging
+from typing import Dict, Iterable, List, Set
+
+from app.game.game_validator import VALID_ACTIONS, GameValidationError
+
+# logs for debug
+logger = logging.getLogger(__name__)
+
+# max betting rounds in a hand: preflop, flop, turn, river
+MAX_ROUNDS = 4
+
+# community cards expected after each completed round
+EXPECTED_CARDS = {
+    1: 3,  # Flop
+    2: 4,  # Turn
+    3: 5   # River
+}
+
+class BettingState:
+    """Betting state of a live hand, updated as each action arrives.
+
+    Applies the same rules as validate_actions and validate_betting_rounds,
+    but keeps the round state between actions, so each action is checked in
+    constant time instead of re-validating the whole action string.
+    """
+
+    __slots__ = (
+        'active_players', 'folded_players', 'round_players',
+        'round_actions', 'last_raise', 'rounds', 'actions'
+    )
+
+    def __init__(self, player_ids: Iterable[int]):
+        self.active_players: Set[int] = set(player_ids)
+        self.folded_players: Set[int] = set()
+        self.round_players: Set[int] = set()
+        self.round_actions = 0
+        self.last_raise = 0
+        self.rounds = 0
+        self.actions: List[str] = []
+
+    def apply(self, action: str) -> None:
+        """Validate a single action like '1:raise,50' and apply it."""
+        parts = action.split(':')
+        if len(parts) != 2:
+            raise GameValidationError(f"Invalid action format: {action}")
+
+        try:
+            player_id = int(parts[0])
+        except ValueError:
+            raise GameValidationError(f"Invalid action format: {action}")
+        act = parts[1]
+
+        # check if player has folded first
+        if player_id in self.folded_players:
+            raise GameValidationError(f"Action from folded player: {player_id}")
+
+        # validate player ID
+        if player_id not in self.active_players:
+            raise GameValidationError(f"Action from invalid player: {player_id}")
+
+        # validate action type
+        action_type = act.split(',')[0]
+        if action_type not in VALID_ACTIONS:
+            raise GameValidationError(f"Invalid action type: {action_type}")
+
+        # only one player left means they cant act anymore
+        if (action_type != 'fold' and len(self.active_players) == 1
+                and self.round_actions > 0):
+            raise GameValidationError(f"Action from last remaining player: {player_id}")
+
+        # validate raise before changing any state
+        raise_amount = 0
+        if action_type == 'raise':
+            try:
+                raise_amount = int(act.split(',')[1])
+            except (IndexError, ValueError):
+                raise GameValidationError(f"Invalid raise format: {act}")
+            if raise_amount <= self.last_raise:
+                raise GameValidationError(f"Invalid raise amount: {raise_amount}")
+
+        # check if the action completes the round, and may, before changing any state
+        active_players = self.active_players - {player_id} if action_type == 'fold' else self.active_players
+        round_complete = (self.round_actions + 1 >= len(active_players)
+                          and self.round_players | {player_id} == active_players)
+        if round_complete and self.rounds + 1 > MAX_ROUNDS:
+            raise GameValidationError("Too many betting rounds")
+
+        # handle fold
+        if action_type == 'fold':
+            self.folded_players.add(player_id)
+            self.active_players.remove(player_id)
+
+        if action_type == 'raise':
+            self.last_raise = raise_amount
+
+        self.actions.append(action)
+        self.round_players.add(player_id)
+        self.round_actions += 1
+
+        if round_complete:
+            self.rounds += 1
+            self.round_players = set()
+            self.round_actions = 0
+            self.last_raise = 0  # reset raise amount for new round
+            logger.debug(f"Betting round {self.rounds} complete")
+
+    def validate_community_cards(self, community_cards: str) -> None:
+        """Check the board size matches the completed betting rounds."""
+        if not community_cards:
+            return
+        comm_cards = community_cards.split()
+        if self.rounds > 1 and len(comm_cards) != EXPECTED_CARDS.get(self.rounds - 1, 0):
+            raise GameValidationError("Community cards don't match betting rounds")
+
+    def to_dict(self) -> Dict:
+        """Snapshot of the betting state for clients."""
+        return {
+            "active_players": sorted(self.active_players),
+            "folded_players": sorted(self.folded_players),
+            "round": self.rounds,
+            "last_raise": self.last_raise,
+            "actions": " ".join(self.actions)
+        }
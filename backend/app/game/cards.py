@@ -0,0 +1,37 @@
+"""Module for packing cards into single bytes."""
+
+from typing import List
+
+# cards are stored as one byte: rank index * 4 + suit index
+RANKS = "23456789TJQKA"
+SUITS = "hdcs"
+
+# byte for an empty card slot
+NO_CARD = 0xFF
+
+CARD_INDEX = {
+    rank + suit: r * 4 + s
+    for r, rank in enumerate(RANKS)
+    for s, suit in enumerate(SUITS)
+}
+
+def card_name(card: int) -> str:
+    """Convert a card byte to its text form, e.g. 'Ah'."""
+    return RANKS[card >> 2] + SUITS[card & 3]
+
+def card_index(card: str) -> int:
+    """Convert a card like 'Ah' or 'AH' to its byte."""
+    try:
+        # the validator accepts either suit case
+        return CARD_INDEX[card[:1] + card[1:].lower()]
+    except KeyError:
+        raise ValueError(f"Invalid card: {card}")
+
+def pack_cards(cards: str) -> bytes:
+    """Pack a card string like 'AhKh' or '7h 8h 9h' into bytes."""
+    cards = cards.replace(" ", "")
+    return bytes(card_index(cards[i:i + 2]) for i in range(0, len(cards), 2))
+
+def unpack_cards(packed: bytes) -> List[str]:
+    """Unpack card bytes, skipping empty slots."""
+    return [card_name(c) for c in packed if c != NO_CARD]
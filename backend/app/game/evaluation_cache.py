@@ -0,0 +1,150 @@
+"""Module for caching hand evaluations by hand content."""
+
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from app.models import HandInfo, HandResult
+from app.game.game_validator import GameValidationError, validate_hand_info
+from app.game.hand_evaluator import SMALL_BLIND, BIG_BLIND, evaluate_hand
+from app.game.hand_formatter import format_hand_result
+
+# logs for debug
+logger = logging.getLogger(__name__)
+
+# number of distinct hands kept
+CACHE_SIZE = 10000
+
+def hand_fingerprint(hand_info: HandInfo, small_blind: int = SMALL_BLIND, big_blind: int = BIG_BLIND) -> str:
+    """Hash everything but the hand ID that validation and evaluation depend on."""
+    # json quotes every string, so separators inside free text can not make two hands collide
+    canonical = json.dumps([
+        hand_info.stack_size,
+        hand_info.pot,
+        [[p.id, p.cards, p.position, p.stack] for p in hand_info.players],
+        hand_info.actions,
+        hand_info.community_cards,
+        small_blind,
+        big_blind
+    ], separators=(",", ":"))
+    return hashlib.blake2b(canonical.encode(), digest_size=16).hexdigest()
+
+class _CacheEntry:
+    """Cached outcomes for one fingerprint."""
+
+    __slots__ = ('payoffs', 'validated', 'validation_error')
+
+    def __init__(self):
+        self.payoffs: Optional[Tuple[int, ...]] = None
+        self.validated = False
+        self.validation_error: Optional[str] = None
+
+class EvaluationCache:
+    """Bounded LRU of payoffs and validation outcomes keyed by hand fingerprint.
+
+    Hands that differ only by ID share an entry; the cached payoffs are
+    formatted into a HandResult for the requested hand.
+    """
+
+    def __init__(self, max_size: int = CACHE_SIZE):
+        self._max_size = max_size
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counts = {"evaluation_hits": 0, "evaluation_misses": 0,
+                        "validation_hits": 0, "validation_misses": 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def evaluate(
+        self,
+        hand_info: HandInfo,
+        small_blind: int = SMALL_BLIND,
+        big_blind: int = BIG_BLIND
+    ) -> HandResult:
+        """Evaluate a hand, reusing payoffs of an identical earlier hand."""
+        result = self.lookup(hand_info, small_blind, big_blind)
+        if result is not None:
+            return result
+        result = evaluate_hand(hand_info, small_blind, big_blind)
+        self.store(hand_info, result, small_blind, big_blind)
+        return result
+
+    def lookup(
+        self,
+        hand_info: HandInfo,
+        small_blind: int = SMALL_BLIND,
+        big_blind: int = BIG_BLIND
+    ) -> Optional[HandResult]:
+        """Result built from cached payoffs, None (counted as a miss) if not cached."""
+        entry = self._entry(hand_fingerprint(hand_info, small_blind, big_blind))
+        if entry.payoffs is not None:
+            self._count("evaluation_hits")
+            return format_hand_result(hand_info, list(entry.payoffs))
+        self._count("evaluation_misses")
+        return None
+
+    def store(
+        self,
+        hand_info: HandInfo,
+        result: HandResult,
+        small_blind: int = SMALL_BLIND,
+        big_blind: int = BIG_BLIND
+    ) -> None:
+        """Keep the payoffs of a hand evaluated elsewhere."""
+        self._entry(hand_fingerprint(hand_info, small_blind, big_blind)).payoffs = tuple(result.payoffs)
+
+    def validate(self, hand_info: HandInfo) -> None:
+        """Validate a hand, reusing the outcome for an identical earlier hand."""
+        if not hand_info.hand_id:
+            raise GameValidationError("Hand ID is required")
+
+        entry = self._entry(hand_fingerprint(hand_info))
+        if entry.validated:
+            self._count("validation_hits")
+        else:
+            self._count("validation_misses")
+            try:
+                validate_hand_info(hand_info)
+            except GameValidationError as e:
+                entry.validation_error = str(e)
+            entry.validated = True
+
+        if entry.validation_error:
+            raise GameValidationError(entry.validation_error)
+
+    def stats(self) -> Dict[str, float]:
+        """Hit and miss counts with hit rates."""
+        with self._lock:
+            stats = dict(self._counts)
+        for kind in ("evaluation", "validation"):
+            total = stats[f"{kind}_hits"] + stats[f"{kind}_misses"]
+            stats[f"{kind}_hit_rate"] = stats[f"{kind}_hits"] / total if total else 0.0
+        stats["size"] = len(self._entries)
+        stats["max_size"] = self._max_size
+        return stats
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            for name in self._counts:
+                self._counts[name] = 0
+
+    def _entry(self, key: str) -> _CacheEntry:
+        """Get or create the entry for a fingerprint, evicting the oldest."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+            entry = self._entries[key] = _CacheEntry()
+            if len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+            return entry
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counts[name] += 1
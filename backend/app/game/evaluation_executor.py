@@ -0,0 +1,225 @@
+"""Module for running hand evaluations off the event loop.
+
+Each hand is sent down one of three lanes by its size: tiny hands are
+evaluated inline, where handing them to another thread costs more than
+the work; others go to a bounded thread pool; and, when a process pool
+is configured, the largest hands are sent to it as compact binary
+payloads so they do not hold the GIL of the serving process.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.models import HandInfo, HandResult
+from app.game.evaluation_cache import EvaluationCache
+from app.game.hand_codec import decode, encode_hand_info, encode_hand_result
+from app.game.hand_evaluator import BIG_BLIND, SMALL_BLIND, evaluate_hand
+from app.game.hand_replay import parse_actions
+
+# logs for debug
+logger = logging.getLogger(__name__)
+
+INLINE = "inline"
+THREAD = "thread"
+PROCESS = "process"
+STRATEGIES = ("auto", INLINE, THREAD, PROCESS)
+
+# hands up to this cost run inline and from this cost in the process pool
+INLINE_MAX_COST = 16
+PROCESS_MIN_COST = 60
+
+def hand_cost(hand_info: HandInfo) -> int:
+    """Rough evaluation cost of a hand: players times actions."""
+    try:
+        # both "1:raise,50 2:call" and "c:f:b40:r80" actions
+        actions = len(parse_actions(hand_info.actions))
+    except ValueError:
+        # the evaluation reports the error, count tokens by their separator
+        text = hand_info.actions
+        actions = len(text.split() if " " in text else text.split(":"))
+    return len(hand_info.players) * (actions + 1)
+
+def _evaluate_payload(payload: bytes, small_blind: int, big_blind: int) -> bytes:
+    """Evaluate an encoded hand into an encoded result, in a worker process."""
+    return encode_hand_result(evaluate_hand(decode(payload), small_blind, big_blind))
+
+def _timed(function: Callable, *args) -> Tuple[Any, float, float]:
+    """Result of a function with its start and end times, which are
+    comparable between processes of one host."""
+    started = time.time()
+    result = function(*args)
+    return result, started, time.time()
+
+class _LaneStats:
+    """Queueing counters of one lane."""
+
+    __slots__ = ('submitted', 'completed', 'failed', 'pending', 'peak_pending', 'wait', 'run')
+
+    def __init__(self):
+        self.submitted = self.completed = self.failed = 0
+        self.pending = self.peak_pending = 0
+        self.wait = self.run = 0.0
+
+    def to_dict(self) -> Dict:
+        return {
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "pending": self.pending,
+            "peak_pending": self.peak_pending,
+            "avg_queue_wait_ms": round(1000 * self.wait / self.completed, 3) if self.completed else 0.0,
+            "avg_run_ms": round(1000 * self.run / self.completed, 3) if self.completed else 0.0
+        }
+
+class EvaluationExecutor:
+    """Evaluates hands inline, in a thread pool or in a process pool by size.
+
+    strategy "auto" picks the lane per hand from its cost; any other
+    strategy sends every hand that is not cached down that lane. The
+    process pool is only used when processes is above zero.
+    """
+
+    def __init__(
+        self,
+        cache: Optional[EvaluationCache] = None,
+        strategy: str = "auto",
+        threads: int = 4,
+        processes: int = 0,
+        inline_max_cost: int = INLINE_MAX_COST,
+        process_min_cost: int = PROCESS_MIN_COST
+    ):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown evaluation strategy: {strategy}")
+        if strategy == PROCESS and processes < 1:
+            raise ValueError("The process strategy needs at least one process")
+        self.cache = cache
+        self.strategy = strategy
+        self.threads = max(1, threads)
+        self.processes = max(0, processes)
+        self.inline_max_cost = inline_max_cost
+        self.process_min_cost = process_min_cost
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        self._lanes = {lane: _LaneStats() for lane in (INLINE, THREAD, PROCESS)}
+        self.cache_hits = 0
+
+    @classmethod
+    def from_env(cls, cache: Optional[EvaluationCache] = None) -> "EvaluationExecutor":
+        """Executor configured by EVALUATION_STRATEGY, _THREADS, _PROCESSES,
+        _INLINE_MAX_COST and _PROCESS_MIN_COST."""
+        return cls(
+            cache,
+            os.environ.get("EVALUATION_STRATEGY", "auto"),
+            int(os.environ.get("EVALUATION_THREADS", 4)),
+            int(os.environ.get("EVALUATION_PROCESSES", 0)),
+            int(os.environ.get("EVALUATION_INLINE_MAX_COST", INLINE_MAX_COST)),
+            int(os.environ.get("EVALUATION_PROCESS_MIN_COST", PROCESS_MIN_COST))
+        )
+
+    def lane(self, hand_info: HandInfo) -> str:
+        """Lane a hand is evaluated in."""
+        if self.strategy != "auto":
+            return self.strategy
+        cost = hand_cost(hand_info)
+        if cost <= self.inline_max_cost:
+            return INLINE
+        if self.processes and cost >= self.process_min_cost:
+            return PROCESS
+        return THREAD
+
+    async def evaluate(
+        self,
+        hand_info: HandInfo,
+        small_blind: int = SMALL_BLIND,
+        big_blind: int = BIG_BLIND
+    ) -> HandResult:
+        """Evaluate a hand without blocking the event loop for more than a tiny hand."""
+        if self.cache is not None:
+            cached = self.cache.lookup(hand_info, small_blind, big_blind)
+            if cached is not None:
+                self.cache_hits += 1
+                return cached
+
+        lane = self.lane(hand_info)
+        if lane == PROCESS:
+            payload = await self._run(
+                PROCESS, self._processes(), _evaluate_payload,
+                encode_hand_info(hand_info), small_blind, big_blind
+            )
+            result = decode(payload)
+        else:
+            pool = self._threads() if lane == THREAD else None
+            result = await self._run(lane, pool, evaluate_hand, hand_info, small_blind, big_blind)
+
+        if self.cache is not None:
+            self.cache.store(hand_info, result, small_blind, big_blind)
+        return result
+
+    async def run(self, function: Callable, *args):
+        """Run other CPU-bound work, like equity calculations, in the thread lane."""
+        return await self._run(THREAD, self._threads(), function, *args)
+
+    async def _run(self, lane: str, pool: Optional[Executor], function: Callable, *args):
+        """Run a function in a pool, or inline without one, counting its queue wait and run time."""
+        stats = self._lanes[lane]
+        stats.submitted += 1
+        stats.pending += 1
+        stats.peak_pending = max(stats.peak_pending, stats.pending)
+        submitted = time.time()
+        try:
+            if pool is None:
+                result, started, finished = _timed(function, *args)
+            else:
+                loop = asyncio.get_running_loop()
+                result, started, finished = await loop.run_in_executor(pool, _timed, function, *args)
+        except Exception:
+            stats.failed += 1
+            raise
+        finally:
+            stats.pending -= 1
+        # counters are only touched on the event loop thread
+        stats.completed += 1
+        stats.wait += max(0.0, started - submitted)
+        stats.run += finished - started
+        return result
+
+    def _threads(self) -> ThreadPoolExecutor:
+        with self._pool_lock:
+            if self._thread_pool is None:
+                self._thread_pool = ThreadPoolExecutor(self.threads, thread_name_prefix="evaluate")
+            return self._thread_pool
+
+    def _processes(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._process_pool is None:
+                # spawn, since forking a process that runs threads is unsafe
+                self._process_pool = ProcessPoolExecutor(
+                    self.processes, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._process_pool
+
+    def stats(self) -> Dict:
+        """Configuration and queueing counters of each lane."""
+        return {
+            "strategy": self.strategy,
+            "threads": self.threads,
+            "processes": self.processes,
+            "inline_max_cost": self.inline_max_cost,
+            "process_min_cost": self.process_min_cost,
+            "cache_hits": self.cache_hits,
+            "lanes": {lane: stats.to_dict() for lane, stats in self._lanes.items()}
+        }
+
+    def shutdown(self) -> None:
+        with self._pool_lock:
+            for pool in (self._thread_pool, self._process_pool):
+                if pool is not None:
+                    pool.shutdown(wait=False, cancel_futures=True)
+            self._thread_pool = self._process_pool = None
@@ -0,0 +1,123 @@
+"""Module for evaluating many poker hands at once with bitmasks."""
+
+import logging
+from typing import Iterable, List
+
+import numpy as np
+
+from app.game.cards import card_index
+from app.game.shared_tables import shared_tables
+
+# logs for debug
+logger = logging.getLogger(__name__)
+
+# a hand is four 13-bit rank masks, one per suit in cards.SUITS order
+RANK_MASK_SIZE = 1 << 13
+
+HAND_CATEGORIES = (
+    'High card', 'One pair', 'Two pair', 'Three of a kind', 'Straight',
+    'Flush', 'Full house', 'Four of a kind', 'Straight flush'
+)
+STRAIGHT = 4
+FLUSH = 5
+STRAIGHT_FLUSH = 8
+
+# scores are category << 26 | primary ranks << 13 | secondary ranks
+CATEGORY_SHIFT = 26
+PRIMARY_SHIFT = 13
+
+# bump when the tables below change, so stale shared files are not used
+TABLES_VERSION = 1
+
+def _build_tables():
+    """Lookup tables indexed by a 13-bit rank mask."""
+    masks = range(RANK_MASK_SIZE)
+    popcount = np.array([bin(m).count("1") for m in masks], dtype=np.int64)
+
+    top_bits = [np.zeros(RANK_MASK_SIZE, dtype=np.int64)]
+    highest = np.array([1 << (m.bit_length() - 1) if m else 0 for m in masks], dtype=np.int64)
+    all_masks = np.arange(RANK_MASK_SIZE, dtype=np.int64)
+    for _ in range(5):
+        kept = top_bits[-1]
+        top_bits.append(kept | highest[all_masks & ~kept])
+
+    # high card of the best straight as a one-bit mask, the wheel is 5 high
+    straight_high = np.zeros(RANK_MASK_SIZE, dtype=np.int64)
+    for m in masks:
+        extended = (m << 1) | (m >> 12)  # ace also plays low
+        runs = extended & (extended >> 1) & (extended >> 2) & (extended >> 3) & (extended >> 4)
+        if runs:
+            straight_high[m] = 1 << (runs.bit_length() - 1 + 3)
+    return {"popcount": popcount, "top_bits": np.stack(top_bits), "straight_high": straight_high}
+
+# built once per host and mapped read-only by every worker
+_TABLES = shared_tables("evaluator", TABLES_VERSION, _build_tables)
+POPCOUNT, TOP_BITS, STRAIGHT_HIGH = _TABLES["popcount"], _TABLES["top_bits"], _TABLES["straight_high"]
+
+# one suit mask per card of the deck, shape (52, 4)
+CARD_MASKS = np.zeros((52, 4), dtype=np.int64)
+CARD_MASKS[np.arange(52), np.arange(52) & 3] = 1 << (np.arange(52) >> 2)
+
+def suit_masks(cards: Iterable[str]) -> np.ndarray:
+    """Convert cards like ['Ah', 'Kh'] to four suit rank masks."""
+    masks = np.zeros(4, dtype=np.int64)
+    for card in cards:
+        index = card_index(card)
+        masks[index & 3] |= 1 << (index >> 2)
+    return masks
+
+def evaluate_masks(hands: np.ndarray) -> np.ndarray:
+    """Score hands given as (..., 4) suit masks; higher scores win.
+
+    Works for any number of cards up to seven per hand, and for any
+    leading shape, so a whole batch is evaluated in one call.
+    """
+    a, b, c, d = (hands[..., i] for i in range(4))
+    ranks = a | b | c | d
+    # ranks held at least two, three and four times
+    two_plus = (a & b) | (a & c) | (a & d) | (b & c) | (b & d) | (c & d)
+    three_plus = (a & b & c) | (a & b & d) | (a & c & d) | (b & c & d)
+    quads = a & b & c & d
+    trips = three_plus & ~quads
+    pairs = two_plus & ~three_plus
+
+    # with seven cards at most one suit can hold five
+    flush = np.where(POPCOUNT[hands] >= 5, hands, 0).max(axis=-1)
+    straight = STRAIGHT_HIGH[ranks]
+    straight_flush = STRAIGHT_HIGH[flush]
+
+    top1, top2, top3, top5 = TOP_BITS[1], TOP_BITS[2], TOP_BITS[3], TOP_BITS[5]
+    best_trips = top1[trips]
+    # second trips play as a pair in a full house
+    full_pair = top1[(trips & ~best_trips) | pairs]
+    top_pairs = top2[pairs]
+
+    conditions = [
+        straight_flush != 0,
+        quads != 0,
+        (best_trips != 0) & (full_pair != 0),
+        flush != 0,
+        straight != 0,
+        best_trips != 0,
+        POPCOUNT[pairs] >= 2,
+        pairs != 0,
+    ]
+    choices = [
+        (8 << CATEGORY_SHIFT) | straight_flush,
+        (7 << CATEGORY_SHIFT) | (quads << PRIMARY_SHIFT) | top1[ranks & ~quads],
+        (6 << CATEGORY_SHIFT) | (best_trips << PRIMARY_SHIFT) | full_pair,
+        (5 << CATEGORY_SHIFT) | top5[flush],
+        (4 << CATEGORY_SHIFT) | straight,
+        (3 << CATEGORY_SHIFT) | (best_trips << PRIMARY_SHIFT) | top2[ranks & ~best_trips],
+        (2 << CATEGORY_SHIFT) | (top_pairs << PRIMARY_SHIFT) | top1[ranks & ~top_pairs],
+        (1 << CATEGORY_SHIFT) | (pairs << PRIMARY_SHIFT) | top3[ranks & ~pairs],
+    ]
+    return np.select(conditions, choices, default=top5[ranks])
+
+def evaluate_cards(cards: List[str]) -> int:
+    """Score a single hand of up to seven cards."""
+    return int(evaluate_masks(suit_masks(cards)))
+
+def hand_category(score: int) -> str:
+    """Name of the made hand of a score."""
+    return HAND_CATEGORIES[score >> CATEGORY_SHIFT]
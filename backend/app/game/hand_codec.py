@@ -0,0 +1,323 @@
+"""Module for the compact binary encoding of hands and results.
+
+Layout of version 1, after the magic bytes, version and record kind:
+
+    hand_id, stack_size, pot, players (id, stack, position, cards),
+    community cards, actions, stack_info, positions, hole_cards,
+    payoffs (results only)
+
+Integers are varints (signed ones zigzag encoded), strings are a varint
+length and UTF-8 bytes, cards are single bytes as in app.game.cards, and
+actions are a stream of opcodes with varint amounts. Fields that do not
+fit the compact forms are stored as strings, so every hand round-trips
+exactly.
+"""
+
+import logging
+import re
+from typing import List, Tuple, Union
+
+from app.models import HandInfo, HandResult, PlayerInfo
+from app.game.cards import CARD_INDEX, card_name
+
+# logs for debug
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "application/octet-stream"
+MAGIC = b"PH"
+CODEC_VERSION = 1
+HAND_RECORD = 1
+RESULT_RECORD = 2
+
+# marks a field stored as a plain string instead of its compact form
+RAW = 0xFF
+
+POSITION_CODES = ('BTN', 'SB', 'BB', 'UTG', 'MP', 'CO', 'D')
+
+# community cards written with or without spaces
+BOARD_PACKED = 0
+BOARD_SPACED = 1
+
+# action stream styles: "1:raise,50 2:call" and "f:x:c:b40:r80"
+SEAT_ACTIONS = 1
+SHORT_ACTIONS = 2
+
+OP_FOLD, OP_CHECK, OP_CALL, OP_BET, OP_RAISE = range(5)
+SEAT_OPS = {'fold': OP_FOLD, 'check': OP_CHECK, 'call': OP_CALL, 'raise': OP_RAISE}
+SEAT_NAMES = {op: name for name, op in SEAT_OPS.items()}
+SHORT_OPS = {'f': OP_FOLD, 'x': OP_CHECK, 'c': OP_CALL, 'b': OP_BET, 'r': OP_RAISE}
+SHORT_NAMES = {op: name for name, op in SHORT_OPS.items()}
+
+SEAT_ACTION = re.compile(r"^(-?\d+):(fold|check|call|raise),?(\d*)$")
+SHORT_ACTION = re.compile(r"^([fxcbr])(\d*)$")
+
+Bytes = Union[bytes, bytearray, memoryview]
+
+class HandCodecError(ValueError):
+    """Raised for data that is not a valid hand encoding."""
+    pass
+
+class _Writer:
+    """Appends encoded values to a bytearray."""
+
+    __slots__ = ('buffer',)
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def uint(self, value: int) -> None:
+        while value > 0x7F:
+            self.buffer.append((value & 0x7F) | 0x80)
+            value >>= 7
+        self.buffer.append(value)
+
+    def sint(self, value: int) -> None:
+        # zigzag keeps small negative numbers small
+        self.uint(value << 1 if value >= 0 else (-value << 1) - 1)
+
+    def byte(self, value: int) -> None:
+        self.buffer.append(value)
+
+    def text(self, value: str) -> None:
+        data = value.encode()
+        self.uint(len(data))
+        self.buffer += data
+
+class _Reader:
+    """Reads encoded values from a memoryview without copying it."""
+
+    __slots__ = ('view', 'offset')
+
+    def __init__(self, data: Bytes):
+        self.view = memoryview(data).cast("B")
+        self.offset = 0
+
+    def uint(self) -> int:
+        result = shift = 0
+        view, offset = self.view, self.offset
+        while True:
+            if offset >= len(view):
+                raise HandCodecError("Truncated varint")
+            byte = view[offset]
+            offset += 1
+            result |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                self.offset = offset
+                return result
+            shift += 7
+
+    def sint(self) -> int:
+        value = self.uint()
+        return -((value + 1) >> 1) if value & 1 else value >> 1
+
+    def byte(self) -> int:
+        if self.offset >= len(self.view):
+            raise HandCodecError("Truncated data")
+        value = self.view[self.offset]
+        self.offset += 1
+        return value
+
+    def take(self, length: int) -> memoryview:
+        end = self.offset + length
+        if end > len(self.view):
+            raise HandCodecError("Truncated data")
+        data = self.view[self.offset:end]
+        self.offset = end
+        return data
+
+    def text(self) -> str:
+        try:
+            return str(self.take(self.uint()), "utf-8")
+        except UnicodeDecodeError as e:
+            raise HandCodecError(f"Invalid string: {e}")
+
+def _cards_bytes(cards: str) -> List[int]:
+    """Card bytes of an unspaced card string, empty if it does not pack."""
+    if len(cards) % 2:
+        return []
+    try:
+        return [CARD_INDEX[cards[i:i + 2]] for i in range(0, len(cards), 2)]
+    except KeyError:
+        return []
+
+def _write_board(writer: _Writer, board: str) -> None:
+    spaced = " " in board
+    cards = _cards_bytes(board.replace(" ", ""))
+    style = BOARD_SPACED if spaced else BOARD_PACKED
+    rendered = (" " if spaced else "").join(card_name(c) for c in cards)
+    if len(cards) > 7 or rendered != board:
+        writer.byte(RAW)
+        writer.text(board)
+        return
+    writer.byte(style)
+    writer.byte(len(cards))
+    writer.buffer += bytes(cards)
+
+def _read_board(reader: _Reader) -> str:
+    style = reader.byte()
+    if style == RAW:
+        return reader.text()
+    cards = reader.take(reader.byte())
+    if style not in (BOARD_PACKED, BOARD_SPACED) or any(c > 51 for c in cards):
+        raise HandCodecError("Invalid community cards")
+    return (" " if style == BOARD_SPACED else "").join(card_name(c) for c in cards)
+
+def _parse_actions(actions: str) -> Tuple[int, List[Tuple[int, int, int]]]:
+    """Style and (player, opcode, amount) list of an action string, style 0 if neither fits."""
+    seat = [SEAT_ACTION.match(a) for a in actions.split(" ")] if actions else []
+    if seat and all(seat):
+        return SEAT_ACTIONS, [(int(m.group(1)), SEAT_OPS[m.group(2)], int(m.group(3) or 0)) for m in seat]
+    short = [SHORT_ACTION.match(a) for a in actions.split(":")] if actions else []
+    if short and all(short):
+        return SHORT_ACTIONS, [(0, SHORT_OPS[m.group(1)], int(m.group(2) or 0)) for m in short]
+    return 0, []
+
+def _render_actions(style: int, parsed: List[Tuple[int, int, int]]) -> str:
+    if style == SEAT_ACTIONS:
+        return " ".join(
+            f"{player}:{SEAT_NAMES[op]}" + (f",{amount}" if op in (OP_BET, OP_RAISE) else "")
+            for player, op, amount in parsed
+        )
+    return ":".join(
+        SHORT_NAMES[op] + (str(amount) if op in (OP_BET, OP_RAISE) else "")
+        for _, op, amount in parsed
+    )
+
+def _write_actions(writer: _Writer, actions: str) -> None:
+    style, parsed = _parse_actions(actions)
+    if not style or _render_actions(style, parsed) != actions:
+        writer.byte(RAW)
+        writer.text(actions)
+        return
+    writer.byte(style)
+    writer.uint(len(parsed))
+    for player, op, amount in parsed:
+        if style == SEAT_ACTIONS:
+            writer.sint(player)
+        writer.byte(op)
+        if op in (OP_BET, OP_RAISE):
+            writer.uint(amount)
+
+def _read_actions(reader: _Reader) -> str:
+    style = reader.byte()
+    if style == RAW:
+        return reader.text()
+    if style not in (SEAT_ACTIONS, SHORT_ACTIONS):
+        raise HandCodecError(f"Unknown action style: {style}")
+    parsed = []
+    for _ in range(reader.uint()):
+        player = reader.sint() if style == SEAT_ACTIONS else 0
+        op = reader.byte()
+        if op > OP_RAISE or (style == SEAT_ACTIONS and op == OP_BET):
+            raise HandCodecError(f"Unknown action opcode: {op}")
+        parsed.append((player, op, reader.uint() if op in (OP_BET, OP_RAISE) else 0))
+    return _render_actions(style, parsed)
+
+def _encode(hand: HandInfo, kind: int) -> _Writer:
+    writer = _Writer()
+    writer.buffer += MAGIC
+    writer.byte(CODEC_VERSION)
+    writer.byte(kind)
+    writer.text(hand.hand_id)
+    writer.sint(hand.stack_size)
+    writer.sint(hand.pot)
+
+    writer.uint(len(hand.players))
+    for player in hand.players:
+        writer.sint(player.id)
+        writer.sint(player.stack)
+        if player.position in POSITION_CODES:
+            writer.byte(POSITION_CODES.index(player.position))
+        else:
+            writer.byte(RAW)
+            writer.text(player.position)
+        cards = _cards_bytes(player.cards)
+        if len(cards) == 2:
+            writer.buffer += bytes(cards)
+        else:
+            writer.byte(RAW)
+            writer.text(player.cards)
+
+    _write_board(writer, hand.community_cards)
+    _write_actions(writer, hand.actions)
+    writer.text(hand.stack_info)
+    writer.text(hand.positions)
+    writer.text(hand.hole_cards)
+    return writer
+
+def encode_hand_info(hand_info: HandInfo) -> bytes:
+    """Encode a hand."""
+    return bytes(_encode(hand_info, HAND_RECORD).buffer)
+
+def encode_hand_result(result: HandResult) -> bytes:
+    """Encode a result with its payoffs."""
+    writer = _encode(result, RESULT_RECORD)
+    writer.uint(len(result.payoffs))
+    for payoff in result.payoffs:
+        writer.sint(payoff)
+    return bytes(writer.buffer)
+
+def decode(data: Bytes) -> Union[HandInfo, HandResult]:
+    """Decode a hand or result, reading straight from the given buffer."""
+    reader = _Reader(data)
+    if bytes(reader.take(len(MAGIC))) != MAGIC:
+        raise HandCodecError("Not a hand encoding")
+    version = reader.byte()
+    if version != CODEC_VERSION:
+        raise HandCodecError(f"Unsupported hand encoding version: {version}")
+    kind = reader.byte()
+    if kind not in (HAND_RECORD, RESULT_RECORD):
+        raise HandCodecError(f"Unknown record kind: {kind}")
+
+    hand_id = reader.text()
+    stack_size = reader.sint()
+    pot = reader.sint()
+    players = []
+    for _ in range(reader.uint()):
+        player_id = reader.sint()
+        stack = reader.sint()
+        code = reader.byte()
+        if code == RAW:
+            position = reader.text()
+        elif code < len(POSITION_CODES):
+            position = POSITION_CODES[code]
+        else:
+            raise HandCodecError(f"Unknown position code: {code}")
+        first = reader.byte()
+        if first == RAW:
+            cards = reader.text()
+        else:
+            second = reader.byte()
+            if first > 51 or second > 51:
+                raise HandCodecError("Invalid card byte")
+            cards = card_name(first) + card_name(second)
+        players.append(PlayerInfo(id=player_id, cards=cards, position=position, stack=stack))
+
+    fields = dict(
+        hand_id=hand_id,
+        stack_size=stack_size,
+        players=players,
+        community_cards=_read_board(reader),
+        actions=_read_actions(reader),
+        stack_info=reader.text(),
+        positions=reader.text(),
+        hole_cards=reader.text(),
+        pot=pot
+    )
+    if kind == HAND_RECORD:
+        decoded = HandInfo(**fields)
+    else:
+        payoffs = [reader.sint() for _ in range(reader.uint())]
+        decoded = HandResult(**fields, payoffs=payoffs)
+    # a truncated or concatenated body must not pass as one record
+    if reader.offset != len(reader.view):
+        raise HandCodecError(f"{len(reader.view) - reader.offset} bytes after the record")
+    return decoded
+
+def decode_hand_info(data: Bytes) -> HandInfo:
+    """Decode a hand; results decode to their HandInfo fields."""
+    decoded = decode(data)
+    if isinstance(decoded, HandResult):
+        fields = {name: getattr(decoded, name) for name in HandInfo.__dataclass_fields__}
+        return HandInfo(**fields)
+    return decoded
@@ -1,7 +1,7 @@
 """Module for evaluating poker hands."""
 
 import logging
-from app.models import HandInfo, HandResult
+from app.models import BIG_BLIND, SMALL_BLIND, HandInfo, HandResult
 from app.game.hand_formatter import format_hand_result
 from app.game.payoff_calculator import (
     calculate_player_contributions,
@@ -12,14 +12,16 @@ from app.game.payoff_calculator import (
 # logs for debug
 logger = logging.getLogger(__name__)
 
-def evaluate_hand(hand_info: HandInfo) -> HandResult:
+def evaluate_hand(
+    hand_info: HandInfo,
+    small_blind: int = SMALL_BLIND,
+    big_blind: int = BIG_BLIND
+) -> HandResult:
     """Evaluate a poker hand and calculate payoffs."""
     try:
         logger.info(f"Evaluating hand {hand_info.hand_id}")
         
-        # calculate blinds and player count
-        small_blind = 20
-        big_blind = 40
+        # player count
         player_count = len(hand_info.players)
         logger.info(f"Game setup - Players: {player_count}, Small blind: {small_blind}, Big blind: {big_blind}")
         
@@ -1,9 +1,15 @@
-"""Module for formatting poker hand results."""
+"""Module for formatting poker hand results.
+
+The display strings of a HandResult (stack_info, positions, hole_cards)
+are left out by format_hand_result and built by the functions here only
+when they are first read, so evaluations whose results are never
+rendered skip building them.
+"""
 
 import logging
-from typing import List
+from typing import List, Optional, Tuple, Union
 
-from app.models import HandInfo, HandResult
+from app.models import HandInfo, HandResult, PlayerInfo
 
 # logs for debug
 logger = logging.getLogger(__name__)
@@ -12,35 +18,24 @@ def format_hand_result(hand_info: HandInfo, payoffs: List[int]) -> HandResult:
     """Format the hand result with payoffs."""
     try:
         # log player positions for debug
-        logger.debug("Player positions:")
-        for player in hand_info.players:
-            logger.debug(f"Player {player.id}: position='{player.position}'")
-
-        # format stack info
-        stack_info = f"Stack {hand_info.stack_size}"
-
-        # format positions
-        positions = format_positions(hand_info)
-
-        # format hole cards
-        hole_cards = format_hole_cards(hand_info)
-
-        # format actions
-        actions = format_actions(hand_info)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Player positions:")
+            for player in hand_info.players:
+                logger.debug(f"Player {player.id}: position='{player.position}'")
 
-        # format community cards
-        community_cards = format_community_cards(hand_info)
+        # positions are built when read, unless the players lack them
+        positions = None
+        if _blind_players(hand_info.players) is None:
+            logger.warning("Could not find positions in player objects, using positions string")
+            positions = hand_info.positions
 
-        # We'll remove the winner calculation since it's not part of HandResult
         return HandResult(
             hand_id=hand_info.hand_id,
             stack_size=hand_info.stack_size,
             players=hand_info.players,
-            actions=actions,
-            community_cards=community_cards,
-            stack_info=stack_info,
+            actions=format_actions(hand_info),
+            community_cards=format_community_cards(hand_info),
             positions=positions,
-            hole_cards=hole_cards,
             pot=hand_info.pot,
             payoffs=payoffs
         )
@@ -48,24 +43,34 @@ def format_hand_result(hand_info: HandInfo, payoffs: List[int]) -> HandResult:
         logger.error(f"Error in format_hand_result: {str(e)}", exc_info=True)
         raise
 
-def format_positions(hand_info: HandInfo) -> str:
-    """Format player positions."""
-    try:
-        dealer = next(p for p in hand_info.players if p.position == "D")
-        sb = next(p for p in hand_info.players if p.position == "SB")
-        bb = next(p for p in hand_info.players if p.position == "BB")
-        return (
-            f"Dealer: Player {dealer.id}; "
-            f"Player {sb.id} Small blind; "
-            f"Player {bb.id} Big blind"
-        )
-    except StopIteration:
-        logger.warning("Could not find positions in player objects, using positions string")
-        return hand_info.positions
+def _blind_players(players: List[PlayerInfo]) -> Optional[Tuple[PlayerInfo, PlayerInfo, PlayerInfo]]:
+    """Dealer, small blind and big blind players, None if one is missing."""
+    found = {}
+    for player in players:
+        found.setdefault(player.position, player)
+    if not {"D", "SB", "BB"} <= found.keys():
+        return None
+    return found["D"], found["SB"], found["BB"]
+
+def format_stack_info(hand: Union[HandInfo, HandResult]) -> str:
+    """Format stack info."""
+    return f"Stack {hand.stack_size}"
 
-def format_hole_cards(hand_info: HandInfo) -> str:
+def format_positions(hand: Union[HandInfo, HandResult]) -> str:
+    """Format player positions, empty when the players lack them."""
+    blinds = _blind_players(hand.players)
+    if blinds is None:
+        return ""
+    dealer, sb, bb = blinds
+    return (
+        f"Dealer: Player {dealer.id}; "
+        f"Player {sb.id} Small blind; "
+        f"Player {bb.id} Big blind"
+    )
+
+def format_hole_cards(hand: Union[HandInfo, HandResult]) -> str:
     """Format hole cards for each player."""
-    return "; ".join([f"Player {p.id}: {p.cards}" for p in hand_info.players])
+    return "; ".join([f"Player {p.id}: {p.cards}" for p in hand.players])
 
 def format_actions(hand_info: HandInfo) -> str:
     """Format action sequence."""
@@ -73,8 +78,15 @@ def format_actions(hand_info: HandInfo) -> str:
             if isinstance(hand_info.actions, list)
             else hand_info.actions)
 
+def format_winnings(payoffs: List[int]) -> str:
+    """Format payoffs like "Player 1: +40; Player 2: -40" for the winnings column."""
+    return "; ".join([
+        f"Player {i + 1}: {'+' + str(payoff) if payoff > 0 else str(payoff)}"
+        for i, payoff in enumerate(payoffs)
+    ])
+
 def format_community_cards(hand_info: HandInfo) -> str:
     """Format community cards."""
     return ("".join(hand_info.community_cards)
             if isinstance(hand_info.community_cards, list)
-            else hand_info.community_cards) 
\ No newline at end of file
+            else hand_info.community_cards)
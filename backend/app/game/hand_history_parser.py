@@ -0,0 +1,208 @@
+"""Module for parsing PokerStars-style text hand histories."""
+
+import logging
+import re
+from decimal import Decimal, InvalidOperation
+from typing import Dict, Iterator, List, Optional, TextIO
+
+from app.models import HandResult, PlayerInfo
+from app.game.game_validator import MAX_PLAYERS
+
+# logs for debug
+logger = logging.getLogger(__name__)
+
+# characters read from a file at a time
+CHUNK_SIZE = 4 * 1024 * 1024
+
+HAND_START = re.compile(r"^PokerStars (?:Zoom )?(?:Hand|Game) #", re.M)
+HEADER = re.compile(r"^PokerStars (?:Zoom )?(?:Hand|Game) #(\d+):(.*)$")
+BUTTON = re.compile(r"^Table '.*' .*Seat #(\d+) is the button")
+SEAT = re.compile(r"^Seat (\d+): (.+?) \(([^\s)]+) in chips")
+POST = re.compile(r"^(.+?): posts (small blind|big blind|small & big blinds|the ante) (\S+)")
+ACTION = re.compile(r"^(.+?): (folds|checks|calls|bets|raises)(?: (\S+))?(?: to (\S+))?")
+UNCALLED = re.compile(r"^Uncalled bet \((\S+)\) returned to (.+)$")
+COLLECTED = re.compile(r"^(.+?) collected (\S+) from")
+DEALT = re.compile(r"^Dealt to (.+?) \[(.+?)\]")
+SHOWS = re.compile(r"^(.+?): shows \[(.+?)\]")
+SUMMARY_CARDS = re.compile(r"^Seat \d+: (.+?) (?:\(.*?\) )*(?:showed|mucked) \[(.+?)\]")
+BOARD = re.compile(r"^Board \[(.+?)\]")
+TOTAL_POT = re.compile(r"^Total pot (\S+)")
+STREET = re.compile(r"^\*\*\* (HOLE CARDS|FLOP|TURN|RIVER|SHOW ?DOWN|SUMMARY) \*\*\*")
+
+CURRENCIES = "$€£"
+
+# positions by seats dealt in, in order from the button
+POSITION_NAMES = {
+    2: ['BTN', 'BB'],
+    3: ['BTN', 'SB', 'BB'],
+    4: ['BTN', 'SB', 'BB', 'UTG'],
+    5: ['BTN', 'SB', 'BB', 'UTG', 'CO'],
+    6: ['BTN', 'SB', 'BB', 'UTG', 'MP', 'CO'],
+}
+
+class HandHistoryError(ValueError):
+    """Raised for hand histories that can not be parsed."""
+    pass
+
+def iter_hand_texts(stream: TextIO, chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    """Split a stream into the text of each hand, reading it in large chunks.
+
+    Only the current chunk and one partial hand are held in memory.
+    """
+    buffer = ""
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        buffer += chunk
+        starts = [match.start() for match in HAND_START.finditer(buffer)]
+        # the last hand may continue in the next chunk
+        for start, end in zip(starts, starts[1:]):
+            yield buffer[start:end].strip()
+        buffer = buffer[starts[-1]:] if starts else buffer[-256:]
+    if HAND_START.match(buffer):
+        yield buffer.strip()
+
+def _positions(seats: List[int], button: int) -> List[str]:
+    """Position name of each seat, walking clockwise from the button."""
+    # with a dead button the last dealt-in seat before it acts as button
+    before = [s for s in seats if s <= button]
+    first = seats.index(before[-1]) if before else len(seats) - 1
+    order = seats[first:] + seats[:first]
+    by_seat = dict(zip(order, POSITION_NAMES[len(seats)]))
+    return [by_seat[s] for s in seats]
+
+def parse_hand_history(text: str) -> HandResult:
+    """Parse one hand into a HandResult whose payoffs are the chips won or lost.
+
+    Actions are written as "seat:action[,amount]" with bets and raises as
+    the total put in on the street; cash amounts are stored in cents.
+    """
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    header = HEADER.match(lines[0]) if lines else None
+    if not header:
+        raise HandHistoryError("Missing hand header")
+    hand_id = f"PS-{header.group(1)}"
+    scale = 100 if any(c in header.group(2) for c in CURRENCIES) else 1
+
+    def amount(text: str) -> int:
+        try:
+            return int(Decimal(text.strip(CURRENCIES).replace(",", "")) * scale)
+        except InvalidOperation:
+            raise HandHistoryError(f"Invalid amount in hand {hand_id}: {text}")
+
+    button = 0
+    seats: Dict[str, int] = {}
+    stacks: Dict[int, int] = {}
+    cards: Dict[int, str] = {}
+    contributed: Dict[int, int] = {}
+    street_in: Dict[int, int] = {}
+    won: Dict[int, int] = {}
+    actions: List[str] = []
+    board = ""
+    total_pot: Optional[int] = None
+
+    def seat_of(name: str) -> int:
+        if name not in seats:
+            raise HandHistoryError(f"Unknown player in hand {hand_id}: {name}")
+        return seats[name]
+
+    def put_in(seat: int, chips: int, counts_for_street: bool = True) -> None:
+        contributed[seat] = contributed.get(seat, 0) + chips
+        if counts_for_street:
+            street_in[seat] = street_in.get(seat, 0) + chips
+
+    dealt = False
+    for line in lines[1:]:
+        match = STREET.match(line)
+        if match:
+            dealt = True
+            # blinds count towards the preflop bets
+            if match.group(1) in ("FLOP", "TURN", "RIVER"):
+                street_in = {}
+            continue
+        match = BUTTON.match(line)
+        if match:
+            button = int(match.group(1))
+            continue
+        match = SEAT.match(line)
+        if match and not dealt:
+            if "is sitting out" in line or "out of hand" in line:
+                continue
+            seat = int(match.group(1))
+            seats[match.group(2)] = seat
+            stacks[seat] = amount(match.group(3))
+            continue
+        match = POST.match(line)
+        if match and match.group(1) in seats:
+            put_in(seat_of(match.group(1)), amount(match.group(3)), match.group(2) != "the ante")
+            continue
+        match = ACTION.match(line)
+        if match and match.group(1) in seats:
+            seat = seat_of(match.group(1))
+            verb = match.group(2)
+            if verb == "folds":
+                actions.append(f"{seat}:fold")
+            elif verb == "checks":
+                actions.append(f"{seat}:check")
+            elif verb == "calls":
+                put_in(seat, amount(match.group(3)))
+                actions.append(f"{seat}:call")
+            elif verb == "bets":
+                put_in(seat, amount(match.group(3)))
+                actions.append(f"{seat}:raise,{street_in[seat]}")
+            else:
+                total = amount(match.group(4) or match.group(3))
+                put_in(seat, total - street_in.get(seat, 0))
+                actions.append(f"{seat}:raise,{total}")
+            continue
+        match = UNCALLED.match(line)
+        if match:
+            seat = seat_of(match.group(2))
+            won[seat] = won.get(seat, 0) + amount(match.group(1))
+            continue
+        match = COLLECTED.match(line)
+        if match and match.group(1) in seats:
+            seat = seat_of(match.group(1))
+            won[seat] = won.get(seat, 0) + amount(match.group(2))
+            continue
+        match = DEALT.match(line) or SHOWS.match(line) or SUMMARY_CARDS.match(line)
+        if match and match.group(1) in seats:
+            cards[seats[match.group(1)]] = match.group(2).replace(" ", "")
+            continue
+        match = BOARD.match(line)
+        if match:
+            board = match.group(1)
+            continue
+        match = TOTAL_POT.match(line)
+        if match:
+            total_pot = amount(match.group(1))
+
+    if len(seats) < 2:
+        raise HandHistoryError(f"Hand {hand_id} has fewer than two players")
+    # full-ring hands would only fail validation later
+    if len(seats) > MAX_PLAYERS:
+        raise HandHistoryError(
+            f"Hand {hand_id} has {len(seats)} players, unsupported table size (at most {MAX_PLAYERS})"
+        )
+    if not button:
+        raise HandHistoryError(f"Hand {hand_id} has no button")
+
+    seat_order = sorted(seats.values())
+    positions = _positions(seat_order, button)
+    players = [
+        PlayerInfo(id=seat, cards=cards.get(seat, ""), position=position, stack=stacks[seat])
+        for seat, position in zip(seat_order, positions)
+    ]
+    stack_size = max(stacks.values())
+    return HandResult(
+        hand_id=hand_id,
+        stack_size=stack_size,
+        players=players,
+        actions=" ".join(actions),
+        community_cards=board,
+        positions=", ".join(f"{p.id} {p.position}" for p in players),
+        hole_cards="; ".join(f"Player {p.id}: {p.cards}" for p in players if p.cards),
+        pot=total_pot if total_pot is not None else sum(contributed.values()),
+        payoffs=[won.get(seat, 0) - contributed.get(seat, 0) for seat in seat_order]
+    )
@@ -1,7 +1,8 @@
 """Module for evaluating poker hand rankings."""
 
 import logging
-from typing import List, Tuple, Dict
+from bisect import insort
+from typing import List, Tuple, Dict, Union
 
 # logs for debug
 logger = logging.getLogger(__name__)
@@ -12,14 +13,28 @@ RANK_VALUES = {
     '9': 9, 'T': 10, 'J': 11, 'Q': 12, 'K': 13, 'A': 14
 }
 
+# names of made hands by hand rank
+HAND_CLASSES = {
+    0: 'High card',
+    1: 'One pair',
+    2: 'Two pair',
+    3: 'Three of a kind'
+}
+
+# number of board cards on each street
+STREETS = {0: 'preflop', 3: 'flop', 4: 'turn', 5: 'river'}
+
 def evaluate_player_hand(rank_values_list: List[int]) -> Tuple[int, List[int]]:
     """Evaluate a player's hand and return (hand_rank, hand_value)."""
     # counting occurenes of ranks
     rank_counts = {}
     for rank in rank_values_list:
         rank_counts[rank] = rank_counts.get(rank, 0) + 1
-    
-    # finding best hand
+
+    return rank_from_counts(rank_counts, sorted(rank_values_list, reverse=True))
+
+def rank_from_counts(rank_counts: Dict[int, int], sorted_ranks: List[int]) -> Tuple[int, List[int]]:
+    """Find the best hand from rank counts and ranks sorted high to low."""
     hand_rank = 0
     hand_value = []
     
@@ -29,7 +44,7 @@ def evaluate_player_hand(rank_values_list: List[int]) -> Tuple[int, List[int]]:
         hand_rank = 3
         hand_value = [max(trips)]
         # adding kickers
-        kickers = sorted([r for r in rank_values_list if r != hand_value[0]], reverse=True)
+        kickers = [r for r in sorted_ranks if r != hand_value[0]]
         hand_value.extend(kickers[:2])
     
     # checking for pairs
@@ -38,12 +53,12 @@ def evaluate_player_hand(rank_values_list: List[int]) -> Tuple[int, List[int]]:
         hand_rank = 1 if len(pairs) == 1 else 2
         hand_value = sorted(pairs, reverse=True)
         # adding kickers
-        kickers = sorted([r for r in rank_values_list if r not in pairs], reverse=True)
+        kickers = [r for r in sorted_ranks if r not in pairs]
         hand_value.extend(kickers[:5-len(pairs)*2])
     
     # if no pairs or trips, use high card
     if not hand_value:
-        hand_value = sorted(rank_values_list, reverse=True)[:5]
+        hand_value = sorted_ranks[:5]
     
     return hand_rank, hand_value
 
@@ -78,4 +93,57 @@ def compare_hands(hand1: Tuple[int, List[int]], hand2: Tuple[int, List[int]]) ->
         elif v1 < v2:
             return -1
     
-    return 0  # tie 
\ No newline at end of file
+    return 0  # tie 
+
+class IncrementalHandEvaluator:
+    """Track a player's best hand while the board is dealt street by street."""
+
+    __slots__ = ('hole_cards', 'board', '_rank_counts', '_sorted_ranks', '_strength')
+
+    def __init__(self, hole_cards: Union[str, List[str]]):
+        cards = "".join(hole_cards)
+        self.hole_cards = [cards[0:2], cards[2:4]]
+        self.board: List[str] = []
+        self._rank_counts: Dict[int, int] = {}
+        # kept high to low, so kickers never need a full re-sort
+        self._sorted_ranks: List[int] = []
+        self._strength: Tuple[int, List[int]] = (0, [])
+        self._add(self.hole_cards)
+
+    def add_cards(self, cards: Union[str, List[str]]) -> Tuple[int, List[int]]:
+        """Add flop, turn or river cards and return the updated strength."""
+        if isinstance(cards, str):
+            cards = cards.split()
+        new_cards = parse_community_cards(cards)
+        if len(self.board) + len(new_cards) > 5:
+            raise ValueError("Board cannot have more than 5 cards")
+        self.board.extend(new_cards)
+        self._add(new_cards)
+        logger.debug(f"Board {self.board}: {self.hand_class} {self._strength[1]}")
+        return self._strength
+
+    def _add(self, cards: List[str]) -> None:
+        """Fold new cards into rank counts and refresh the best hand."""
+        for card in cards:
+            rank = RANK_VALUES[card[0]]
+            self._rank_counts[rank] = self._rank_counts.get(rank, 0) + 1
+            # negated so insort keeps the list in descending order
+            insort(self._sorted_ranks, -rank)
+        self._strength = rank_from_counts(
+            self._rank_counts, [-r for r in self._sorted_ranks]
+        )
+
+    @property
+    def strength(self) -> Tuple[int, List[int]]:
+        """Current (hand_rank, hand_value), comparable with compare_hands."""
+        return self._strength
+
+    @property
+    def hand_class(self) -> str:
+        """Name of the current made hand."""
+        return HAND_CLASSES[self._strength[0]]
+
+    @property
+    def street(self) -> str:
+        """Name of the street the board has reached."""
+        return STREETS.get(len(self.board), 'unknown')
@@ -0,0 +1,236 @@
+"""Module for replaying stored poker hands action by action."""
+
+import logging
+import re
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.models import BIG_BLIND, SMALL_BLIND
+from app.game.hand_ranker import parse_community_cards
+
+# logs for debug
+logger = logging.getLogger(__name__)
+
+# a state copy is kept every this many actions
+CHECKPOINT_INTERVAL = 8
+
+# number of replays kept in memory
+REPLAY_CACHE_SIZE = 256
+
+STREET_NAMES = ('preflop', 'flop', 'turn', 'river')
+# board cards visible on each street
+STREET_BOARD = (0, 3, 4, 5)
+
+# action codes sent by the frontend, e.g. "f:x:c:b40:r80"
+ACTION_CODES = {'f': 'fold', 'x': 'check', 'c': 'call', 'b': 'raise', 'r': 'raise'}
+
+# parsed action: (seat or None if implied by turn order, action type, amount)
+Action = Tuple[Optional[int], str, int]
+
+def parse_actions(actions: str) -> List[Action]:
+    """Parse both '1:raise,50 2:call' and 'f:c:r80' action strings."""
+    if not actions:
+        return []
+
+    parsed = []
+    if ' ' in actions or ',' in actions or re.match(r'^\d+:', actions):
+        # "player:action[,amount]" separated by spaces
+        for token in actions.split():
+            player, _, act = token.partition(':')
+            action_type, _, amount = act.partition(',')
+            if action_type == 'bet':
+                action_type = 'raise'
+            if action_type not in ('fold', 'check', 'call', 'raise'):
+                raise ValueError(f"Invalid action: {token}")
+            parsed.append((int(player) - 1, action_type, int(amount or 0)))
+    else:
+        # frontend codes separated by colons
+        for token in actions.split(':'):
+            if not token or token[0] not in ACTION_CODES:
+                raise ValueError(f"Invalid action: {token}")
+            parsed.append((None, ACTION_CODES[token[0]], int(token[1:] or 0)))
+    return parsed
+
+def parse_positions(positions: str, player_count: int) -> Tuple[int, int, int]:
+    """Get (dealer, small blind, big blind) seats from a positions string."""
+    def find(pattern: str, default: int) -> int:
+        match = re.search(pattern, positions or "")
+        return int(match.group(1)) - 1 if match else default % player_count
+
+    return (
+        find(r'Dealer: Player (\d+)', 0),
+        find(r'Player (\d+) Small blind', 1),
+        find(r'Player (\d+) Big blind', 2)
+    )
+
+class ReplayState:
+    """Table state at one point of a hand."""
+
+    __slots__ = (
+        'stacks', 'bets', 'contributions', 'folded', 'acted',
+        'current_bet', 'street', 'to_act'
+    )
+
+    def __init__(self, player_count: int, stack_size: int):
+        self.stacks = [stack_size] * player_count
+        self.bets = [0] * player_count
+        self.contributions = [0] * player_count
+        self.folded = [False] * player_count
+        self.acted = [False] * player_count
+        self.current_bet = 0
+        self.street = 0
+        self.to_act = -1
+
+    def copy(self) -> 'ReplayState':
+        state = ReplayState.__new__(ReplayState)
+        state.stacks = self.stacks[:]
+        state.bets = self.bets[:]
+        state.contributions = self.contributions[:]
+        state.folded = self.folded[:]
+        state.acted = self.acted[:]
+        state.current_bet = self.current_bet
+        state.street = self.street
+        state.to_act = self.to_act
+        return state
+
+    def post(self, seat: int, amount: int) -> None:
+        """Move chips from a stack into the current bet."""
+        amount = max(0, min(amount, self.stacks[seat]))
+        self.stacks[seat] -= amount
+        self.bets[seat] += amount
+        self.contributions[seat] += amount
+
+    def is_pending(self, seat: int) -> bool:
+        """Whether the seat still has to act this street."""
+        return (not self.folded[seat] and self.stacks[seat] > 0
+                and (not self.acted[seat] or self.bets[seat] < self.current_bet))
+
+    def next_to_act(self, seat: int) -> int:
+        """Find the next seat after the given one that has to act."""
+        count = len(self.stacks)
+        for step in range(1, count + 1):
+            i = (seat + step) % count
+            if self.is_pending(i):
+                return i
+        return -1
+
+class HandReplay:
+    """Replay of a stored hand with state checkpoints for fast seeking."""
+
+    def __init__(
+        self,
+        hand_id: str,
+        stack_size: int,
+        player_count: int,
+        positions: str,
+        actions: str,
+        community_cards: str = "",
+        small_blind: int = SMALL_BLIND,
+        big_blind: int = BIG_BLIND,
+        checkpoint_interval: int = CHECKPOINT_INTERVAL
+    ):
+        self.hand_id = hand_id
+        # 0 keeps only the starting state
+        self.checkpoint_interval = checkpoint_interval
+        self.actions = parse_actions(actions)
+        self.board = parse_community_cards((community_cards or "").split())
+        self.dealer, sb, bb = parse_positions(positions, player_count)
+
+        # blinds are posted before the first action
+        start = ReplayState(player_count, stack_size)
+        start.post(sb, small_blind)
+        start.post(bb, big_blind)
+        start.current_bet = big_blind
+        start.to_act = start.next_to_act(bb)
+
+        # one pass over the hand, keeping a copy every checkpoint_interval actions
+        self._checkpoints = [start.copy()]
+        state = start
+        for step, action in enumerate(self.actions, 1):
+            self._apply(state, action)
+            if checkpoint_interval and step % checkpoint_interval == 0:
+                self._checkpoints.append(state.copy())
+        logger.debug(f"Replay of hand {hand_id} built with {len(self._checkpoints)} checkpoints")
+
+    def __len__(self) -> int:
+        return len(self.actions)
+
+    def state_at(self, step: int) -> ReplayState:
+        """State after the first `step` actions, from the nearest checkpoint."""
+        if not (0 <= step <= len(self.actions)):
+            raise ValueError(f"Step must be between 0 and {len(self.actions)}")
+        interval = self.checkpoint_interval
+        index = step // interval if interval else 0
+        state = self._checkpoints[index].copy()
+        for action in self.actions[index * interval:step]:
+            self._apply(state, action)
+        return state
+
+    def to_dict(self, step: int) -> Dict:
+        """Table state after the first `step` actions for clients."""
+        state = self.state_at(step)
+        return {
+            "hand_id": self.hand_id,
+            "step": step,
+            "total_steps": len(self.actions),
+            "street": STREET_NAMES[state.street],
+            "board": self.board[:STREET_BOARD[state.street]],
+            "stacks": state.stacks,
+            "bets": state.bets,
+            "pot": sum(state.contributions),
+            "active_players": [i + 1 for i, folded in enumerate(state.folded) if not folded],
+            "to_act": state.to_act + 1 if state.to_act >= 0 else None
+        }
+
+    def _apply(self, state: ReplayState, action: Action) -> None:
+        """Apply one action and move the turn or street forward."""
+        seat, action_type, amount = action
+        if seat is None:
+            seat = state.to_act
+        if not (0 <= seat < len(state.stacks)):
+            raise ValueError(f"Action {action_type} has no player to act")
+
+        if action_type == 'fold':
+            state.folded[seat] = True
+        elif action_type == 'call':
+            state.post(seat, state.current_bet - state.bets[seat])
+        elif action_type == 'raise':
+            state.post(seat, amount - state.bets[seat])
+            if state.bets[seat] > state.current_bet:
+                state.current_bet = state.bets[seat]
+                # everyone has to respond to the raise
+                state.acted = [False] * len(state.acted)
+        state.acted[seat] = True
+
+        live = [i for i, folded in enumerate(state.folded) if not folded]
+        state.to_act = state.next_to_act(seat) if len(live) > 1 else -1
+        if state.to_act >= 0 or len(live) == 1:
+            return
+
+        # betting round is over
+        if state.street == 3 or sum(1 for i in live if state.stacks[i] > 0) <= 1:
+            # all-in or river, the rest of the board is dealt
+            state.street = 3
+            return
+        state.street += 1
+        state.bets = [0] * len(state.bets)
+        state.acted = [False] * len(state.acted)
+        state.current_bet = 0
+        state.to_act = state.next_to_act(self.dealer)
+
+# replays of recently viewed hands, stored hands never change
+_replay_cache: "OrderedDict[str, HandReplay]" = OrderedDict()
+
+def get_replay(hand_id: str, load: Callable[[str], Optional[HandReplay]]) -> Optional[HandReplay]:
+    """Get a cached replay, building it with `load` on a miss."""
+    replay = _replay_cache.get(hand_id)
+    if replay:
+        _replay_cache.move_to_end(hand_id)
+        return replay
+
+    replay = load(hand_id)
+    if replay:
+        _replay_cache[hand_id] = replay
+        if len(_replay_cache) > REPLAY_CACHE_SIZE:
+            _replay_cache.popitem(last=False)
+    return replay
@@ -0,0 +1,131 @@
+"""Module for Independent Chip Model tournament equity."""
+
+import logging
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.models import HandInfo
+
+# logs for debug
+logger = logging.getLogger(__name__)
+
+# fields above this size use sampling instead of the exact calculation
+EXACT_MAX_PLAYERS = 12
+SAMPLES = 200000
+
+def icm_equity(stacks: Sequence[int], payouts: Sequence[float]) -> List[float]:
+    """Expected prize of each player under the Malmuth-Harville model.
+
+    Exact for fields up to EXACT_MAX_PLAYERS, sampled above that. Players
+    without chips share the prizes of the places below everyone else.
+    """
+    if not payouts:
+        raise ValueError("At least one payout is required")
+    if any(stack < 0 for stack in stacks):
+        raise ValueError("Stacks can not be negative")
+
+    alive = [i for i, stack in enumerate(stacks) if stack > 0]
+    prizes = list(payouts[:len(stacks)]) + [0.0] * max(0, len(stacks) - len(payouts))
+
+    alive_stacks = [stacks[i] for i in alive]
+    if len(alive) > EXACT_MAX_PLAYERS:
+        alive_equity = icm_equity_sampled(alive_stacks, prizes[:len(alive)])
+    else:
+        alive_equity = icm_equity_exact(alive_stacks, prizes[:len(alive)])
+
+    equity = [0.0] * len(stacks)
+    for i, value in zip(alive, alive_equity):
+        equity[i] = value
+    busted = [i for i, stack in enumerate(stacks) if stack <= 0]
+    if busted:
+        share = sum(prizes[len(alive):]) / len(busted)
+        for i in busted:
+            equity[i] = share
+    return equity
+
+def icm_equity_exact(stacks: Sequence[int], payouts: Sequence[float]) -> List[float]:
+    """Exact ICM with a dynamic program over the set of players still placing.
+
+    The state is the bitmask of players not yet placed; only the first
+    len(payouts) places pay, so the states visited are the subsets missing
+    at most that many players, not every finishing order.
+    """
+    n = len(stacks)
+    paid = min(len(payouts), n)
+    full = (1 << n) - 1
+    memo: Dict[int, List[float]] = {}
+
+    def expected(remaining: int) -> List[float]:
+        """Expected prizes from the next place down, given who is left."""
+        place = n - bin(remaining).count("1")
+        if place >= paid:
+            return [0.0] * n
+        cached = memo.get(remaining)
+        if cached is not None:
+            return cached
+
+        players = [i for i in range(n) if remaining >> i & 1]
+        total = sum(stacks[i] for i in players)
+        result = [0.0] * n
+        for i in players:
+            chance = stacks[i] / total
+            result[i] += chance * payouts[place]
+            below = expected(remaining & ~(1 << i))
+            for j in players:
+                result[j] += chance * below[j]
+        memo[remaining] = result
+        return result
+
+    return expected(full) if n else []
+
+def icm_equity_sampled(
+    stacks: Sequence[int],
+    payouts: Sequence[float],
+    samples: int = SAMPLES,
+    seed: Optional[int] = None
+) -> List[float]:
+    """Approximate ICM by sampling finishing orders.
+
+    Sorting exponential arrival times scaled by 1/stack draws orders from
+    the same model the exact calculation uses.
+    """
+    rng = np.random.default_rng(seed)
+    rates = np.asarray(stacks, dtype=np.float64)
+    paid = min(len(payouts), len(stacks))
+    prizes = np.asarray(payouts[:paid], dtype=np.float64)
+
+    equity = np.zeros(len(stacks))
+    # chunks keep the sample matrix small for big fields
+    chunk = max(1, min(samples, 2000000 // max(1, len(stacks))))
+    done = 0
+    while done < samples:
+        size = min(chunk, samples - done)
+        times = rng.exponential(size=(size, len(stacks))) / rates
+        # only the paid places need ordering
+        if paid < len(stacks):
+            places = np.argpartition(times, paid - 1, axis=1)[:, :paid]
+        else:
+            places = np.broadcast_to(np.arange(len(stacks)), times.shape)
+        order = np.argsort(np.take_along_axis(times, places, axis=1), axis=1)
+        finishers = np.take_along_axis(places, order, axis=1)
+        weights_won = np.broadcast_to(prizes, finishers.shape).ravel()
+        equity += np.bincount(finishers.ravel(), weights=weights_won, minlength=len(stacks))
+        done += size
+    return (equity / samples).tolist()
+
+def icm_adjusted_payoffs(
+    start_stacks: Sequence[int],
+    chip_payoffs: Sequence[int],
+    payouts: Sequence[float]
+) -> List[float]:
+    """Convert chip payoffs of a hand into changes of ICM equity."""
+    end_stacks = [stack + payoff for stack, payoff in zip(start_stacks, chip_payoffs)]
+    before = icm_equity(start_stacks, payouts)
+    after = icm_equity(end_stacks, payouts)
+    return [a - b for a, b in zip(after, before)]
+
+def hand_icm_payoffs(hand_info: HandInfo, chip_payoffs: Sequence[int], payouts: Sequence[float]) -> List[float]:
+    """ICM-adjusted payoffs of a hand where every player starts with stack_size."""
+    start_stacks = [hand_info.stack_size] * len(hand_info.players)
+    return icm_adjusted_payoffs(start_stacks, chip_payoffs, payouts)
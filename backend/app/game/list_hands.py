@@ -1,16 +1,53 @@
 """Module for retrieving hand history from the database."""
 
 import logging
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from fastapi import HTTPException, status
 
 from app.models import HandHistoryEntry
+from app.game.hand_replay import HandReplay, get_replay
+from app.utils.hand_archive import HandArchive
 
 # logs for debug
 logger = logging.getLogger(__name__)
 
-def get_recent_hands(connection, limit: int = 5) -> Dict[str, List[Dict]]:
-    """Get recent hands from the database."""
+# segments of partitions that were archived and dropped
+hand_archive = HandArchive()
+
+# fields of a listed hand and the columns each one reads
+LIST_FIELDS = {
+    "hand_id": ("hand_id",),
+    "stack_size": ("stack",),
+    "positions": ("positions",),
+    "hands": ("hand1", "hand2", "hand3", "hand4", "hand5", "hand6"),
+    "actions": ("actions",),
+    "winnings": ("winnings",),
+}
+
+# columns of a hand read by find_hand
+HAND_ROW_COLUMNS = (
+    "id", "hand_id", "stack", "positions", "hand1", "hand2", "hand3",
+    "hand4", "hand5", "hand6", "actions", "winnings"
+)
+
+# columns of a hand read to replay it
+REPLAY_COLUMNS = (
+    "hand_id", "stack", "positions", "hand1", "hand2", "hand3",
+    "hand4", "hand5", "hand6", "actions", "community_cards"
+)
+
+def parse_list_fields(fields: Optional[str]) -> List[str]:
+    """Fields named in a comma separated list, all of them when empty."""
+    if not fields:
+        return list(LIST_FIELDS)
+    names = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = names - LIST_FIELDS.keys()
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return [name for name in LIST_FIELDS if name in names]
+
+def get_recent_hands(connection, limit: int = 5, fields: Optional[List[str]] = None) -> Dict[str, List[Dict]]:
+    """Get recent hands from the database, reading only the columns of the given fields."""
     try:
         logger.info(f"Fetching last {limit} hands")
         if not connection:
@@ -20,9 +57,11 @@ def get_recent_hands(connection, limit: int = 5) -> Dict[str, List[Dict]]:
                 detail="Database connection not available"
             )
         
+        fields = fields or list(LIST_FIELDS)
+        columns = [column for field in fields for column in LIST_FIELDS[field]]
         cursor = connection.cursor()
-        cursor.execute("""
-            SELECT hand_id, stack, positions, hand1, hand2, hand3, hand4, hand5, hand6, actions, winnings 
+        cursor.execute(f"""
+            SELECT {", ".join(columns)}
             FROM hands 
             ORDER BY id DESC 
             LIMIT %s;
@@ -30,18 +69,21 @@ def get_recent_hands(connection, limit: int = 5) -> Dict[str, List[Dict]]:
         
         hands = []
         for row in cursor.fetchall():
-            hands.append({
-                "hand_id": row[0],
-                "stack_size": row[1],
-                "positions": row[2],
-                "hands": [row[i] for i in range(3, 9) if row[i]],
-                "actions": row[9],
-                "winnings": row[10]
-            })
+            hand, i = {}, 0
+            for field in fields:
+                width = len(LIST_FIELDS[field])
+                if field == "hands":
+                    hand[field] = [card for card in row[i:i + width] if card]
+                else:
+                    hand[field] = row[i]
+                i += width
+            hands.append(hand)
         
         logger.info(f"Retrieved {len(hands)} hands")
-        logger.debug(f"Hand IDs retrieved: {[h['hand_id'] for h in hands]}")
+        logger.debug(f"Hand IDs retrieved: {[h.get('hand_id') for h in hands]}")
         return {"hands": hands}
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching hands: {str(e)}", exc_info=True)
         raise HTTPException(
@@ -49,25 +91,63 @@ def get_recent_hands(connection, limit: int = 5) -> Dict[str, List[Dict]]:
             detail=str(e)
         )
 
-def get_hand_by_id(connection, hand_id: str) -> HandHistoryEntry:
-    """Get a specific hand by ID."""
+def get_latest_hand_id(connection) -> Optional[int]:
+    """Get the id of the newest hand row, None when there are none."""
     try:
-        logger.info(f"Fetching hand with ID: {hand_id}")
         if not connection:
             logger.error("Database connection not available")
             raise HTTPException(
                 status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
                 detail="Database connection not available"
             )
-        
+
         cursor = connection.cursor()
-        cursor.execute("""
-            SELECT hand_id, stack, positions, hand1, hand2, hand3, hand4, hand5, hand6, actions, winnings 
-            FROM hands 
-            WHERE hand_id = %s;
-        """, (hand_id,))
-        
-        row = cursor.fetchone()
+        cursor.execute("SELECT max(id) FROM hands;")
+        return cursor.fetchone()[0]
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching latest hand id: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+def get_hand_by_id(connection, hand_id: str, archive: Optional[HandArchive] = None) -> HandHistoryEntry:
+    """Get a specific hand by ID, looking in archived segments when it is not in the table."""
+    return find_hand(connection, hand_id, archive)[1]
+
+def find_hand_row(connection, hand_id: str, columns: Tuple[str, ...] = HAND_ROW_COLUMNS,
+                  archive: Optional[HandArchive] = None) -> Optional[Tuple]:
+    """Columns of the first stored row of a hand, None if there is none."""
+    if not connection:
+        logger.error("Database connection not available")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Database connection not available"
+        )
+
+    # archived partitions are older than every row left in the table, so an
+    # archived row is the first stored one; a hand id never changes its row
+    archived = (archive or hand_archive).find(hand_id)
+    if archived:
+        return tuple(archived[column] for column in columns)
+
+    cursor = connection.cursor()
+    cursor.execute(f"""
+        SELECT {", ".join(columns)}
+        FROM hands 
+        WHERE hand_id = %s
+        ORDER BY id
+        LIMIT 1;
+    """, (hand_id,))
+    return cursor.fetchone()
+
+def find_hand(connection, hand_id: str, archive: Optional[HandArchive] = None) -> Tuple[int, HandHistoryEntry]:
+    """Get the row id and entry of a hand; hand ids may repeat, the first stored row is the hand."""
+    try:
+        logger.info(f"Fetching hand with ID: {hand_id}")
+        row = find_hand_row(connection, hand_id, archive=archive)
         if not row:
             logger.warning(f"Hand with ID {hand_id} not found")
             raise HTTPException(
@@ -75,6 +155,7 @@ def get_hand_by_id(connection, hand_id: str) -> HandHistoryEntry:
                 detail=f"Hand with ID {hand_id} not found"
             )
             
+        row_id, row = row[0], row[1:]
         result = HandHistoryEntry(
             hand_id=row[0],
             stack_info=f"Stack {row[1]}",
@@ -84,7 +165,7 @@ def get_hand_by_id(connection, hand_id: str) -> HandHistoryEntry:
         )
         logger.info(f"Successfully retrieved hand {hand_id}")
         logger.debug(f"Hand details: {result}")
-        return result
+        return row_id, result
     except HTTPException:
         raise
     except Exception as e:
@@ -92,4 +173,45 @@ def get_hand_by_id(connection, hand_id: str) -> HandHistoryEntry:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
-        ) 
\ No newline at end of file
+        ) 
+
+def get_hand_replay(connection, hand_id: str, step: int) -> Dict:
+    """Get the table state of a hand after the given number of actions."""
+    def load(hand_id: str) -> Optional[HandReplay]:
+        # the same row GET /hands/{hand_id} returns
+        row = find_hand_row(connection, hand_id, REPLAY_COLUMNS)
+        if not row:
+            return None
+
+        logger.info(f"Building replay for hand {hand_id}")
+        return HandReplay(
+            hand_id=row[0],
+            stack_size=row[1],
+            player_count=len([row[i] for i in range(3, 9) if row[i]]),
+            positions=row[2],
+            actions=row[9],
+            community_cards=row[10]
+        )
+
+    try:
+        replay = get_replay(hand_id, load)
+        if not replay:
+            logger.warning(f"Hand with ID {hand_id} not found")
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Hand with ID {hand_id} not found"
+            )
+        return replay.to_dict(step)
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error(f"Error replaying hand {hand_id}: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
@@ -0,0 +1,118 @@
+"""Module for finding outs and draws of players on the flop and turn."""
+
+import logging
+from typing import Dict, List, Set
+
+import numpy as np
+
+from app.models import HandInfo
+from app.game.cards import card_index, card_name
+from app.game.fast_evaluator import (
+    CARD_MASKS, CATEGORY_SHIFT, FLUSH, POPCOUNT, STRAIGHT, STRAIGHT_FLUSH, STRAIGHT_HIGH,
+    evaluate_masks, hand_category, suit_masks
+)
+from app.game.hand_ranker import parse_community_cards
+
+# logs for debug
+logger = logging.getLogger(__name__)
+
+# each rank as a one-bit mask, shape (13,)
+RANK_BITS = 1 << np.arange(13, dtype=np.int64)
+
+def _straight_draw_ranks(ranks: np.ndarray) -> np.ndarray:
+    """Count missing ranks that would complete a straight, for each rank mask."""
+    completed = STRAIGHT_HIGH[ranks[..., None] | RANK_BITS] != 0
+    missing = (ranks[..., None] & RANK_BITS) == 0
+    return (completed & missing).sum(axis=-1)
+
+def _draws(hole: np.ndarray, hands: np.ndarray) -> np.ndarray:
+    """Flush and straight draw flags of hands, as (..., 2) booleans.
+
+    A draw counts only when a hole card is part of it and the hand is not
+    already a straight or flush.
+    """
+    flush_draw = ((POPCOUNT[hands] == 4) & (hole != 0)).any(axis=-1)
+    ranks = hands[..., 0] | hands[..., 1] | hands[..., 2] | hands[..., 3]
+    straight_draw = (_straight_draw_ranks(ranks) > 0) & (STRAIGHT_HIGH[ranks] == 0)
+    return np.stack([flush_draw, straight_draw], axis=-1)
+
+def _out_type(card: int, old_category: int, new_category: int, hole_ranks: Set[int], board_high: int) -> str:
+    """Name the kind of draw an out completes."""
+    if new_category in (FLUSH, STRAIGHT_FLUSH) and old_category not in (FLUSH, STRAIGHT_FLUSH):
+        return "flush"
+    if new_category == STRAIGHT and old_category < STRAIGHT:
+        return "straight"
+    rank = card >> 2
+    if new_category == 1 and rank in hole_ranks and rank > board_high:
+        return "overcards"
+    return "other"
+
+def analyze_outs(active_players: Set[int], hand_info: HandInfo) -> List[Dict]:
+    """Find the outs of each active player on a flop or turn.
+
+    An out is an unseen card after which a player who is not winning now
+    wins or ties. Every next card is scored for every player in one
+    vectorized evaluation over bitmask hands. Folded players' cards count
+    as seen. On the flop, cards that give a new flush or straight draw are
+    listed as backdoor cards.
+    """
+    board = parse_community_cards(hand_info.community_cards.split())
+    if len(board) not in (3, 4):
+        raise ValueError("Outs are calculated on the flop or turn")
+
+    players = sorted(active_players)
+    holes = [parse_community_cards([hand_info.players[i].cards]) for i in players]
+    seen = set()
+    for card in board + [c for player in hand_info.players for c in parse_community_cards([player.cards])]:
+        if card_index(card) in seen:
+            raise ValueError(f"Duplicate card: {card}")
+        seen.add(card_index(card))
+    deck = np.array([c for c in range(52) if c not in seen])
+
+    hole_masks = np.stack([suit_masks(hole) for hole in holes])            # (P, 4)
+    now = hole_masks | suit_masks(board)                                     # (P, 4)
+    after = now[None, :, :] | CARD_MASKS[deck][:, None, :]                  # (D, P, 4)
+
+    scores_now = evaluate_masks(now)                                         # (P,)
+    scores_after = evaluate_masks(after)                                     # (D, P)
+    winning_now = scores_now == scores_now.max()
+    winning_after = scores_after == scores_after.max(axis=1, keepdims=True)
+    is_out = winning_after & ~winning_now
+
+    backdoor = np.zeros_like(is_out)
+    if len(board) == 3:
+        backdoor = (_draws(hole_masks, after) & ~_draws(hole_masks, now)).any(axis=-1) & ~is_out
+
+    board_high = max(card_index(c) >> 2 for c in board)
+    draws_now = _draws(hole_masks, now)
+    results = []
+    for p, player_idx in enumerate(players):
+        old_category = int(scores_now[p]) >> CATEGORY_SHIFT
+        hole_ranks = {card_index(c) >> 2 for c in holes[p]}
+        outs: Dict[str, List[str]] = {"flush": [], "straight": [], "overcards": [], "other": []}
+        for d in np.flatnonzero(is_out[:, p]):
+            card = int(deck[d])
+            new_category = int(scores_after[d, p]) >> CATEGORY_SHIFT
+            outs[_out_type(card, old_category, new_category, hole_ranks, board_high)].append(card_name(card))
+
+        draws = []
+        if draws_now[p, 0]:
+            draws.append("flush_draw")
+        if draws_now[p, 1]:
+            ranks = int(now[p, 0] | now[p, 1] | now[p, 2] | now[p, 3])
+            draws.append("open_ended" if _straight_draw_ranks(np.array(ranks)) > 1 else "gutshot")
+        if old_category == 0 and min(hole_ranks) > board_high:
+            draws.append("overcards")
+
+        results.append({
+            "player_id": hand_info.players[player_idx].id,
+            "hand": hand_category(int(scores_now[p])),
+            "winning": bool(winning_now[p]),
+            "draws": draws,
+            "outs": outs,
+            "out_count": int(is_out[:, p].sum()),
+            "backdoor": [card_name(int(c)) for c in deck[backdoor[:, p]]]
+        })
+
+    logger.debug(f"Outs on board {board}: {[r['out_count'] for r in results]}")
+    return results
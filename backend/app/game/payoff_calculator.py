@@ -16,6 +16,22 @@ def calculate_player_contributions(hand_info: HandInfo) -> Dict[int, int]:
         for i, player in enumerate(hand_info.players)
     }
 
+def check_blinds(
+    hand_info: HandInfo,
+    player_contributions: Dict[int, int],
+    small_blind: int,
+    big_blind: int
+) -> None:
+    """Check the blind players put in at least their blind, or all their chips."""
+    # heads-up the dealer posts the small blind
+    blinds = {"SB": small_blind, "BB": big_blind}
+    if len(hand_info.players) == 2:
+        blinds["D"] = small_blind
+    for i, player in enumerate(hand_info.players):
+        blind = blinds.get(player.position)
+        if blind is not None and player_contributions[i] < min(blind, hand_info.stack_size):
+            raise ValueError(f"Player {player.id} put in less than the {player.position} blind of {blind}")
+
 def process_actions(actions: List[str], player_count: int) -> Set[int]:
     """Process actions and return set of active players."""
     active_players = set(range(player_count))
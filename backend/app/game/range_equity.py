@@ -0,0 +1,370 @@
+"""Module for range-vs-range equity with card removal."""
+
+import itertools
+import logging
+import re
+import threading
+from collections import OrderedDict
+from math import comb
+from typing import Dict, Hashable, List, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from app.game.cards import RANKS, card_index, card_name
+from app.game.fast_evaluator import CARD_MASKS, evaluate_masks
+from app.game.hand_ranker import parse_community_cards
+from app.game.suit_isomorphism import INVERSE_PERMUTATIONS, PERMUTED_CARDS
+
+# logs for debug
+logger = logging.getLogger(__name__)
+
+# every two-card combo of the deck, indexed 0..1325
+COMBO_CARDS = np.array(list(itertools.combinations(range(52), 2)), dtype=np.int64)
+COMBO_INDEX = {(int(a), int(b)): i for i, (a, b) in enumerate(COMBO_CARDS)}
+# combos as 52-bit card sets and as suit masks
+COMBO_BITS = (1 << COMBO_CARDS[:, 0]) | (1 << COMBO_CARDS[:, 1])
+COMBO_MASKS = CARD_MASKS[COMBO_CARDS[:, 0]] | CARD_MASKS[COMBO_CARDS[:, 1]]
+# combo index of every pair of cards, and of every combo under each suit renaming
+_PAIR_COMBOS = np.full((52, 52), -1, dtype=np.int64)
+_PAIR_COMBOS[COMBO_CARDS[:, 0], COMBO_CARDS[:, 1]] = np.arange(len(COMBO_CARDS))
+_PAIR_COMBOS[COMBO_CARDS[:, 1], COMBO_CARDS[:, 0]] = np.arange(len(COMBO_CARDS))
+PERMUTED_COMBOS = _PAIR_COMBOS[PERMUTED_CARDS[:, COMBO_CARDS[:, 0]], PERMUTED_CARDS[:, COMBO_CARDS[:, 1]]]
+
+# heads-up spots are exact while runouts x matchups stay under this
+MATCHUP_BUDGET = 40_000_000
+# boards scored at once in the exact calculation
+BOARD_CHUNK = 64
+SAMPLES = 100_000
+# number of distinct spots kept
+RESULT_CACHE_SIZE = 1024
+
+RANK_PATTERN = "[2-9TJQKA]"
+COMBO_RE = re.compile(r"^([2-9TJQKA][hdcs])([2-9TJQKA][hdcs])$")
+HAND_RE = re.compile(rf"^({RANK_PATTERN})({RANK_PATTERN})([so]?)(\+?)$")
+SPAN_RE = re.compile(rf"^({RANK_PATTERN})({RANK_PATTERN})([so]?)-({RANK_PATTERN})({RANK_PATTERN})([so]?)$")
+
+Range = Union[str, Mapping[str, float]]
+
+class RangeEquityCache:
+    """Bounded LRU of range equity results keyed by suit-isomorphism class.
+
+    Spots that differ only by a renaming of suits share an entry, which
+    holds the result in canonical suits.
+    """
+
+    def __init__(self, max_size: int = RESULT_CACHE_SIZE):
+        self._max_size = max_size
+        self._entries: "OrderedDict[Hashable, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Dict]:
+        """Cached result of a spot, None (counted as a miss) if not cached."""
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, key: Hashable, result: Dict) -> None:
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+result_cache = RangeEquityCache()
+
+def _hand_combos(high: int, low: int, kind: str) -> List[int]:
+    """Combo indices of a hand class like AKs, AKo, AK or QQ."""
+    combos = []
+    for s1 in range(4):
+        for s2 in range(4):
+            a, b = high * 4 + s1, low * 4 + s2
+            if a == b or (high == low and s1 > s2):
+                continue
+            if (kind == "s" and s1 != s2) or (kind == "o" and s1 == s2):
+                continue
+            combos.append(COMBO_INDEX[(min(a, b), max(a, b))])
+    return combos
+
+def _token_combos(token: str) -> List[int]:
+    """Combo indices of one range token: AhKh, QQ, 22+, AJs+, KQo, A2s-A5s or 55-88."""
+    match = COMBO_RE.match(token)
+    if match:
+        a, b = card_index(match.group(1)), card_index(match.group(2))
+        if a == b:
+            raise ValueError(f"Invalid combo: {token}")
+        return [COMBO_INDEX[(min(a, b), max(a, b))]]
+
+    match = HAND_RE.match(token)
+    if match:
+        high, low = sorted((RANKS.index(match.group(1)), RANKS.index(match.group(2))), reverse=True)
+        kind, plus = match.group(3), match.group(4)
+        if high == low:
+            if kind:
+                raise ValueError(f"Pairs can not be suited or offsuit: {token}")
+            lows = range(low, 13) if plus else [low]
+            return [c for r in lows for c in _hand_combos(r, r, "")]
+        lows = range(low, high) if plus else [low]
+        return [c for r in lows for c in _hand_combos(high, r, kind)]
+
+    match = SPAN_RE.match(token)
+    if match and match.group(3) == match.group(6):
+        first = sorted((RANKS.index(match.group(1)), RANKS.index(match.group(2))), reverse=True)
+        last = sorted((RANKS.index(match.group(4)), RANKS.index(match.group(5))), reverse=True)
+        kind = match.group(3)
+        if first[0] == first[1] and last[0] == last[1] and not kind:
+            lo, hi = sorted((first[0], last[0]))
+            return [c for r in range(lo, hi + 1) for c in _hand_combos(r, r, "")]
+        if first[0] == last[0] and first[0] not in (first[1], last[1]):
+            lo, hi = sorted((first[1], last[1]))
+            return [c for r in range(lo, hi + 1) for c in _hand_combos(first[0], r, kind)]
+
+    raise ValueError(f"Invalid range token: {token}")
+
+def parse_range(hand_range: Range) -> Dict[int, float]:
+    """Parse a range into combo weights.
+
+    Ranges are text like "22+, AJs+, KQo, AhKh:0.5" or a mapping of the
+    same tokens to weights. Later tokens override earlier ones.
+    """
+    if isinstance(hand_range, str):
+        items = []
+        for token in hand_range.split(","):
+            token = token.strip()
+            if not token:
+                continue
+            hand, _, weight = token.partition(":")
+            try:
+                items.append((hand.strip(), float(weight) if weight else 1.0))
+            except ValueError:
+                raise ValueError(f"Invalid weight in range token: {token}")
+    else:
+        items = [(hand.strip(), float(weight)) for hand, weight in hand_range.items()]
+
+    weights: Dict[int, float] = {}
+    for hand, weight in items:
+        if weight < 0:
+            raise ValueError(f"Negative weight in range token: {hand}")
+        for combo in _token_combos(hand):
+            weights[combo] = weight
+    return {combo: weight for combo, weight in weights.items() if weight > 0}
+
+def _runouts(board: List[int]) -> Tuple[np.ndarray, np.ndarray]:
+    """Every board that completes the given cards, as 52-bit card sets and suit masks."""
+    deck = [c for c in range(52) if c not in board]
+    missing = 5 - len(board)
+    completions = list(itertools.combinations(deck, missing))
+    return _add_cards(board, np.array(completions, dtype=np.int64).reshape(len(completions), missing))
+
+def _add_cards(board: List[int], completions: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Card sets and suit masks of the board plus each row of cards."""
+    bits = np.full(len(completions), sum(1 << c for c in board), dtype=np.int64)
+    masks = np.tile(np.bitwise_or.reduce(CARD_MASKS[board], axis=0), (len(completions), 1))
+    for column in completions.T:
+        bits |= 1 << column
+        masks |= CARD_MASKS[column]
+    return bits, masks
+
+def _heads_up_exact(
+    combos: Sequence[np.ndarray],
+    weights: Sequence[np.ndarray],
+    boards: Tuple[np.ndarray, np.ndarray]
+) -> Tuple[List[np.ndarray], List[np.ndarray]]:
+    """Per-combo equities of two ranges over every given board.
+
+    Each board is a (n1, n2) matchup matrix: blocked pairs and combos that
+    hit the board get zero weight, wins count one and ties one half.
+    """
+    (c1, c2), (w1, w2) = combos, weights
+    compatible = (COMBO_BITS[c1][:, None] & COMBO_BITS[c2][None, :]) == 0
+    wins = [np.zeros(len(c1)), np.zeros(len(c2))]
+    totals = [np.zeros(len(c1)), np.zeros(len(c2))]
+
+    board_bits, board_masks = boards
+    for start in range(0, len(board_bits), BOARD_CHUNK):
+        bits = board_bits[start:start + BOARD_CHUNK]
+        masks = board_masks[start:start + BOARD_CHUNK, None, :]
+        scores1 = evaluate_masks(masks | COMBO_MASKS[c1])
+        scores2 = evaluate_masks(masks | COMBO_MASKS[c2])
+        live1 = (COMBO_BITS[c1] & bits[:, None]) == 0
+        live2 = (COMBO_BITS[c2] & bits[:, None]) == 0
+
+        valid = live1[:, :, None] & live2[:, None, :] & compatible
+        share = np.where(valid, (scores1[:, :, None] > scores2[:, None, :]) +
+                         0.5 * (scores1[:, :, None] == scores2[:, None, :]), 0.0)
+        valid = valid.astype(np.float64)
+        wins[0] += (share @ w2).sum(axis=0)
+        totals[0] += (valid @ w2).sum(axis=0)
+        wins[1] += ((valid - share).transpose(0, 2, 1) @ w1).sum(axis=0)
+        totals[1] += (valid.transpose(0, 2, 1) @ w1).sum(axis=0)
+    return wins, totals
+
+def _sampled(
+    combos: Sequence[np.ndarray],
+    weights: Sequence[np.ndarray],
+    board: List[int],
+    samples: int,
+    rng: np.random.Generator
+) -> Tuple[List[np.ndarray], List[np.ndarray]]:
+    """Per-combo equities from sampled deals of every range and the runout.
+
+    Deals with shared cards are rejected, which leaves deals weighted by
+    the product of combo weights as card removal requires.
+    """
+    board_bits = sum(1 << c for c in board)
+    picks = [rng.choice(len(c), size=samples, p=w / w.sum()) for c, w in zip(combos, weights)]
+    hole_bits = [COMBO_BITS[c][p] for c, p in zip(combos, picks)]
+
+    used = np.full(samples, board_bits, dtype=np.int64)
+    clash = np.zeros(samples, dtype=bool)
+    for bits in hole_bits:
+        clash |= (used & bits) != 0
+        used |= bits
+    keep = ~clash
+    picks = [p[keep] for p in picks]
+    used = used[keep]
+
+    # the runout comes from the cards nobody holds
+    missing = 5 - len(board)
+    deck_cards = (used[:, None] >> np.arange(52)) & 1
+    keys = np.where(deck_cards == 1, 2.0, rng.random(deck_cards.shape))
+    completions = np.argpartition(keys, missing - 1, axis=1)[:, :missing] if missing else keys[:, :0]
+    _, board_masks = _add_cards(board, completions.astype(np.int64))
+
+    scores = np.stack([
+        evaluate_masks(board_masks | COMBO_MASKS[c][p]) for c, p in zip(combos, picks)
+    ], axis=1)
+    winners = scores == scores.max(axis=1, keepdims=True)
+    share = winners / winners.sum(axis=1, keepdims=True)
+
+    wins = [np.bincount(p, weights=share[:, i], minlength=len(c)) for i, (c, p) in enumerate(zip(combos, picks))]
+    # each kept deal already carries its combo weights through sampling
+    totals = [np.bincount(p, minlength=len(c)).astype(np.float64) for c, p in zip(combos, picks)]
+    return wins, totals
+
+def range_equity(
+    ranges: Sequence[Range],
+    board: str = "",
+    samples: int = SAMPLES,
+    seed: Optional[int] = None
+) -> Dict:
+    """Equity of two or three ranges on a board, overall and per combo.
+
+    Heads-up spots are enumerated exactly while the runouts times matchups
+    fit MATCHUP_BUDGET; preflop, three-way and very wide spots use
+    sampled deals instead. Results are cached per suit-isomorphism class,
+    samples and seed in result_cache.
+    """
+    if len(ranges) not in (2, 3):
+        raise ValueError("Range equity needs two or three ranges")
+    board_cards = [card_index(c) for c in parse_community_cards(board.split())]
+    if len(board_cards) not in (0, 3, 4, 5) or len(set(board_cards)) != len(board_cards):
+        raise ValueError("Board must be empty or have three to five distinct cards")
+
+    board_bits = sum(1 << c for c in board_cards)
+    combos, weights = [], []
+    for hand_range in ranges:
+        parsed = {c: w for c, w in parse_range(hand_range).items() if not COMBO_BITS[c] & board_bits}
+        if not parsed:
+            raise ValueError("Every range needs a combo that does not use a board card")
+        combos.append(np.fromiter(parsed.keys(), dtype=np.int64))
+        weights.append(np.fromiter(parsed.values(), dtype=np.float64))
+
+    # a range whose every combo collides with a whole other range has no deals
+    for i, c in enumerate(combos):
+        for j, other in enumerate(combos):
+            if i != j and not ((COMBO_BITS[c][:, None] & COMBO_BITS[other][None, :]) == 0).any():
+                raise ValueError(f"Range {i + 1} has no combos left once range {j + 1} and the board are removed")
+
+    # equities are computed once per suit-isomorphism class of the spot
+    key, permutation = _canonical_spot(board_cards, combos, weights)
+    key = (key, samples, seed)
+    result = result_cache.get(key)
+    if result is None:
+        board_cards = sorted(PERMUTED_CARDS[permutation][board_cards].tolist())
+        ranked = [np.argsort(PERMUTED_COMBOS[permutation][c]) for c in combos]
+        combos = [PERMUTED_COMBOS[permutation][c][order] for c, order in zip(combos, ranked)]
+        weights = [w[order] for w, order in zip(weights, ranked)]
+        result = _calculate(board_cards, combos, weights, samples, seed)
+        result_cache.put(key, result)
+
+    restore = PERMUTED_COMBOS[INVERSE_PERMUTATIONS[permutation]]
+    logger.debug(f"Range equity on {board or 'preflop'}: {result['equity']} (exact: {result['exact']})")
+    return {
+        **result,
+        "equity": list(result["equity"]),
+        "combos": [
+            {
+                "".join(card_name(int(card)) for card in COMBO_CARDS[combo][::-1]): float(equity)
+                for combo, equity in zip(restore[c], e)
+            }
+            for c, e in result["combos"]
+        ]
+    }
+
+def _canonical_spot(
+    board: List[int],
+    combos: Sequence[np.ndarray],
+    weights: Sequence[np.ndarray]
+) -> Tuple[Tuple[bytes, ...], int]:
+    """Key of the suit-isomorphism class of a spot and the suit renaming into it.
+
+    The key is the smallest encoding of the board and weighted ranges over
+    all 24 renamings, so every renaming of a spot gets the same key.
+    """
+    best = None
+    for permutation, cards in enumerate(PERMUTED_CARDS):
+        parts = [np.sort(cards[board]).tobytes()]
+        for c, w in zip(combos, weights):
+            mapped = PERMUTED_COMBOS[permutation][c]
+            order = np.argsort(mapped)
+            parts += [mapped[order].tobytes(), w[order].tobytes()]
+        if best is None or tuple(parts) < best[0]:
+            best = (tuple(parts), permutation)
+    return best
+
+def _calculate(
+    board_cards: List[int],
+    combos: Sequence[np.ndarray],
+    weights: Sequence[np.ndarray],
+    samples: int,
+    seed: Optional[int]
+) -> Dict:
+    """Overall equities and (combos, equities) of each range."""
+    rng = np.random.default_rng(seed)
+    runout_count = comb(52 - len(board_cards), 5 - len(board_cards))
+    exact = len(combos) == 2 and runout_count * len(combos[0]) * len(combos[1]) <= MATCHUP_BUDGET
+    if exact:
+        wins, totals = _heads_up_exact(combos, weights, _runouts(board_cards))
+        overall = [(w * win).sum() / (w * total).sum() for w, win, total in zip(weights, wins, totals)]
+    else:
+        wins, totals = _sampled(combos, weights, board_cards, samples, rng)
+        if not totals[0].sum():
+            raise ValueError("No deal is possible with these ranges and board")
+        overall = [win.sum() / total.sum() for win, total in zip(wins, totals)]
+
+    per_combo = []
+    for c, win, total in zip(combos, wins, totals):
+        seen = total > 0
+        per_combo.append((c[seen], win[seen] / total[seen]))
+
+    return {
+        "equity": tuple(float(e) for e in overall),
+        "combos": per_combo,
+        "exact": exact,
+        "runouts": runout_count if exact else None,
+        "samples": None if exact else int(totals[0].sum())
+    }
@@ -0,0 +1,141 @@
+"""Module for sharing read-only lookup tables between worker processes."""
+
+import hashlib
+import json
+import logging
+import marshal
+import mmap
+import os
+import stat
+import struct
+import tempfile
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+# logs for debug
+logger = logging.getLogger(__name__)
+
+MAGIC = b"PKTABLE2"
+# data of each table starts on a cache line
+ALIGNMENT = 64
+
+Tables = Dict[str, np.ndarray]
+
+def tables_directory() -> str:
+    """Directory of table files, SHARED_TABLES_DIR or a RAM-backed default."""
+    directory = os.environ.get("SHARED_TABLES_DIR")
+    if directory:
+        return directory
+    return "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+def _build_hash(build: Callable[[], Tables]) -> str:
+    """Short hash of the build code, so an edited build never maps an old file."""
+    code = getattr(build, "__code__", None)
+    content = marshal.dumps(code) if code is not None else repr(build).encode()
+    return hashlib.sha256(content).hexdigest()[:16]
+
+def _write(path: str, tables: Tables) -> None:
+    """Write tables to a temporary file and move it into place atomically."""
+    entries, offset = {}, 0
+    data = bytearray()
+    for name, table in tables.items():
+        entries[name] = {"dtype": table.dtype.str, "shape": table.shape, "offset": offset}
+        offset = _align(offset + table.nbytes)
+        data += np.ascontiguousarray(table).tobytes()
+        data += bytes(offset - len(data))
+    checksum = hashlib.sha256(data)
+    header = json.dumps({"tables": entries, "size": offset, "sha256": checksum.hexdigest()}).encode()
+    data_start = _align(len(MAGIC) + 4 + len(header))
+
+    # O_EXCL so an existing file or symlink at the temporary path is never followed
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC + struct.pack("<I", len(header)) + header)
+            f.seek(data_start)
+            f.write(data)
+            f.truncate(data_start + len(data))
+        os.replace(temp_path, path)
+    except OSError:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+def _attach(path: str) -> Tables:
+    """Map a table file read-only; the arrays are views of the shared pages.
+
+    The file must belong to this user and not be writable by others, and
+    its header, table bounds and checksum are checked before any table is
+    returned, so a stale, truncated or planted file is rejected.
+    """
+    fd = os.open(path, os.O_RDONLY | getattr(os, "O_NOFOLLOW", 0))
+    try:
+        info = os.fstat(fd)
+        if hasattr(os, "getuid") and info.st_uid != os.getuid():
+            raise ValueError(f"Table file is owned by another user: {path}")
+        if info.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+            raise ValueError(f"Table file is writable by other users: {path}")
+        mapped = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+    finally:
+        os.close(fd)
+    if mapped[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"Not a table file: {path}")
+    header_size = struct.unpack_from("<I", mapped, len(MAGIC))[0]
+    header_start = len(MAGIC) + 4
+    header = json.loads(mapped[header_start:header_start + header_size])
+    data_start = _align(header_start + header_size)
+    if len(mapped) != data_start + header["size"]:
+        raise ValueError(f"Table file has the wrong size: {path}")
+    if hashlib.sha256(memoryview(mapped)[data_start:]).hexdigest() != header["sha256"]:
+        raise ValueError(f"Table file checksum does not match: {path}")
+
+    tables = {}
+    for name, entry in header["tables"].items():
+        dtype = np.dtype(entry["dtype"])
+        shape = tuple(entry["shape"])
+        if dtype.hasobject or any(not isinstance(n, int) or n < 0 for n in shape):
+            raise ValueError(f"Bad table {name} in {path}")
+        count = int(np.prod(shape))
+        if entry["offset"] + count * dtype.itemsize > header["size"]:
+            raise ValueError(f"Table {name} runs past the end of {path}")
+        tables[name] = np.frombuffer(
+            mapped, dtype=dtype, count=count, offset=data_start + entry["offset"]
+        ).reshape(shape)
+    return tables
+
+def shared_tables(
+    name: str,
+    version: int,
+    build: Callable[[], Tables],
+    directory: Optional[str] = None
+) -> Tables:
+    """Load read-only tables shared by every process on the host.
+
+    The first process builds the tables and writes them to a file named
+    after name, version and a hash of the build code; every process,
+    including the first, then maps that file, so N workers hold one copy
+    in the page cache instead of N and later workers skip the build. Bump
+    version when the build changes through code the hash can not see.
+    Falls back to private tables when the file can not be written or read.
+    """
+    file_name = f"poker-{name}-v{version}-{_build_hash(build)}.tables"
+    path = os.path.join(directory or tables_directory(), file_name)
+    try:
+        return _attach(path)
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logger.warning(f"Rebuilding unreadable table file {path}: {e}")
+
+    tables = build()
+    try:
+        _write(path, tables)
+        return _attach(path)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not share tables at {path}, using private copies: {e}")
+        return tables
@@ -0,0 +1,69 @@
+"""Module for mapping cards to their suit-isomorphic canonical form."""
+
+import itertools
+import logging
+from typing import Dict, List, Sequence, Tuple, Union
+
+import numpy as np
+
+from app.game.cards import SUITS
+from app.game.hand_ranker import RANK_VALUES, parse_community_cards
+
+# logs for debug
+logger = logging.getLogger(__name__)
+
+Cards = Union[str, Sequence[str]]
+
+# every renaming of the four suits, as the new index of each suit index
+SUIT_PERMUTATIONS = np.array(list(itertools.permutations(range(4))), dtype=np.int64)
+# card bytes (rank index * 4 + suit index) under each renaming, shape (24, 52)
+PERMUTED_CARDS = (np.arange(52) & ~3) | SUIT_PERMUTATIONS[:, np.arange(52) & 3]
+# renaming that undoes each renaming
+INVERSE_PERMUTATIONS = np.array([
+    SUIT_PERMUTATIONS.tolist().index(np.argsort(p).tolist()) for p in SUIT_PERMUTATIONS
+])
+
+def _split(cards: Cards) -> List[str]:
+    """Split 'AhKh', '7h 8h 9h' or a list of cards into single cards."""
+    if isinstance(cards, str):
+        cards = cards.split()
+    return parse_community_cards(cards)
+
+def _sort_cards(cards: List[str]) -> List[str]:
+    return sorted(cards, key=lambda c: (-RANK_VALUES[c[0]], SUITS.index(c[1])))
+
+def canonicalize(hole_cards: Cards, board: Cards = ()) -> Tuple[List[str], List[str], Dict[str, str]]:
+    """Map hole cards and board to their canonical form under suit permutation.
+
+    Returns the sorted canonical hole cards and board with the map from
+    original to canonical suits. Hands that differ only by a renaming of
+    suits get the same canonical form.
+    """
+    hole = _split(hole_cards)
+    board_cards = _split(board)
+
+    # a suit is described by the ranks it has in the hole and on the board;
+    # suits with equal descriptions can be swapped without changing the hand
+    def signature(suit: str) -> Tuple[Tuple[int, ...], Tuple[int, ...]]:
+        return (
+            tuple(sorted((RANK_VALUES[c[0]] for c in hole if c[1] == suit), reverse=True)),
+            tuple(sorted((RANK_VALUES[c[0]] for c in board_cards if c[1] == suit), reverse=True))
+        )
+
+    ordered = sorted(SUITS, key=lambda suit: (signature(suit), -SUITS.index(suit)), reverse=True)
+    suit_map = {suit: SUITS[i] for i, suit in enumerate(ordered)}
+
+    def relabel(cards: List[str]) -> List[str]:
+        return _sort_cards([c[0] + suit_map[c[1]] for c in cards])
+
+    return relabel(hole), relabel(board_cards), suit_map
+
+def canonical_key(hole_cards: Cards, board: Cards = ()) -> str:
+    """Key of the suit-isomorphism class, e.g. 'AhKh|7h8h9d'."""
+    hole, board_cards, _ = canonicalize(hole_cards, board)
+    return "".join(hole) + "|" + "".join(board_cards)
+
+def restore_cards(cards: Sequence[str], suit_map: Dict[str, str]) -> List[str]:
+    """Map canonical cards back to the suits of the original hand."""
+    inverse = {canonical: original for original, canonical in suit_map.items()}
+    return [c[0] + inverse[c[1]] for c in cards]
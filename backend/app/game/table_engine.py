@@ -0,0 +1,371 @@
+"""Module for running poker tables on the server."""
+
+import asyncio
+import logging
+import random
+from array import array
+from typing import Callable, Dict, List, Optional
+
+from app.models import BIG_BLIND, SMALL_BLIND, HandInfo, HandResult, PlayerInfo
+from app.game.cards import card_name
+from app.game.game_validator import MIN_PLAYERS, MAX_PLAYERS
+from app.game.hand_formatter import format_hand_result
+from app.game.payoff_calculator import calculate_player_contributions, calculate_payoffs, check_blinds
+
+# logs for debug
+logger = logging.getLogger(__name__)
+
+STREET_NAMES = ('preflop', 'flop', 'turn', 'river')
+# board cards dealt when moving to each street
+STREET_CARDS = (0, 3, 1, 1)
+
+# seconds a player has to act before being checked or folded
+ACTION_TIMEOUT = 30.0
+
+class TableError(Exception):
+    """Exception for actions a table cannot accept."""
+    pass
+
+class Table:
+    """State of one table, kept in flat arrays indexed by seat.
+
+    Every hand starts each seat with stack_size chips, matching how hands
+    are stored, and the running result of each seat is kept in balances.
+    """
+
+    __slots__ = (
+        'table_id', 'seats', 'stack_size', 'small_blind', 'big_blind',
+        'stacks', 'bets', 'contributions', 'balances', 'folded', 'acted',
+        'deck', 'deck_pos', 'holes', 'board', 'actions',
+        'dealer', 'sb', 'bb', 'to_act', 'current_bet', 'min_raise',
+        'street', 'hand_no', 'in_hand', 'timer'
+    )
+
+    def __init__(
+        self,
+        table_id: str,
+        seats: int,
+        stack_size: int,
+        small_blind: int = SMALL_BLIND,
+        big_blind: int = BIG_BLIND
+    ):
+        if not (MIN_PLAYERS <= seats <= MAX_PLAYERS):
+            raise TableError(f"Number of seats must be between {MIN_PLAYERS} and {MAX_PLAYERS}")
+        if stack_size <= big_blind:
+            raise TableError("Stack size must be bigger than the big blind")
+
+        self.table_id = table_id
+        self.seats = seats
+        self.stack_size = stack_size
+        self.small_blind = small_blind
+        self.big_blind = big_blind
+        self.stacks = array('i', [stack_size] * seats)
+        self.bets = array('i', [0] * seats)
+        self.contributions = array('i', [0] * seats)
+        self.balances = array('i', [0] * seats)
+        self.folded = bytearray(seats)
+        self.acted = bytearray(seats)
+        self.deck = bytearray()
+        self.deck_pos = 0
+        self.holes = bytearray()
+        self.board = bytearray()
+        self.actions: List[str] = []
+        self.dealer = -1
+        self.sb = -1
+        self.bb = -1
+        self.to_act = -1
+        self.current_bet = 0
+        self.min_raise = big_blind
+        self.street = 0
+        self.hand_no = 0
+        self.in_hand = False
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+    def start_hand(self, rng: random.Random) -> None:
+        """Move the button, post blinds and deal hole cards."""
+        n = self.seats
+        self.hand_no += 1
+        self.dealer = (self.dealer + 1) % n
+        for i in range(n):
+            self.stacks[i] = self.stack_size
+            self.bets[i] = 0
+            self.contributions[i] = 0
+            self.folded[i] = 0
+            self.acted[i] = 0
+
+        # shuffling and dealing
+        self.deck = bytearray(range(52))
+        rng.shuffle(self.deck)
+        self.holes = self.deck[:2 * n]
+        self.deck_pos = 2 * n
+        self.board = bytearray()
+        self.actions = []
+        self.street = 0
+
+        # heads up the dealer posts the small blind
+        if n == 2:
+            self.sb, self.bb = self.dealer, (self.dealer + 1) % n
+        else:
+            self.sb, self.bb = (self.dealer + 1) % n, (self.dealer + 2) % n
+        self._post(self.sb, self.small_blind)
+        self._post(self.bb, self.big_blind)
+        self.current_bet = self.big_blind
+        self.min_raise = self.big_blind
+        self.in_hand = True
+        self.to_act = self._next_to_act(self.bb)
+        logger.debug(f"Table {self.table_id} hand {self.hand_no} started, dealer {self.dealer}")
+
+    def can_check(self, seat: int) -> bool:
+        """Whether the seat has nothing to call."""
+        return self.bets[seat] >= self.current_bet
+
+    def act(self, seat: int, action: str, amount: int = 0) -> Optional[HandResult]:
+        """Apply a player action and return the result if the hand ended.
+
+        A raise amount is the total bet for the street after raising.
+        """
+        if not self.in_hand:
+            raise TableError("No hand in progress")
+        if seat != self.to_act:
+            raise TableError(f"Seat {seat} cannot act now, waiting for seat {self.to_act}")
+
+        to_call = self.current_bet - self.bets[seat]
+        if action == 'fold':
+            self.folded[seat] = 1
+        elif action == 'check':
+            if to_call > 0:
+                raise TableError(f"Seat {seat} cannot check, {to_call} to call")
+        elif action == 'call':
+            if to_call <= 0:
+                raise TableError(f"Seat {seat} has nothing to call")
+            self._post(seat, to_call)
+        elif action == 'raise':
+            all_in = self.bets[seat] + self.stacks[seat]
+            if amount > all_in:
+                raise TableError(f"Raise of {amount} exceeds stack of seat {seat}")
+            if amount <= self.current_bet or (
+                    amount < self.current_bet + self.min_raise and amount != all_in):
+                raise TableError(f"Raise must be at least {self.current_bet + self.min_raise}")
+            self.min_raise = max(self.min_raise, amount - self.current_bet)
+            self.current_bet = amount
+            # everyone has to respond to the raise
+            for i in range(self.seats):
+                self.acted[i] = 0
+            self._post(seat, amount - self.bets[seat])
+        else:
+            raise TableError(f"Invalid action type: {action}")
+
+        self.acted[seat] = 1
+        self.actions.append(f"{seat + 1}:{action},{amount}" if action == 'raise' else f"{seat + 1}:{action}")
+        return self._advance(seat)
+
+    def _post(self, seat: int, amount: int) -> None:
+        """Move chips from a stack into the current bet."""
+        amount = min(amount, self.stacks[seat])
+        self.stacks[seat] -= amount
+        self.bets[seat] += amount
+        self.contributions[seat] += amount
+
+    def _is_pending(self, seat: int) -> bool:
+        """Whether the seat still has to act this street."""
+        return (not self.folded[seat] and self.stacks[seat] > 0
+                and (not self.acted[seat] or self.bets[seat] < self.current_bet))
+
+    def _next_to_act(self, seat: int) -> int:
+        """Find the next seat after the given one that has to act."""
+        for step in range(1, self.seats + 1):
+            i = (seat + step) % self.seats
+            if self._is_pending(i):
+                return i
+        return -1
+
+    def _advance(self, seat: int) -> Optional[HandResult]:
+        """Pass the turn, move to the next street or settle the hand."""
+        live = [i for i in range(self.seats) if not self.folded[i]]
+        if len(live) == 1:
+            return self._settle()
+
+        self.to_act = self._next_to_act(seat)
+        if self.to_act >= 0:
+            return None
+
+        # betting round is over
+        with_chips = sum(1 for i in live if self.stacks[i] > 0)
+        if self.street == 3 or with_chips <= 1:
+            return self._settle()
+
+        self.street += 1
+        self._deal_board(STREET_CARDS[self.street])
+        for i in range(self.seats):
+            self.bets[i] = 0
+            self.acted[i] = 0
+        self.current_bet = 0
+        self.min_raise = self.big_blind
+        self.to_act = self._next_to_act(self.dealer)
+        return None
+
+    def _deal_board(self, count: int) -> None:
+        """Deal cards to the board."""
+        self.board += self.deck[self.deck_pos:self.deck_pos + count]
+        self.deck_pos += count
+
+    def _settle(self) -> HandResult:
+        """Settle the pot and build the hand result."""
+        live = {i for i in range(self.seats) if not self.folded[i]}
+        # all-in players see the rest of the board
+        if len(live) > 1:
+            self._deal_board(5 - len(self.board))
+
+        hand_info = self.hand_info()
+        contributions = calculate_player_contributions(hand_info)
+        check_blinds(hand_info, contributions, self.small_blind, self.big_blind)
+        payoffs = calculate_payoffs(
+            live, self.seats, hand_info.pot, contributions, hand_info
+        )
+        for i, payoff in enumerate(payoffs):
+            self.balances[i] += payoff
+
+        self.in_hand = False
+        self.to_act = -1
+        logger.info(f"Table {self.table_id} hand {self.hand_no} settled, payoffs: {payoffs}")
+        return format_hand_result(hand_info, payoffs)
+
+    def hand_info(self) -> HandInfo:
+        """Build the hand in the same form clients submit it."""
+        labels = {self.dealer: "D"} if self.seats == 2 else {self.dealer: "D", self.sb: "SB"}
+        labels[self.bb] = "BB"
+        players = [
+            PlayerInfo(
+                id=i + 1,
+                cards=card_name(self.holes[2 * i]) + card_name(self.holes[2 * i + 1]),
+                position=labels.get(i, ""),
+                stack=self.stacks[i]
+            )
+            for i in range(self.seats)
+        ]
+        return HandInfo(
+            hand_id=f"{self.table_id}-{self.hand_no}",
+            stack_size=self.stack_size,
+            players=players,
+            actions=" ".join(self.actions),
+            community_cards="".join(card_name(c) for c in self.board),
+            stack_info=f"Stack {self.stack_size}",
+            positions=(
+                f"Dealer: Player {self.dealer + 1}; "
+                f"Player {self.sb + 1} Small blind; "
+                f"Player {self.bb + 1} Big blind"
+            ),
+            hole_cards="; ".join(f"Player {p.id}: {p.cards}" for p in players),
+            pot=sum(self.contributions)
+        )
+
+    def to_dict(self) -> Dict:
+        """Public table state, without hole cards."""
+        return {
+            "table_id": self.table_id,
+            "hand_no": self.hand_no,
+            "street": STREET_NAMES[self.street],
+            "board": [card_name(c) for c in self.board],
+            "pot": sum(self.contributions),
+            "current_bet": self.current_bet,
+            "to_act": self.to_act,
+            "dealer": self.dealer,
+            "stacks": list(self.stacks),
+            "bets": list(self.bets),
+            "folded": [i for i in range(self.seats) if self.folded[i]],
+            "balances": list(self.balances)
+        }
+
+class TableManager:
+    """Hosts many tables on one event loop and settles their hands."""
+
+    def __init__(
+        self,
+        persist: Optional[Callable[[HandResult], object]] = None,
+        action_timeout: float = ACTION_TIMEOUT,
+        seed: Optional[int] = None
+    ):
+        self._tables: Dict[str, Table] = {}
+        self._persist = persist
+        self._action_timeout = action_timeout
+        self._rng = random.Random(seed)
+
+    def __len__(self) -> int:
+        return len(self._tables)
+
+    def open_table(
+        self,
+        table_id: str,
+        seats: int,
+        stack_size: int,
+        small_blind: int = SMALL_BLIND,
+        big_blind: int = BIG_BLIND
+    ) -> Table:
+        """Open a table and deal its first hand."""
+        if table_id in self._tables:
+            raise TableError(f"Table {table_id} already exists")
+        table = Table(table_id, seats, stack_size, small_blind, big_blind)
+        self._tables[table_id] = table
+        self._start_hand(table)
+        return table
+
+    def get_table(self, table_id: str) -> Optional[Table]:
+        """Find a table by its ID."""
+        return self._tables.get(table_id)
+
+    def close_table(self, table_id: str) -> None:
+        """Close a table, dropping any hand in progress."""
+        table = self._tables.pop(table_id, None)
+        if table and table.timer:
+            table.timer.cancel()
+
+    def act(self, table_id: str, seat: int, action: str, amount: int = 0) -> Optional[HandResult]:
+        """Apply an action at a table and return the result if the hand ended."""
+        table = self._tables.get(table_id)
+        if not table:
+            raise TableError(f"Table {table_id} not found")
+
+        result = table.act(seat, action, amount)
+        if result:
+            self._complete(table, result)
+        else:
+            self._schedule_timeout(table)
+        return result
+
+    def _start_hand(self, table: Table) -> None:
+        table.start_hand(self._rng)
+        self._schedule_timeout(table)
+
+    def _complete(self, table: Table, result: HandResult) -> None:
+        """Hand the result to persistence and deal the next hand."""
+        if self._persist:
+            try:
+                self._persist(result)
+            except Exception as e:
+                logger.warning(f"Failed to persist hand {result.hand_id}: {e}")
+        self._start_hand(table)
+
+    def _schedule_timeout(self, table: Table) -> None:
+        """Replace the table's timer with one for the player to act."""
+        if table.timer:
+            table.timer.cancel()
+            table.timer = None
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # no event loop, e.g. in scripts and tests
+            return
+        table.timer = loop.call_later(
+            self._action_timeout, self._on_timeout,
+            table.table_id, table.hand_no, table.to_act
+        )
+
+    def _on_timeout(self, table_id: str, hand_no: int, seat: int) -> None:
+        """Check or fold for a player who ran out of time."""
+        table = self._tables.get(table_id)
+        if not table or table.hand_no != hand_no or table.to_act != seat:
+            return
+        table.timer = None
+        action = 'check' if table.can_check(seat) else 'fold'
+        logger.info(f"Seat {seat} at table {table_id} timed out, auto {action}")
+        self.act(table_id, seat, action)
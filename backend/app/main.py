@@ -1,15 +1,40 @@
 """Main FastAPI application module for the poker game."""
 
+import asyncio
+import hmac
+import json
 import logging
-from typing import List
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
 
-from fastapi import FastAPI, HTTPException, status
+from fastapi import APIRouter, FastAPI, HTTPException, Request, Response, WebSocket, WebSocketDisconnect, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 
-from app.models import HandHistoryEntry, HandInfo, HandResult
-from app.game.hand_evaluator import evaluate_hand
-from app.game.list_hands import get_recent_hands, get_hand_by_id
-from app.database import get_db_connection, init_db, save_evaluated_hand
+from app.models import (
+    HandHistoryEntry, HandInfo, HandResult, IcmRequest, OutsRequest, RangeEquityRequest,
+    TableAction, TableConfig
+)
+from app.game.evaluation_cache import EvaluationCache
+from app.game.evaluation_executor import EvaluationExecutor
+from app.game.outs_calculator import analyze_outs
+from app.game.icm import hand_icm_payoffs, icm_equity
+from app.game.range_equity import range_equity
+from app.game.betting_state import BettingState
+from app.game.game_validator import GameValidationError
+from app.game.table_engine import TableError, TableManager
+from app.game.list_hands import (
+    find_hand, get_hand_replay, get_latest_hand_id, get_recent_hands, parse_list_fields
+)
+from app.database import ensure_partitions, get_db_connection, init_db, save_evaluated_hand
+from app.admission import AdmissionLimiter, AdmissionMiddleware, admission_rule
+from app.utils.profiler import ProfileSession, flame_graph_svg
+from app.routing import (
+    IMMUTABLE_CACHE_CONTROL, REVALIDATE_CACHE_CONTROL, HandCodecRoute, ResponseCache,
+    compress_body, etag_matches, hand_etag, list_etag, negotiate_encoding, not_modified
+)
 
 
 # setting loggin in console
@@ -39,8 +64,53 @@ if connection:
     except Exception as e:
         logger.warning(f"Failed to initialize database tables: {e}")
 
+# one writer thread keeps saves off the event loop and in order on the connection
+hand_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="hand-writer")
+
+# payoffs of recently evaluated hands, keyed by hand content
+evaluation_cache = EvaluationCache()
+# runs evaluations that miss the cache off the event loop
+evaluation_executor = EvaluationExecutor.from_env(evaluation_cache)
+
+# seconds between checks that the coming monthly partitions exist
+PARTITION_CHECK_INTERVAL = 24 * 3600
+
+async def keep_partitions(interval: float = PARTITION_CHECK_INTERVAL) -> None:
+    """Create the coming monthly partitions while the app runs, on the writer thread."""
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            names = await loop.run_in_executor(hand_writer, ensure_partitions, connection)
+            logger.info(f"Partitions ready: {', '.join(names)}")
+        except Exception as e:
+            logger.warning(f"Failed to create partitions: {e}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Keep partitions ahead while running; release the evaluation pools and finish pending saves on shutdown."""
+    partitions = asyncio.create_task(keep_partitions()) if connection else None
+    yield
+    if partitions:
+        partitions.cancel()
+    evaluation_executor.shutdown()
+    hand_writer.shutdown(wait=True)
+    logger.info("Evaluation pools and hand writer shut down")
+
 API_VERSION = "v1"
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+
+# separate budgets so a burst of evaluations can not starve the reads;
+# override with ADMISSION_<READ|WRITE>_<CONCURRENCY|QUEUE|TIMEOUT>
+read_budget = AdmissionLimiter.from_env("read", max_concurrent=64, max_queue=256, queue_timeout=1.0)
+write_budget = AdmissionLimiter.from_env("write", max_concurrent=8, max_queue=32, queue_timeout=2.0)
+admission_budgets = {"read": read_budget, "write": write_budget}
+
+# added before cors so rejections still carry cors headers
+app.add_middleware(AdmissionMiddleware, rules=[
+    admission_rule("POST", r"/api/v1/hands", write_budget),
+    admission_rule("GET", r"/api/v1/hands(/[^/]+(/replay)?)?", read_budget),
+])
 
 # cors
 app.add_middleware(
@@ -53,18 +123,23 @@ app.add_middleware(
     max_age=3600
 )
 
-@app.post("/api/v1/hands", status_code=status.HTTP_201_CREATED)
+# hand routes also take and return the binary hand encoding
+hands_router = APIRouter(route_class=HandCodecRoute)
+
+@hands_router.post("/api/v1/hands", status_code=status.HTTP_201_CREATED)
 async def create_hand(hand_info: HandInfo) -> HandResult:
     """Create a new poker hand and evaluate it"""
     try:
         logger.info(f"Received new hand request - Hand ID: {hand_info.hand_id}")
         
-        result = evaluate_hand(hand_info)
+        result = await evaluation_executor.evaluate(hand_info)
         
         # saving hand
         if connection:
             try:
-                save_evaluated_hand(connection, result)
+                await asyncio.get_running_loop().run_in_executor(
+                    hand_writer, save_evaluated_hand, connection, result
+                )
                 logger.info(f"Hand {hand_info.hand_id} saved to database")
             except Exception as e:
                 logger.warning(f"Failed to save hand to database: {e}")
@@ -79,15 +154,277 @@ async def create_hand(hand_info: HandInfo) -> HandResult:
             detail=str(e)
         )
 
+app.include_router(hands_router)
+
+# rendered hand lists, shared by every client polling the same query
+list_responses = ResponseCache()
+
 @app.get("/api/v1/hands")
-async def list_hands(limit: int = 5):
-    """List recent poker hands"""
-    return get_recent_hands(connection, limit)
+async def list_hands(request: Request, limit: int = 5, fields: Optional[str] = None):
+    """List recent poker hands, answering 304 while no hand was added.
+
+    `fields` picks the fields of each hand, e.g. `hand_id,winnings`; large
+    lists are compressed with zstd or gzip when the client accepts it.
+    """
+    try:
+        selected = parse_list_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+    etag = list_etag(get_latest_hand_id(connection), limit, ",".join(selected), encoding)
+    vary = {"Vary": "Accept-Encoding"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag, REVALIDATE_CACHE_CONTROL, vary)
+
+    cached = list_responses.get(etag)
+    if cached:
+        body, encoded = cached
+    else:
+        body, used = compress_body(JSONResponse(get_recent_hands(connection, limit, selected)).body, encoding)
+        encoded = {"Content-Encoding": used} if used != "identity" else {}
+        list_responses.put(etag, body, encoded)
+    headers = {"ETag": etag, "Cache-Control": REVALIDATE_CACHE_CONTROL, **vary, **encoded}
+    return Response(body, media_type="application/json", headers=headers)
+
+@app.post("/api/v1/outs")
+async def calculate_outs(spot: OutsRequest):
+    """Find outs and draws of each active player on a flop or turn"""
+    active_players = {
+        i for i, player in enumerate(spot.players)
+        if player.id not in spot.folded_players
+    }
+    try:
+        return {"players": analyze_outs(active_players, spot)}
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+@app.post("/api/v1/equity/ranges")
+async def calculate_range_equity(request: RangeEquityRequest):
+    """Get range and per-combo equities of two or three ranges on a board"""
+    try:
+        return await evaluation_executor.run(range_equity, request.ranges, request.board)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+@app.post("/api/v1/icm")
+async def calculate_icm(request: IcmRequest):
+    """Get tournament equity of stacks, or ICM-adjusted payoffs of a hand"""
+    try:
+        if request.hand is None:
+            return {"equity": await evaluation_executor.run(icm_equity, request.stacks, request.payouts)}
+
+        hand_info = request.hand
+        result = await evaluation_executor.evaluate(hand_info)
+        stacks = [hand_info.stack_size] * len(hand_info.players)
+        return {
+            "equity": await evaluation_executor.run(icm_equity, stacks, request.payouts),
+            "chip_payoffs": result.payoffs,
+            "icm_payoffs": await evaluation_executor.run(
+                hand_icm_payoffs, hand_info, result.payoffs, request.payouts
+            )
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+@app.get("/api/v1/stats/evaluation-cache")
+async def evaluation_cache_stats():
+    """Get hit rates of the evaluation cache"""
+    return evaluation_cache.stats()
+
+@app.get("/api/v1/stats/evaluation")
+async def evaluation_stats():
+    """Get the lane, queue wait and run time counters of hand evaluation"""
+    return evaluation_executor.stats()
+
+@app.get("/api/v1/stats/admission")
+async def admission_stats():
+    """Get concurrency and queue depth of each admission budget"""
+    return {name: budget.stats() for name, budget in admission_budgets.items()}
+
+@app.get("/health")
+async def health():
+    """Liveness check, never queued behind the hand endpoints"""
+    return {"status": "ok"}
+
+PROFILE_FORMATS = ("json", "collapsed", "svg")
+MAX_PROFILE_SECONDS = 60
+# one profile at a time, since the samples would overlap
+profile_lock = asyncio.Lock()
+
+def require_admin(request: Request) -> None:
+    """Allow only requests with the X-Admin-Token of ADMIN_TOKEN; without it admin routes do not exist"""
+    admin_token = os.environ.get("ADMIN_TOKEN")
+    if not admin_token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    token = request.headers.get("x-admin-token", "")
+    if not hmac.compare_digest(token.encode(), admin_token.encode()):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid admin token")
+
+@app.get("/api/v1/admin/profile")
+async def profile(
+    request: Request,
+    seconds: float = 10,
+    format: str = "json",
+    interval_ms: float = 10,
+    allocations: bool = False
+):
+    """Sample the stacks of every thread for `seconds` while traffic is served as usual"""
+    require_admin(request)
+    if not 0 < seconds <= MAX_PROFILE_SECONDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"seconds must be above 0 and at most {MAX_PROFILE_SECONDS}"
+        )
+    if not 1 <= interval_ms <= 1000:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="interval_ms must be between 1 and 1000")
+    if format not in PROFILE_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"format must be one of {', '.join(PROFILE_FORMATS)}"
+        )
+    if profile_lock.locked():
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A profile is already running")
+
+    async with profile_lock:
+        logger.info(f"Profiling for {seconds}s every {interval_ms}ms")
+        session = ProfileSession(interval_ms / 1000, allocations)
+        session.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            session.stop()
+
+    headers = {"Cache-Control": "no-store"}
+    if format == "collapsed":
+        return PlainTextResponse(session.profiler.collapsed(), headers=headers)
+    if format == "svg":
+        title = f"{session.profiler.samples} samples over {session.profiler.duration:.1f}s"
+        return Response(flame_graph_svg(session.profiler.stacks, title), media_type="image/svg+xml", headers=headers)
+    return JSONResponse(session.report(), headers=headers)
 
 @app.get("/api/v1/hands/{hand_id}", response_model=HandHistoryEntry)
-async def get_hand(hand_id: str) -> HandHistoryEntry:
-    """Get a specific poker hand by ID"""
-    return get_hand_by_id(connection, hand_id)
+async def get_hand(hand_id: str, request: Request, response: Response) -> HandHistoryEntry:
+    """Get a specific poker hand by ID; a matching ETag is answered without a body"""
+    etag = hand_etag(hand_id)
+    if_none_match = request.headers.get("if-none-match")
+    if etag_matches(if_none_match, etag):
+        # a tag was only sent with the hand, "*" is only vouched for once it exists
+        if "*" in if_none_match:
+            find_hand(connection, hand_id)
+        return not_modified(etag, IMMUTABLE_CACHE_CONTROL)
+
+    hand = find_hand(connection, hand_id)[1]
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+    return hand
+
+@app.get("/api/v1/hands/{hand_id}/replay")
+async def replay_hand(hand_id: str, step: int = 0):
+    """Get the table state of a hand after `step` actions"""
+    return get_hand_replay(connection, hand_id, step)
+
+# betting state of hands being played live, by table id
+live_tables: Dict[str, BettingState] = {}
+
+@app.websocket("/ws/tables/{table_id}")
+async def table_socket(websocket: WebSocket, table_id: str):
+    """Validate actions of a live hand one at a time"""
+    await websocket.accept()
+    logger.info(f"Client connected to table {table_id}")
+    # hand started by this client, dropped when it disconnects
+    started: Optional[BettingState] = None
+    try:
+        while True:
+            text = await websocket.receive_text()
+            try:
+                message = json.loads(text)
+                if not isinstance(message, dict):
+                    raise GameValidationError("Messages must be JSON objects")
+                message_type = message.get("type")
+                if message_type == "start":
+                    started = live_tables[table_id] = BettingState(message["player_ids"])
+                    logger.info(f"New hand started at table {table_id}")
+                elif table_id not in live_tables:
+                    raise GameValidationError(f"No hand in progress at table {table_id}")
+                elif message_type == "action":
+                    live_tables[table_id].apply(message["action"])
+                elif message_type == "board":
+                    live_tables[table_id].validate_community_cards(message["community_cards"])
+                elif message_type == "end":
+                    state = live_tables.pop(table_id)
+                    await websocket.send_json({"type": "ended", "table_id": table_id, **state.to_dict()})
+                    continue
+                else:
+                    raise GameValidationError(f"Unknown message type: {message_type}")
+            except (GameValidationError, KeyError, TypeError, ValueError) as e:
+                # ValueError covers messages that are not JSON
+                await websocket.send_json({"type": "error", "table_id": table_id, "detail": str(e)})
+                continue
+
+            await websocket.send_json({
+                "type": "state",
+                "table_id": table_id,
+                **live_tables[table_id].to_dict()
+            })
+    except WebSocketDisconnect:
+        logger.info(f"Client disconnected from table {table_id}")
+    finally:
+        if started is not None and live_tables.get(table_id) is started:
+            del live_tables[table_id]
+
+def _save_table_hand(result: HandResult) -> None:
+    try:
+        save_evaluated_hand(connection, result)
+    except Exception as e:
+        logger.warning(f"Failed to persist hand {result.hand_id}: {e}")
+
+def persist_hand_result(result: HandResult) -> None:
+    """Save a hand finished at a server-side table on the writer thread."""
+    if connection:
+        hand_writer.submit(_save_table_hand, result)
+
+# tables played on the server
+table_manager = TableManager(persist=persist_hand_result)
+
+@app.post("/api/v1/tables", status_code=status.HTTP_201_CREATED)
+async def open_table(config: TableConfig):
+    """Open a server-side table and deal the first hand"""
+    try:
+        table = table_manager.open_table(
+            config.table_id, config.seats, config.stack_size,
+            config.small_blind, config.big_blind
+        )
+    except TableError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    logger.info(f"Opened table {config.table_id} with {config.seats} seats")
+    return table.to_dict()
+
+@app.get("/api/v1/tables/{table_id}")
+async def get_table(table_id: str):
+    """Get the public state of a server-side table"""
+    table = table_manager.get_table(table_id)
+    if not table:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Table {table_id} not found"
+        )
+    return table.to_dict()
+
+@app.post("/api/v1/tables/{table_id}/actions")
+async def table_action(table_id: str, table_action: TableAction):
+    """Apply a player action at a server-side table"""
+    if not table_manager.get_table(table_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Table {table_id} not found"
+        )
+    try:
+        result = table_manager.act(
+            table_id, table_action.seat, table_action.action, table_action.amount
+        )
+    except TableError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return {"table": table_manager.get_table(table_id).to_dict(), "result": result}
 
 if __name__ == "__main__":
     import uvicorn
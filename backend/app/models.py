@@ -1,8 +1,14 @@
 """Data models for the poker game application."""
 
-from dataclasses import dataclass, field
-from typing import List
+from dataclasses import KW_ONLY, dataclass, field
+from typing import Any, Dict, List, Optional, Union
 
+# default blinds
+SMALL_BLIND = 20
+BIG_BLIND = 40
+
+# largest field an ICM request may hold
+MAX_ICM_PLAYERS = 100
 
 @dataclass
 class PlayerInfo:
@@ -27,6 +33,35 @@ class HandInfo:
     pot: int
 
 
+class LazyText:
+    """Display string of a hand, built by the hand formatter when first read.
+
+    A string given to the constructor is kept as it is; when left out, the
+    string is only built, and then cached, once something reads it, such
+    as serializing the result.
+    """
+
+    def __init__(self, formatter: str):
+        self.formatter = formatter
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            # the dataclass default, meaning built when read
+            return None
+        value = instance.__dict__.get(self.name)
+        if value is None:
+            # imported here since the formatter imports the models
+            from app.game import hand_formatter
+            value = instance.__dict__[self.name] = getattr(hand_formatter, self.formatter)(instance)
+        return value
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.name] = value
+
+
 @dataclass
 class HandResult:
     """Result of a poker hand after evaluation."""
@@ -35,9 +70,10 @@ class HandResult:
     players: List[PlayerInfo]
     actions: str
     community_cards: str
-    stack_info: str
-    positions: str
-    hole_cards: str
+    _: KW_ONLY
+    stack_info: str = LazyText("format_stack_info")
+    positions: str = LazyText("format_positions")
+    hole_cards: str = LazyText("format_hole_cards")
     pot: int
     payoffs: List[int] = field(default_factory=list)
 
@@ -49,4 +85,66 @@ class HandHistoryEntry:
     stack_info: str
     positions: str
     hands: str
-    actions: List[str]
\ No newline at end of file
+    actions: List[str]
+
+@dataclass
+class TableConfig:
+    """Settings for opening a server-side table."""
+    table_id: str
+    seats: int
+    stack_size: int
+    small_blind: int = SMALL_BLIND
+    big_blind: int = BIG_BLIND
+
+
+@dataclass
+class TableAction:
+    """Action of the player in a seat at a server-side table."""
+    seat: int
+    action: str
+    amount: int = 0
+
+
+@dataclass
+class OutsRequest:
+    """Flop or turn spot to find outs for."""
+    players: List[PlayerInfo]
+    community_cards: str
+    folded_players: List[int] = field(default_factory=list)
+
+
+@dataclass
+class IcmRequest:
+    """Stacks and payouts to compute tournament equity for.
+
+    With a hand, stacks are the hand's starting stacks and its chip
+    payoffs are converted to ICM-adjusted payoffs.
+    """
+    payouts: List[float]
+    stacks: List[int] = field(default_factory=list)
+    hand: Optional[HandInfo] = None
+
+    def __post_init__(self):
+        if len(self.stacks) > MAX_ICM_PLAYERS:
+            raise ValueError(f"At most {MAX_ICM_PLAYERS} stacks are allowed")
+
+
+@dataclass
+class RangeEquityRequest:
+    """Ranges of two or three players, as text like "22+, AJs+" or combo weights."""
+    ranges: List[Union[str, Dict[str, float]]]
+    board: str = ""
+
+
+@dataclass
+class BulkItemError:
+    """Error of one hand in a bulk operation."""
+    hand_id: str
+    error: str
+
+
+@dataclass
+class BulkResult:
+    """Outcome of a bulk operation, with errors reported per hand."""
+    succeeded: List[Any] = field(default_factory=list)
+    errors: List[BulkItemError] = field(default_factory=list)
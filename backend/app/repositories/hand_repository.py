@@ -1,6 +1,8 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional
-from app.models import HandInfo, HandResult
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional
+from app.models import HandInfo, HandResult, PlayerInfo
+from app.game.cards import NO_CARD, pack_cards, unpack_cards
 
 class HandRepository(ABC):
     """Repository interface for managing poker hands."""
@@ -16,7 +18,7 @@ class HandRepository(ABC):
         pass
     
     @abstractmethod
-    def find_all(self) -> List[HandInfo]:
+    def find_all(self) -> Iterable[HandInfo]:
         """Find all hands."""
         pass
     
@@ -24,6 +26,28 @@ class HandRepository(ABC):
     def save_result(self, hand_id: str, result: HandResult) -> HandResult:
         """Save the result of a hand."""
         pass
+    
+    @abstractmethod
+    def find_result_by_id(self, hand_id: str) -> Optional[HandResult]:
+        """Find the result of a hand by its ID."""
+        pass
+    
+    def save_many(self, hands: List[HandInfo]) -> List[HandInfo]:
+        """Save several hands; override to use one multi-row write."""
+        return [self.save(hand) for hand in hands]
+    
+    def find_many_by_ids(self, hand_ids: List[str]) -> Dict[str, HandInfo]:
+        """Find several hands by ID, leaving out missing ones; override to use one read."""
+        found = {}
+        for hand_id in hand_ids:
+            hand = self.find_one_by_id(hand_id)
+            if hand:
+                found[hand_id] = hand
+        return found
+    
+    def save_results(self, results: Dict[str, HandResult]) -> List[HandResult]:
+        """Save results by hand ID; override to use one multi-row write."""
+        return [self.save_result(hand_id, result) for hand_id, result in results.items()]
 
 class InMemoryHandRepository(HandRepository):
     """In-memory implementation of HandRepository."""
@@ -44,4 +68,169 @@ class InMemoryHandRepository(HandRepository):
     
     def save_result(self, hand_id: str, result: HandResult) -> HandResult:
         self._results[hand_id] = result
-        return result 
\ No newline at end of file
+        return result
+    
+    def find_result_by_id(self, hand_id: str) -> Optional[HandResult]:
+        return self._results.get(hand_id)
+
+class _HandColumns:
+    """Hands stored column-wise in typed arrays, one row per hand."""
+
+    # text fields kept in the shared text buffer, in this order
+    TEXT_FIELDS = ('actions', 'community_cards', 'stack_info', 'positions', 'hole_cards')
+
+    __slots__ = (
+        'index', 'hand_ids', 'stack_sizes', 'pots', 'player_offsets',
+        'player_ids', 'player_stacks', 'player_positions', 'player_cards',
+        'position_names', 'position_codes', 'text', 'text_offsets'
+    )
+
+    def __init__(self):
+        self.index: Dict[str, int] = {}
+        self.hand_ids: List[str] = []
+        self.stack_sizes = array('q')
+        self.pots = array('q')
+        # players of row r are player_offsets[r]:player_offsets[r + 1]
+        self.player_offsets = array('Q', [0])
+        self.player_ids = array('q')
+        self.player_stacks = array('q')
+        self.player_positions = bytearray()
+        # two card bytes per player
+        self.player_cards = bytearray()
+        self.position_names: List[str] = []
+        self.position_codes: Dict[str, int] = {}
+        # text of row r, field f spans text_offsets[5r + f]:text_offsets[5r + f + 1]
+        self.text = bytearray()
+        self.text_offsets = array('Q', [0])
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def append(self, hand: HandInfo) -> int:
+        """Add a hand as a new row, replacing any row with the same ID."""
+        # encoding every field first so a bad hand leaves no partial row
+        cards = b"".join(self._pack_hole_cards(p) for p in hand.players)
+        texts = [getattr(hand, name).encode() for name in self.TEXT_FIELDS]
+        try:
+            numbers = array('q', (hand.stack_size, hand.pot))
+            ids = array('q', (p.id for p in hand.players))
+            stacks = array('q', (p.stack for p in hand.players))
+        except OverflowError:
+            raise ValueError(f"Hand {hand.hand_id} has a number out of range")
+        positions = self._position_codes([p.position for p in hand.players])
+
+        row = len(self.hand_ids)
+        self.hand_ids.append(hand.hand_id)
+        self.stack_sizes.append(numbers[0])
+        self.pots.append(numbers[1])
+        self.player_ids += ids
+        self.player_stacks += stacks
+        self.player_positions += positions
+        self.player_cards += cards
+        self.player_offsets.append(len(self.player_ids))
+        for text in texts:
+            self.text += text
+            self.text_offsets.append(len(self.text))
+        self.index[hand.hand_id] = row
+        return row
+
+    @staticmethod
+    def _pack_hole_cards(player: PlayerInfo) -> bytes:
+        packed = pack_cards(player.cards)
+        if len(packed) > 2:
+            raise ValueError(f"Player {player.id} has invalid number of cards")
+        return packed.ljust(2, bytes([NO_CARD]))
+
+    def _position_codes(self, positions: List[str]) -> bytes:
+        """One byte per position, adding new names only if they all fit."""
+        new = [p for p in dict.fromkeys(positions) if p not in self.position_codes]
+        if len(self.position_names) + len(new) > 256:
+            raise ValueError("Too many distinct positions")
+        for position in new:
+            self.position_codes[position] = len(self.position_names)
+            self.position_names.append(position)
+        return bytes(self.position_codes[p] for p in positions)
+
+    def players(self, row: int) -> List[PlayerInfo]:
+        """Build the players of a row."""
+        cards = memoryview(self.player_cards)
+        return [
+            PlayerInfo(
+                id=self.player_ids[i],
+                cards="".join(unpack_cards(cards[2 * i:2 * i + 2])),
+                position=self.position_names[self.player_positions[i]],
+                stack=self.player_stacks[i]
+            )
+            for i in range(self.player_offsets[row], self.player_offsets[row + 1])
+        ]
+
+    def texts(self, row: int) -> Dict[str, str]:
+        """Decode the text fields of a row."""
+        text = memoryview(self.text)
+        first = row * len(self.TEXT_FIELDS)
+        return {
+            name: str(text[self.text_offsets[first + f]:self.text_offsets[first + f + 1]], "utf-8")
+            for f, name in enumerate(self.TEXT_FIELDS)
+        }
+
+    def hand_info(self, row: int) -> HandInfo:
+        """Materialize a row as a HandInfo."""
+        return HandInfo(
+            hand_id=self.hand_ids[row],
+            stack_size=self.stack_sizes[row],
+            players=self.players(row),
+            pot=self.pots[row],
+            **self.texts(row)
+        )
+
+class ColumnarHandRepository(HandRepository):
+    """Memory-compact in-memory implementation of HandRepository.
+
+    Hands are kept in typed arrays with cards packed into bytes and text
+    in one shared buffer; HandInfo objects are only built when read.
+    Saving an existing ID adds a new row and leaves the old one unused.
+    """
+
+    def __init__(self):
+        self._hands = _HandColumns()
+        self._results = _HandColumns()
+        # payoffs of result row r are in payoff_offsets[r]:payoff_offsets[r + 1]
+        self._payoffs = array('q')
+        self._payoff_offsets = array('Q', [0])
+
+    def __len__(self) -> int:
+        return len(self._hands)
+
+    def save(self, hand: HandInfo) -> HandInfo:
+        self._hands.append(hand)
+        return hand
+
+    def find_one_by_id(self, hand_id: str) -> Optional[HandInfo]:
+        row = self._hands.index.get(hand_id)
+        return self._hands.hand_info(row) if row is not None else None
+
+    def find_all(self) -> Iterator[HandInfo]:
+        # snapshot the rows so saves while iterating don't break it
+        for row in list(self._hands.index.values()):
+            yield self._hands.hand_info(row)
+
+    def save_result(self, hand_id: str, result: HandResult) -> HandResult:
+        stored = HandInfo(**{
+            name: getattr(result, name)
+            for name in HandInfo.__dataclass_fields__
+        })
+        stored.hand_id = hand_id
+        self._results.append(stored)
+        self._payoffs.extend(result.payoffs)
+        self._payoff_offsets.append(len(self._payoffs))
+        return result
+
+    def find_result_by_id(self, hand_id: str) -> Optional[HandResult]:
+        row = self._results.index.get(hand_id)
+        if row is None:
+            return None
+        hand = self._results.hand_info(row)
+        return HandResult(
+            **vars(hand),
+            payoffs=self._payoffs[self._payoff_offsets[row]:self._payoff_offsets[row + 1]].tolist()
+        ) 
\ No newline at end of file
@@ -0,0 +1,289 @@
+"""Append-only segment log implementation of HandRepository."""
+
+import logging
+import mmap
+import os
+import re
+import struct
+import zlib
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from app.models import HandInfo, HandResult, PlayerInfo
+from app.repositories.hand_repository import HandRepository
+
+# logs for debug
+logger = logging.getLogger(__name__)
+
+# first bytes of every segment file
+SEGMENT_MAGIC = b"PKHLOG01"
+SEGMENT_NAME = "segment-{:06d}.log"
+SEGMENT_PATTERN = re.compile(r"^segment-(\d{6})\.log$")
+MAX_SEGMENT_BYTES = 64 * 1024 * 1024
+
+# record header: payload length, crc32 of type and payload, record type
+RECORD_HEADER = struct.Struct("<IIB")
+HAND_RECORD = 1
+RESULT_RECORD = 2
+
+_LENGTH = struct.Struct("<I")
+_INT = struct.Struct("<q")
+_HAND_HEAD = struct.Struct("<qqH")
+_PLAYER_HEAD = struct.Struct("<qq")
+
+TEXT_FIELDS = ('actions', 'community_cards', 'stack_info', 'positions', 'hole_cards')
+
+# location of a record: (segment number, offset in segment)
+Location = Tuple[int, int]
+
+def _pack_str(parts: List[bytes], value: str) -> None:
+    data = value.encode()
+    parts.append(_LENGTH.pack(len(data)))
+    parts.append(data)
+
+def _unpack_str(view: memoryview, offset: int) -> Tuple[str, int]:
+    (length,) = _LENGTH.unpack_from(view, offset)
+    offset += _LENGTH.size
+    return str(view[offset:offset + length], "utf-8"), offset + length
+
+def encode_hand(hand: HandInfo) -> bytes:
+    """Encode the HandInfo fields of a hand or result."""
+    parts: List[bytes] = []
+    _pack_str(parts, hand.hand_id)
+    parts.append(_HAND_HEAD.pack(hand.stack_size, hand.pot, len(hand.players)))
+    for player in hand.players:
+        parts.append(_PLAYER_HEAD.pack(player.id, player.stack))
+        _pack_str(parts, player.cards)
+        _pack_str(parts, player.position)
+    for name in TEXT_FIELDS:
+        _pack_str(parts, getattr(hand, name))
+    return b"".join(parts)
+
+def decode_hand(view: memoryview, offset: int = 0) -> Tuple[Dict, int]:
+    """Decode HandInfo fields, returning them with the end offset."""
+    hand_id, offset = _unpack_str(view, offset)
+    stack_size, pot, player_count = _HAND_HEAD.unpack_from(view, offset)
+    offset += _HAND_HEAD.size
+
+    players = []
+    for _ in range(player_count):
+        player_id, stack = _PLAYER_HEAD.unpack_from(view, offset)
+        cards, offset = _unpack_str(view, offset + _PLAYER_HEAD.size)
+        position, offset = _unpack_str(view, offset)
+        players.append(PlayerInfo(id=player_id, cards=cards, position=position, stack=stack))
+
+    fields = {"hand_id": hand_id, "stack_size": stack_size, "pot": pot, "players": players}
+    for name in TEXT_FIELDS:
+        fields[name], offset = _unpack_str(view, offset)
+    return fields, offset
+
+def encode_result(hand_id: str, result: HandResult) -> bytes:
+    """Encode a result stored under the given hand ID."""
+    fields = {name: getattr(result, name) for name in HandInfo.__dataclass_fields__}
+    fields["hand_id"] = hand_id
+    payoffs = result.payoffs
+    return (
+        encode_hand(HandInfo(**fields))
+        + _LENGTH.pack(len(payoffs))
+        + struct.pack(f"<{len(payoffs)}q", *payoffs)
+    )
+
+def decode_result(view: memoryview) -> HandResult:
+    fields, offset = decode_hand(view)
+    (count,) = _LENGTH.unpack_from(view, offset)
+    payoffs = list(struct.unpack_from(f"<{count}q", view, offset + _LENGTH.size))
+    return HandResult(**fields, payoffs=payoffs)
+
+class LogHandRepository(HandRepository):
+    """HandRepository persisted to append-only segment files.
+
+    Every save appends a checksummed record to the active segment, which is
+    rotated once it reaches max_segment_bytes. An in-memory index maps hand
+    IDs to record locations, and records are decoded straight from mmap'd
+    segments. On open the segments are scanned to rebuild the index, and a
+    torn or corrupt tail of the last segment is truncated.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_segment_bytes: int = MAX_SEGMENT_BYTES,
+        fsync: bool = False
+    ):
+        self._directory = directory
+        self._max_segment_bytes = max_segment_bytes
+        self._fsync = fsync
+        self._hands: Dict[str, Location] = {}
+        self._results: Dict[str, Location] = {}
+        self._maps: Dict[int, mmap.mmap] = {}
+        os.makedirs(directory, exist_ok=True)
+
+        segments = sorted(
+            int(match.group(1))
+            for match in map(SEGMENT_PATTERN.match, os.listdir(directory))
+            if match
+        )
+        for segment in segments:
+            self._recover(segment, is_last=segment == segments[-1])
+
+        self._segment = segments[-1] if segments else 0
+        self._file = None
+        self._size = 0
+        if segments:
+            self._file = open(self._path(self._segment), "ab")
+            self._size = self._file.tell()
+        else:
+            self._rotate()
+        logger.info(
+            f"Opened hand log in {directory}: {len(segments)} segments, "
+            f"{len(self._hands)} hands, {len(self._results)} results"
+        )
+
+    def __len__(self) -> int:
+        return len(self._hands)
+
+    def __enter__(self) -> "LogHandRepository":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def save(self, hand: HandInfo) -> HandInfo:
+        self._hands[hand.hand_id] = self._append(HAND_RECORD, encode_hand(hand))
+        return hand
+
+    def find_one_by_id(self, hand_id: str) -> Optional[HandInfo]:
+        location = self._hands.get(hand_id)
+        return self._read(location, self._decode_hand) if location else None
+
+    def find_all(self) -> Iterator[HandInfo]:
+        for location in list(self._hands.values()):
+            yield self._read(location, self._decode_hand)
+
+    def save_result(self, hand_id: str, result: HandResult) -> HandResult:
+        self._results[hand_id] = self._append(RESULT_RECORD, encode_result(hand_id, result))
+        return result
+
+    def find_result_by_id(self, hand_id: str) -> Optional[HandResult]:
+        location = self._results.get(hand_id)
+        return self._read(location, decode_result) if location else None
+
+    def flush(self) -> None:
+        """Write buffered records to the active segment."""
+        self._file.flush()
+        if self._fsync:
+            os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        """Flush the active segment and release all maps."""
+        if self._file:
+            self.flush()
+            self._file.close()
+            self._file = None
+        for segment_map in self._maps.values():
+            segment_map.close()
+        self._maps.clear()
+
+    @staticmethod
+    def _decode_hand(view: memoryview) -> HandInfo:
+        fields, _ = decode_hand(view)
+        return HandInfo(**fields)
+
+    def _path(self, segment: int) -> str:
+        return os.path.join(self._directory, SEGMENT_NAME.format(segment))
+
+    def _rotate(self) -> None:
+        """Close the active segment and start a new one."""
+        if self._file:
+            self.flush()
+            self._file.close()
+        self._segment += 1
+        self._file = open(self._path(self._segment), "ab")
+        self._file.write(SEGMENT_MAGIC)
+        self._size = len(SEGMENT_MAGIC)
+        logger.info(f"Started hand log segment {self._segment}")
+
+    def _append(self, record_type: int, payload: bytes) -> Location:
+        """Append a record and return where it was written."""
+        record_size = RECORD_HEADER.size + len(payload)
+        if self._size + record_size > self._max_segment_bytes and self._size > len(SEGMENT_MAGIC):
+            self._rotate()
+
+        crc = zlib.crc32(payload, zlib.crc32(bytes([record_type])))
+        location = (self._segment, self._size)
+        self._file.write(RECORD_HEADER.pack(len(payload), crc, record_type))
+        self._file.write(payload)
+        self._size += record_size
+        if self._fsync:
+            self.flush()
+        return location
+
+    def _map(self, segment: int, end: int) -> mmap.mmap:
+        """Get a map of the segment that covers bytes up to `end`."""
+        segment_map = self._maps.get(segment)
+        if segment_map is None or len(segment_map) < end:
+            if segment == self._segment:
+                self._file.flush()
+            if segment_map is not None:
+                segment_map.close()
+            with open(self._path(segment), "rb") as f:
+                segment_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[segment] = segment_map
+        return segment_map
+
+    def _read(self, location: Location, decode):
+        """Decode the record at a location without copying it out of the map."""
+        segment, offset = location
+        segment_map = self._map(segment, offset + RECORD_HEADER.size)
+        length, _, _ = RECORD_HEADER.unpack_from(segment_map, offset)
+        start = offset + RECORD_HEADER.size
+        segment_map = self._map(segment, start + length)
+        with memoryview(segment_map) as view:
+            with view[start:start + length] as payload:
+                return decode(payload)
+
+    def _recover(self, segment: int, is_last: bool) -> None:
+        """Index the records of a segment, truncating a bad tail of the last one."""
+        path = self._path(segment)
+        size = os.path.getsize(path)
+        good_end = 0
+        if size >= len(SEGMENT_MAGIC):
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                if m[:len(SEGMENT_MAGIC)] == SEGMENT_MAGIC:
+                    good_end = self._scan(segment, m)
+
+        if good_end == size:
+            return
+        if not is_last:
+            logger.error(f"Hand log segment {segment} is corrupt after offset {good_end}")
+            return
+
+        logger.warning(f"Truncating hand log segment {segment} from {size} to {good_end} bytes")
+        with open(path, "r+b") as f:
+            if good_end == 0:
+                f.write(SEGMENT_MAGIC)
+                good_end = len(SEGMENT_MAGIC)
+            f.truncate(good_end)
+
+    def _scan(self, segment: int, m: mmap.mmap) -> int:
+        """Index valid records in order and return where they end."""
+        offset = len(SEGMENT_MAGIC)
+        size = len(m)
+        with memoryview(m) as view:
+            while offset + RECORD_HEADER.size <= size:
+                length, crc, record_type = RECORD_HEADER.unpack_from(m, offset)
+                start = offset + RECORD_HEADER.size
+                end = start + length
+                if end > size:
+                    break
+                with view[start:end] as payload:
+                    if zlib.crc32(payload, zlib.crc32(bytes([record_type]))) != crc:
+                        break
+                    hand_id, _ = _unpack_str(payload, 0)
+                if record_type == HAND_RECORD:
+                    self._hands[hand_id] = (segment, offset)
+                elif record_type == RESULT_RECORD:
+                    self._results[hand_id] = (segment, offset)
+                else:
+                    break
+                offset = end
+        return offset
@@ -0,0 +1,42 @@
+"""Module for choosing the HandRepository implementation from configuration."""
+
+import logging
+import os
+from typing import Optional
+
+from app.repositories.hand_repository import (
+    ColumnarHandRepository,
+    HandRepository,
+    InMemoryHandRepository
+)
+from app.repositories.log_hand_repository import LogHandRepository
+from app.repositories.sqlite_hand_repository import SQLiteHandRepository
+
+# logs for debug
+logger = logging.getLogger(__name__)
+
+# environment variables read by create_hand_repository
+REPOSITORY_ENV = "HAND_REPOSITORY"
+REPOSITORY_PATH_ENV = "HAND_REPOSITORY_PATH"
+
+REPOSITORY_KINDS = ('memory', 'columnar', 'log', 'sqlite')
+
+def create_hand_repository(kind: Optional[str] = None, path: Optional[str] = None) -> HandRepository:
+    """Create the repository named by `kind` or the HAND_REPOSITORY variable.
+
+    The log and sqlite repositories are stored at `path` or
+    HAND_REPOSITORY_PATH, a directory and a database file respectively.
+    """
+    kind = kind or os.environ.get(REPOSITORY_ENV, 'memory')
+    path = path or os.environ.get(REPOSITORY_PATH_ENV)
+    logger.info(f"Using {kind} hand repository")
+
+    if kind == 'memory':
+        return InMemoryHandRepository()
+    if kind == 'columnar':
+        return ColumnarHandRepository()
+    if kind == 'log':
+        return LogHandRepository(path or "hand_log")
+    if kind == 'sqlite':
+        return SQLiteHandRepository(path or "hands.db")
+    raise ValueError(f"Unknown hand repository: {kind}, expected one of {REPOSITORY_KINDS}")
@@ -0,0 +1,254 @@
+"""SQLite implementation of HandRepository."""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+
+from app.game.hand_formatter import format_winnings
+from app.models import HandInfo, HandResult, PlayerInfo
+from app.repositories.hand_repository import HandRepository
+
+# logs for debug
+logger = logging.getLogger(__name__)
+
+# writes are committed together once this many are pending
+BATCH_SIZE = 500
+# or once the oldest pending write is this many seconds old
+COMMIT_INTERVAL = 0.05
+# ids per query when reading many hands, below SQLite's variable limit
+READ_CHUNK_SIZE = 500
+
+# hands and results share the production hands layout, plus the fields
+# needed to rebuild HandInfo objects
+_COLUMNS = """
+    id INTEGER PRIMARY KEY,
+    hand_id VARCHAR(255),
+    stack INTEGER,
+    positions VARCHAR(60),
+    hand1 VARCHAR(5),
+    hand2 VARCHAR(5),
+    hand3 VARCHAR(5),
+    hand4 VARCHAR(5),
+    hand5 VARCHAR(5),
+    hand6 VARCHAR(5),
+    actions VARCHAR(400),
+    winnings VARCHAR(100),
+    community_cards VARCHAR(20),
+    pot INTEGER,
+    stack_info TEXT,
+    hole_cards TEXT,
+    players TEXT,
+    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+"""
+
+SCHEMA = [
+    f"CREATE TABLE IF NOT EXISTS hands ({_COLUMNS})",
+    f"CREATE TABLE IF NOT EXISTS hand_results ({_COLUMNS}, payoffs TEXT)",
+]
+
+# the indexes of the production hands table: its (id, created_at) primary
+# key, which partitioning requires, and the hand_id lookup index
+INDEXES = [
+    "CREATE UNIQUE INDEX IF NOT EXISTS {table}_pkey ON {table} (id, created_at)",
+    "CREATE INDEX IF NOT EXISTS {table}_hand_id_idx ON {table} (hand_id)",
+]
+
+_FIELDS = """
+    hand_id, stack, positions, hand1, hand2, hand3, hand4, hand5, hand6,
+    actions, winnings, community_cards, pot, stack_info, hole_cards, players
+"""
+
+INSERT_HAND = f"INSERT INTO hands ({_FIELDS}) VALUES ({', '.join('?' * 16)})"
+INSERT_RESULT = f"INSERT INTO hand_results ({_FIELDS}, payoffs) VALUES ({', '.join('?' * 17)})"
+# a saved ID can be saved again, the latest row wins
+SELECT_HAND = f"SELECT {_FIELDS} FROM hands WHERE hand_id = ? ORDER BY id DESC LIMIT 1"
+SELECT_ALL_HANDS = f"""
+    SELECT {_FIELDS} FROM hands
+    WHERE id IN (SELECT MAX(id) FROM hands GROUP BY hand_id)
+    ORDER BY id
+"""
+SELECT_HANDS_IN = f"SELECT {_FIELDS} FROM hands WHERE hand_id IN ({{}}) ORDER BY id"
+SELECT_RESULT = f"SELECT {_FIELDS}, payoffs FROM hand_results WHERE hand_id = ? ORDER BY id DESC LIMIT 1"
+
+def _hand_row(hand, winnings: str = "") -> tuple:
+    hands = [""] * 6
+    for i, player in enumerate(hand.players[:6]):
+        hands[i] = player.cards
+    players = json.dumps([[p.id, p.cards, p.position, p.stack] for p in hand.players])
+    return (
+        hand.hand_id, hand.stack_size, hand.positions, *hands,
+        hand.actions, winnings, hand.community_cards, hand.pot,
+        hand.stack_info, hand.hole_cards, players
+    )
+
+def _hand_fields(row: sqlite3.Row) -> dict:
+    return {
+        "hand_id": row["hand_id"],
+        "stack_size": row["stack"],
+        "players": [
+            PlayerInfo(id=p[0], cards=p[1], position=p[2], stack=p[3])
+            for p in json.loads(row["players"])
+        ],
+        "actions": row["actions"],
+        "community_cards": row["community_cards"],
+        "stack_info": row["stack_info"],
+        "positions": row["positions"],
+        "hole_cards": row["hole_cards"],
+        "pot": row["pot"]
+    }
+
+class SQLiteHandRepository(HandRepository):
+    """HandRepository stored in a SQLite database in WAL mode.
+
+    Writes are grouped into one transaction and committed when batch_size
+    writes are pending or, by a timer, once the oldest pending write is
+    commit_interval seconds old, so the last write of a burst is not left
+    uncommitted. Reads on the same repository see pending writes; call
+    flush() or close() to make them durable at once.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        batch_size: int = BATCH_SIZE,
+        commit_interval: float = COMMIT_INTERVAL
+    ):
+        self._batch_size = batch_size
+        self._commit_interval = commit_interval
+        self._pending = 0
+        self._first_pending = 0.0
+        self._timer: Optional[threading.Timer] = None
+        # the commit timer uses the connection from its own thread
+        self._lock = threading.RLock()
+        # statements are compiled once and reused from the statement cache
+        self._connection = sqlite3.connect(
+            path, isolation_level=None, cached_statements=64, check_same_thread=False
+        )
+        self._connection.row_factory = sqlite3.Row
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        for statement in SCHEMA:
+            self._connection.execute(statement)
+        for table in ("hands", "hand_results"):
+            # databases created before rows kept their insert time
+            columns = [row["name"] for row in self._connection.execute(f"PRAGMA table_info({table})")]
+            if "created_at" not in columns:
+                self._connection.execute(f"ALTER TABLE {table} ADD COLUMN created_at TEXT")
+            for statement in INDEXES:
+                self._connection.execute(statement.format(table=table))
+        logger.info(f"Opened SQLite hand repository at {path}")
+
+    def __enter__(self) -> "SQLiteHandRepository":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def save(self, hand: HandInfo) -> HandInfo:
+        self._write(INSERT_HAND, _hand_row(hand))
+        return hand
+
+    def find_one_by_id(self, hand_id: str) -> Optional[HandInfo]:
+        with self._lock:
+            row = self._connection.execute(SELECT_HAND, (hand_id,)).fetchone()
+        return HandInfo(**_hand_fields(row)) if row else None
+
+    def find_all(self) -> Iterator[HandInfo]:
+        with self._lock:
+            cursor = self._connection.execute(SELECT_ALL_HANDS)
+        while True:
+            with self._lock:
+                rows = cursor.fetchmany(READ_CHUNK_SIZE)
+            if not rows:
+                return
+            for row in rows:
+                yield HandInfo(**_hand_fields(row))
+
+    def save_many(self, hands: List[HandInfo]) -> List[HandInfo]:
+        self._write_many(INSERT_HAND, [_hand_row(hand) for hand in hands])
+        return hands
+
+    def find_many_by_ids(self, hand_ids: List[str]) -> Dict[str, HandInfo]:
+        found = {}
+        for start in range(0, len(hand_ids), READ_CHUNK_SIZE):
+            chunk = hand_ids[start:start + READ_CHUNK_SIZE]
+            query = SELECT_HANDS_IN.format(", ".join("?" * len(chunk)))
+            with self._lock:
+                rows = self._connection.execute(query, chunk).fetchall()
+            # rows come oldest first, so the latest save of an ID wins
+            for row in rows:
+                found[row["hand_id"]] = HandInfo(**_hand_fields(row))
+        return found
+
+    def save_result(self, hand_id: str, result: HandResult) -> HandResult:
+        self._write(INSERT_RESULT, self._result_row(hand_id, result))
+        return result
+
+    def save_results(self, results: Dict[str, HandResult]) -> List[HandResult]:
+        self._write_many(INSERT_RESULT, [
+            self._result_row(hand_id, result) for hand_id, result in results.items()
+        ])
+        return list(results.values())
+
+    def find_result_by_id(self, hand_id: str) -> Optional[HandResult]:
+        with self._lock:
+            row = self._connection.execute(SELECT_RESULT, (hand_id,)).fetchone()
+        if not row:
+            return None
+        return HandResult(**_hand_fields(row), payoffs=json.loads(row["payoffs"]))
+
+    def flush(self) -> None:
+        """Commit pending writes."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._connection.in_transaction:
+                self._connection.execute("COMMIT")
+                logger.debug(f"Committed {self._pending} writes")
+                self._pending = 0
+
+    def close(self) -> None:
+        """Commit pending writes and close the database."""
+        with self._lock:
+            self.flush()
+            self._connection.close()
+
+    def _flush_due(self) -> None:
+        """Commit from the timer thread unless the batch was committed meanwhile."""
+        with self._lock:
+            if self._timer is threading.current_thread():
+                self._timer = None
+                try:
+                    self.flush()
+                except sqlite3.Error as e:
+                    logger.error(f"Timed commit failed: {e}")
+
+    @staticmethod
+    def _result_row(hand_id: str, result: HandResult) -> tuple:
+        row = _hand_row(result, format_winnings(result.payoffs))
+        return (hand_id, *row[1:], json.dumps(result.payoffs))
+
+    def _write(self, statement: str, params: tuple) -> None:
+        """Run a write inside the open batch."""
+        self._write_many(statement, [params])
+
+    def _write_many(self, statement: str, rows: List[tuple]) -> None:
+        """Run writes inside the open batch, committing when it is full or old."""
+        if not rows:
+            return
+        with self._lock:
+            if not self._connection.in_transaction:
+                self._connection.execute("BEGIN")
+                self._first_pending = time.monotonic()
+                self._timer = threading.Timer(self._commit_interval, self._flush_due)
+                self._timer.daemon = True
+                self._timer.start()
+            self._connection.executemany(statement, rows)
+            self._pending += len(rows)
+            if (self._pending >= self._batch_size
+                    or time.monotonic() - self._first_pending >= self._commit_interval):
+                self.flush()
@@ -0,0 +1,158 @@
+"""Module for request and response handling shared by API routes."""
+
+import gzip
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+from fastapi import Request, Response, status
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from pydantic import TypeAdapter
+
+try:
+    import zstandard
+except ImportError:  # optional, responses fall back to gzip
+    zstandard = None
+
+from app.models import HandResult
+from app.game.hand_codec import CONTENT_TYPE, HandCodecError, decode_hand_info, encode_hand_result
+
+# logs for debug
+logger = logging.getLogger(__name__)
+
+_HAND_RESULT = TypeAdapter(HandResult)
+
+# a hand id always names its first stored row, which never changes
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# lists change with every new hand and are revalidated on each use
+REVALIDATE_CACHE_CONTROL = "no-cache"
+# bump when the JSON of a hand changes shape
+REPRESENTATION_VERSION = 1
+
+# smaller bodies are sent as they are, compressing them saves too little
+MIN_COMPRESS_SIZE = 1024
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+def _accepts_binary(request: Request) -> bool:
+    return CONTENT_TYPE in request.headers.get("accept", "")
+
+class HandCodecRoute(APIRoute):
+    """Route that also speaks the binary hand encoding.
+
+    Bodies sent as application/octet-stream are decoded and handed to the
+    endpoint as JSON, so validation is unchanged; results are encoded back
+    when the client accepts application/octet-stream.
+    """
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def codec_handler(request: Request) -> Response:
+            if request.headers.get("content-type", "").startswith(CONTENT_TYPE):
+                try:
+                    hand_info = decode_hand_info(await request.body())
+                except HandCodecError as e:
+                    return JSONResponse({"detail": str(e)}, status_code=status.HTTP_400_BAD_REQUEST)
+                request = _as_json(request, TypeAdapter(type(hand_info)).dump_json(hand_info))
+
+            response = await handler(request)
+            if _accepts_binary(request) and response.status_code < 300 and response.media_type == "application/json":
+                result = _HAND_RESULT.validate_json(response.body)
+                return Response(encode_hand_result(result), status_code=response.status_code, media_type=CONTENT_TYPE)
+            return response
+
+        return codec_handler
+
+def _as_json(request: Request, body: bytes) -> Request:
+    """Copy of a request with a JSON body in place of the original one."""
+    headers = [
+        (name, value) for name, value in request.scope["headers"]
+        if name not in (b"content-type", b"content-length")
+    ]
+    headers += [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    json_request = Request({**request.scope, "headers": headers}, request.receive)
+    json_request._body = body
+    return json_request
+
+def _tag(*parts) -> str:
+    key = ":".join(str(part) for part in (REPRESENTATION_VERSION, *parts))
+    return '"' + hashlib.sha256(key.encode()).hexdigest()[:32] + '"'
+
+def hand_etag(hand_id: str) -> str:
+    """Strong ETag of a stored hand; the hand of an id never changes, so the id is enough."""
+    return _tag("hand", hand_id)
+
+def list_etag(latest_id: Optional[int], *params) -> str:
+    """Strong ETag of a hand list, from the newest hand id and the query."""
+    return _tag("list", latest_id, *params)
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches an ETag, by weak comparison."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+def not_modified(etag: str, cache_control: str, headers: Optional[Dict[str, str]] = None) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": cache_control, **(headers or {})}
+    )
+
+def supported_encodings() -> Tuple[str, ...]:
+    """Content codings we can produce, most preferred first."""
+    return ("zstd", "gzip") if zstandard else ("gzip",)
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> str:
+    """Best supported coding of an Accept-Encoding header, identity if none."""
+    weights: Dict[str, float] = {}
+    for item in (accept_encoding or "").split(","):
+        name, _, params = item.strip().partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name.strip().lower()] = weight
+    best, best_weight = "identity", 0.0
+    for name in supported_encodings():
+        weight = weights.get(name, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = name, weight
+    return best
+
+def compress_body(body: bytes, encoding: str) -> Tuple[bytes, str]:
+    """Body compressed with a negotiated coding and the coding used."""
+    if len(body) < MIN_COMPRESS_SIZE or encoding == "identity":
+        return body, "identity"
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(body), encoding
+    # a fixed mtime keeps equal bodies byte-identical
+    return gzip.compress(body, GZIP_LEVEL, mtime=0), encoding
+
+class ResponseCache:
+    """Most recently rendered response bodies, by ETag."""
+
+    def __init__(self, max_entries: int = 32):
+        self.max_entries = max_entries
+        self._bodies: "OrderedDict[str, Tuple[bytes, Dict[str, str]]]" = OrderedDict()
+
+    def get(self, etag: str) -> Optional[Tuple[bytes, Dict[str, str]]]:
+        entry = self._bodies.get(etag)
+        if entry:
+            self._bodies.move_to_end(etag)
+        return entry
+
+    def put(self, etag: str, body: bytes, headers: Optional[Dict[str, str]] = None) -> None:
+        self._bodies[etag] = (body, headers or {})
+        self._bodies.move_to_end(etag)
+        while len(self._bodies) > self.max_entries:
+            self._bodies.popitem(last=False)
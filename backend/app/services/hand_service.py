@@ -1,20 +1,29 @@
-from typing import List
+from typing import Dict, Iterable, List, Optional
 from ..repositories.hand_repository import HandRepository
-from app.models import HandInfo, HandResult
+from ..repositories.repository_factory import create_hand_repository
+from app.models import BulkItemError, BulkResult, HandInfo, HandResult
 from app.game.hand_evaluator import evaluate_hand
+from app.game.evaluation_cache import EvaluationCache
 from app.game.game_validator import validate_hand_info, GameValidationError
+from app.game.batch_validator import validate_hands
 
 class HandService:
     """Service for managing poker hands."""
     
-    def __init__(self, hand_repository: HandRepository):
+    def __init__(self, hand_repository: HandRepository, evaluation_cache: Optional[EvaluationCache] = None):
         self._repository = hand_repository
+        self._cache = evaluation_cache
+    
+    @classmethod
+    def from_config(cls) -> "HandService":
+        """Create a service on the repository chosen by HAND_REPOSITORY."""
+        return cls(create_hand_repository())
     
     def create_hand(self, hand_info: HandInfo) -> HandInfo:
         """Create a new hand and save it."""
         # checking hand info
         try:
-            validate_hand_info(hand_info)
+            self._validate(hand_info)
         except GameValidationError as e:
             raise ValueError(str(e))
             
@@ -28,7 +37,7 @@ class HandService:
             raise ValueError(f"Hand not found: {hand_id}")
         return hand
     
-    def get_all_hands(self) -> List[HandInfo]:
+    def get_all_hands(self) -> Iterable[HandInfo]:
         """Get all hands."""
         return self._repository.find_all()
     
@@ -39,12 +48,96 @@ class HandService:
         
         # validating before evalu
         try:
-            validate_hand_info(hand)
+            self._validate(hand)
         except GameValidationError as e:
             raise ValueError(f"Invalid hand state: {str(e)}")
         
         # evaluation
-        result = evaluate_hand(hand)
+        result = self._evaluate(hand)
         
         # saving and returning
-        return self._repository.save_result(hand_id, result) 
\ No newline at end of file
+        return self._repository.save_result(hand_id, result) 
+    
+    def create_hands(self, hands: List[HandInfo]) -> BulkResult:
+        """Validate hands and save the valid ones in one repository call."""
+        result = BulkResult()
+        valid = []
+        for hand_info, error in zip(hands, self._validate_many(hands)):
+            if error:
+                result.errors.append(BulkItemError(hand_info.hand_id, error))
+            else:
+                valid.append(hand_info)
+        
+        # saving hands, one at a time if the batch fails so good hands still succeed
+        if valid:
+            try:
+                result.succeeded = self._repository.save_many(valid)
+            except Exception:
+                for hand_info in valid:
+                    try:
+                        result.succeeded.append(self._repository.save(hand_info))
+                    except Exception as e:
+                        result.errors.append(BulkItemError(hand_info.hand_id, f"Failed to save hand: {e}"))
+        return result
+    
+    def get_hands(self, hand_ids: List[str]) -> BulkResult:
+        """Get hands by ID in one repository call."""
+        found = self._repository.find_many_by_ids(hand_ids)
+        result = BulkResult()
+        for hand_id in hand_ids:
+            if hand_id in found:
+                result.succeeded.append(found[hand_id])
+            else:
+                result.errors.append(BulkItemError(hand_id, f"Hand not found: {hand_id}"))
+        return result
+    
+    def evaluate_and_save_results(self, hand_ids: List[str]) -> BulkResult:
+        """Evaluate hands and save their results with one read and one write."""
+        fetched = self.get_hands(hand_ids)
+        result = BulkResult(errors=fetched.errors)
+        evaluated: Dict[str, HandResult] = {}
+        for hand in fetched.succeeded:
+            # validating before evalu
+            try:
+                self._validate(hand)
+                evaluated[hand.hand_id] = self._evaluate(hand)
+            except GameValidationError as e:
+                result.errors.append(BulkItemError(hand.hand_id, f"Invalid hand state: {str(e)}"))
+            except Exception as e:
+                result.errors.append(BulkItemError(hand.hand_id, str(e)))
+        
+        # saving and returning, one at a time if the batch fails
+        if evaluated:
+            try:
+                result.succeeded = self._repository.save_results(evaluated)
+            except Exception:
+                for hand_id, hand_result in evaluated.items():
+                    try:
+                        result.succeeded.append(self._repository.save_result(hand_id, hand_result))
+                    except Exception as e:
+                        result.errors.append(BulkItemError(hand_id, f"Failed to save result: {e}"))
+        return result
+    
+    def _validate(self, hand_info: HandInfo) -> None:
+        if self._cache:
+            self._cache.validate(hand_info)
+        else:
+            validate_hand_info(hand_info)
+    
+    def _validate_many(self, hands: List[HandInfo]) -> List[Optional[str]]:
+        """Error message per hand, None for valid hands."""
+        if not self._cache:
+            return validate_hands(hands)
+        errors = []
+        for hand_info in hands:
+            try:
+                self._cache.validate(hand_info)
+                errors.append(None)
+            except GameValidationError as e:
+                errors.append(str(e))
+        return errors
+    
+    def _evaluate(self, hand_info: HandInfo) -> HandResult:
+        if self._cache:
+            return self._cache.evaluate(hand_info)
+        return evaluate_hand(hand_info)
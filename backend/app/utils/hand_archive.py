@@ -0,0 +1,293 @@
+"""Module for archiving old hands partitions to compressed columnar segments.
+
+A segment holds one detached partition. Rows are written in groups, and
+each column of a group is stored as one zlib-compressed block: integers
+as delta-encoded int64 arrays, text as lengths followed by UTF-8 bytes.
+A footer lists the blocks and holds a Bloom filter of hand ids, so a
+lookup only decompresses segments that may have the hand. Run the
+retention job from cron, for example:
+
+    python -m app.utils.hand_archive --retention-months 12
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import struct
+import zlib
+from collections import OrderedDict
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.database import (
+    HAND_COLUMNS, detach_partition, ensure_partitions, get_db_connection,
+    init_db, list_partitions, month_start
+)
+
+# logs for debug
+logger = logging.getLogger(__name__)
+
+MAGIC = b"PKSEG001"
+SEGMENT_SUFFIX = ".seg"
+ROW_GROUP_SIZE = 100000
+COMPRESSION_LEVEL = 6
+
+# columns of an archived row, in the order they are read from the partition
+INT_COLUMNS = ("id", "stack", "created_at")
+SEGMENT_COLUMNS = ("id",) + HAND_COLUMNS + ("created_at",)
+# created_at is stored as microseconds since the epoch
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+# Bloom filter with about 1% false positives
+BLOOM_BITS_PER_ROW = 10
+BLOOM_HASHES = 7
+
+RETENTION_MONTHS = 12
+# decoded hand id columns kept for repeated lookups
+CACHED_GROUPS = 2
+
+def archive_directory() -> str:
+    """Directory of archived segments, HANDS_ARCHIVE_DIR or ./hand_archive."""
+    return os.environ.get("HANDS_ARCHIVE_DIR", "hand_archive")
+
+def _bloom_positions(hand_id: str, bits: int) -> List[int]:
+    digest = hashlib.blake2b(hand_id.encode(), digest_size=16).digest()
+    first, second = struct.unpack("<QQ", digest)
+    # double hashing gives the k positions from two hashes
+    return [(first + i * second) % bits for i in range(BLOOM_HASHES)]
+
+def _encode_column(name: str, values: Sequence) -> bytes:
+    if name in INT_COLUMNS:
+        array = np.array(values, dtype=np.int64)
+        return zlib.compress(np.diff(array, prepend=0).tobytes(), COMPRESSION_LEVEL)
+    encoded = [None if v is None else v.encode() for v in values]
+    lengths = np.array([-1 if v is None else len(v) for v in encoded], dtype=np.int32)
+    return zlib.compress(lengths.tobytes() + b"".join(v for v in encoded if v), COMPRESSION_LEVEL)
+
+def _decode_column(name: str, data: bytes, rows: int) -> list:
+    raw = zlib.decompress(data)
+    if name in INT_COLUMNS:
+        return np.cumsum(np.frombuffer(raw, dtype=np.int64)).tolist()
+    lengths = np.frombuffer(raw, dtype=np.int32, count=rows)
+    values, offset = [], 4 * rows
+    for length in lengths.tolist():
+        if length < 0:
+            values.append(None)
+            continue
+        values.append(raw[offset:offset + length].decode())
+        offset += length
+    return values
+
+def write_segment(path: str, rows: Iterable[Sequence], row_count: int, partition: str = "") -> int:
+    """Write rows in SEGMENT_COLUMNS order to a segment file.
+
+    row_count sizes the Bloom filter; rows are consumed in groups so only
+    one group is held in memory. The file is moved into place once it is
+    complete. Returns the number of rows written.
+    """
+    bits = max(64, row_count * BLOOM_BITS_PER_ROW)
+    bloom = np.zeros((bits + 7) // 8, dtype=np.uint8)
+    groups, written = [], 0
+    temp_path = f"{path}.{os.getpid()}.tmp"
+
+    with open(temp_path, "wb") as f:
+        f.write(MAGIC)
+        group: List[Sequence] = []
+
+        def flush() -> None:
+            columns = {}
+            for i, name in enumerate(SEGMENT_COLUMNS):
+                values = [row[i] for row in group]
+                if name == "created_at":
+                    values = [(v - EPOCH) // MICROSECOND if isinstance(v, datetime) else v for v in values]
+                block = _encode_column(name, values)
+                columns[name] = [f.tell(), len(block)]
+                f.write(block)
+            groups.append({"rows": len(group), "columns": columns})
+
+        for row in rows:
+            group.append(row)
+            for position in _bloom_positions(row[1] or "", bits):
+                bloom[position >> 3] |= 1 << (position & 7)
+            if len(group) >= ROW_GROUP_SIZE:
+                flush()
+                written += len(group)
+                group = []
+        if group:
+            flush()
+            written += len(group)
+
+        bloom_offset = f.tell()
+        f.write(bloom.tobytes())
+        footer = json.dumps({
+            "partition": partition,
+            "rows": written,
+            "groups": groups,
+            "bloom": [bloom_offset, bits]
+        }).encode()
+        f.write(footer + struct.pack("<I", len(footer)) + MAGIC)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+    return written
+
+class Segment:
+    """Read access to one segment file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"Not a hand segment: {path}")
+            f.seek(-(4 + len(MAGIC)), os.SEEK_END)
+            footer_size, magic = struct.unpack("<I", f.read(4))[0], f.read(len(MAGIC))
+            if magic != MAGIC:
+                raise ValueError(f"Incomplete hand segment: {path}")
+            f.seek(-(4 + len(MAGIC) + footer_size), os.SEEK_END)
+            footer = json.loads(f.read(footer_size))
+            bloom_offset, self.bloom_bits = footer["bloom"]
+            f.seek(bloom_offset)
+            self.bloom = np.frombuffer(f.read((self.bloom_bits + 7) // 8), dtype=np.uint8)
+        self.partition = footer["partition"]
+        self.rows = footer["rows"]
+        self.groups = footer["groups"]
+
+    def may_contain(self, hand_id: str) -> bool:
+        return all(
+            self.bloom[p >> 3] & (1 << (p & 7))
+            for p in _bloom_positions(hand_id, self.bloom_bits)
+        )
+
+    def column(self, group: int, name: str) -> list:
+        offset, size = self.groups[group]["columns"][name]
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            return _decode_column(name, f.read(size), self.groups[group]["rows"])
+
+    def row(self, group: int, index: int) -> Dict:
+        row = {name: self.column(group, name)[index] for name in SEGMENT_COLUMNS}
+        row["created_at"] = EPOCH + row["created_at"] * MICROSECOND
+        return row
+
+class HandArchive:
+    """Looks up hands in the segments of an archive directory."""
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or archive_directory()
+        self._segments: Dict[str, Tuple[float, Segment]] = {}
+        self._hand_ids: "OrderedDict[Tuple[str, int], Dict[str, int]]" = OrderedDict()
+
+    def segments(self) -> List[Segment]:
+        """Segments of the directory, newest partition first."""
+        try:
+            names = sorted(
+                (n for n in os.listdir(self.directory) if n.endswith(SEGMENT_SUFFIX)),
+                reverse=True
+            )
+        except FileNotFoundError:
+            return []
+        segments = []
+        for name in names:
+            path = os.path.join(self.directory, name)
+            mtime = os.path.getmtime(path)
+            cached = self._segments.get(path)
+            if not cached or cached[0] != mtime:
+                try:
+                    cached = (mtime, Segment(path))
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Skipping unreadable segment {path}: {e}")
+                    continue
+                self._segments[path] = cached
+                # a rewritten segment invalidates its cached hand ids
+                for key in [k for k in self._hand_ids if k[0] == path]:
+                    del self._hand_ids[key]
+            segments.append(cached[1])
+        return segments
+
+    def _group_index(self, segment: Segment, group: int) -> Dict[str, int]:
+        key = (segment.path, group)
+        if key in self._hand_ids:
+            self._hand_ids.move_to_end(key)
+            return self._hand_ids[key]
+        index = {}
+        for i, hand_id in enumerate(segment.column(group, "hand_id")):
+            index.setdefault(hand_id, i)
+        self._hand_ids[key] = index
+        if len(self._hand_ids) > CACHED_GROUPS:
+            self._hand_ids.popitem(last=False)
+        return index
+
+    def find(self, hand_id: str) -> Optional[Dict]:
+        """First archived row of a hand as a dict by column, None if absent."""
+        # oldest first, like the ORDER BY id of the table lookup
+        for segment in reversed(self.segments()):
+            if not segment.may_contain(hand_id):
+                continue
+            for group in range(len(segment.groups)):
+                index = self._group_index(segment, group).get(hand_id)
+                if index is not None:
+                    logger.info(f"Found hand {hand_id} in archived {segment.partition}")
+                    return segment.row(group, index)
+        return None
+
+def archive_partitions(connection, directory: Optional[str] = None,
+                       retention_months: int = RETENTION_MONTHS,
+                       today: Optional[date] = None) -> List[str]:
+    """Archive partitions older than the retention period and drop them.
+
+    Each partition is written to a segment, read back to check the row
+    count, and only then detached and dropped, so a failed run can be
+    repeated. Future partitions are created on the way. Returns the names
+    of the archived partitions.
+    """
+    directory = directory or archive_directory()
+    os.makedirs(directory, exist_ok=True)
+    today = today or date.today()
+    ensure_partitions(connection, today=today)
+    cutoff = month_start(today, -retention_months)
+
+    archived = []
+    for name, upper in list_partitions(connection):
+        if upper is None or upper > cutoff:
+            continue
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT count(*) FROM {name}")
+            row_count = cursor.fetchone()[0]
+        path = os.path.join(directory, f"{name}{SEGMENT_SUFFIX}")
+        # a named cursor streams the partition from the server
+        with connection.cursor(name=f"archive_{name}") as cursor:
+            cursor.itersize = ROW_GROUP_SIZE
+            cursor.execute(f"SELECT {', '.join(SEGMENT_COLUMNS)} FROM {name} ORDER BY id")
+            written = write_segment(path, cursor, row_count, name)
+        connection.commit()
+
+        if Segment(path).rows != row_count or written != row_count:
+            raise RuntimeError(f"Segment {path} has {written} rows, partition {name} has {row_count}")
+        detach_partition(connection, name)
+        logger.info(f"Archived {row_count} hands from {name} to {path}")
+        archived.append(name)
+    return archived
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Archive old hands partitions to local segments")
+    parser.add_argument("--directory", default=None, help="segment directory, HANDS_ARCHIVE_DIR by default")
+    parser.add_argument("--retention-months", type=int, default=RETENTION_MONTHS)
+    args = parser.parse_args(argv)
+
+    connection = get_db_connection()
+    if connection is None:
+        raise SystemExit("Could not connect to the database")
+    try:
+        init_db(connection)
+        archived = archive_partitions(connection, args.directory, args.retention_months)
+    finally:
+        connection.close()
+    print(f"Archived {len(archived)} partitions: {', '.join(archived) or '-'}")
+
+if __name__ == "__main__":
+    main()
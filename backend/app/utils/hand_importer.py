@@ -0,0 +1,226 @@
+"""Module for importing third-party text hand histories into the hands table.
+
+Files are read in large chunks and split into hands lazily, batches of
+hands are parsed in a process pool with a bounded number of batches in
+flight, and parsed hands are validated and bulk loaded batch by batch, so
+memory use stays flat however large the input is. For example:
+
+    python -m app.utils.hand_importer histories/*.txt --workers 8
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, replace
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from app.models import HandResult
+from app.game.cards import CARD_INDEX
+from app.game.batch_validator import validate_hands
+from app.game.hand_history_parser import CHUNK_SIZE, HandHistoryError, iter_hand_texts, parse_hand_history
+from app.database import get_db_connection, hand_row, init_db, row_error, save_evaluated_hands
+
+# logs for debug
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 2000
+# rejected hands whose messages are kept for the report
+MAX_ERROR_SAMPLES = 20
+
+Loader = Callable[[List[HandResult]], int]
+
+@dataclass
+class ImportStats:
+    """Counters of an import run."""
+    files: int = 0
+    bytes_read: int = 0
+    total_bytes: int = 0
+    hands: int = 0
+    parse_errors: int = 0
+    invalid: int = 0
+    loaded: int = 0
+    started: float = field(default_factory=time.monotonic)
+    errors: List[str] = field(default_factory=list)
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def summary(self) -> str:
+        elapsed = max(self.elapsed, 1e-9)
+        done = f"{100 * self.bytes_read / self.total_bytes:.1f}%" if self.total_bytes else "-"
+        return (
+            f"{done} {self.hands} hands, {self.loaded} loaded, {self.parse_errors} unparsable, "
+            f"{self.invalid} invalid, {self.hands / elapsed:.0f} hands/s, "
+            f"{self.bytes_read / elapsed / 1e6:.1f} MB/s"
+        )
+
+    def reject(self, message: str) -> None:
+        if len(self.errors) < MAX_ERROR_SAMPLES:
+            self.errors.append(message)
+
+class _CountingReader:
+    """Text file wrapper that adds the bytes read to the stats."""
+
+    def __init__(self, f, stats: ImportStats):
+        self._file = f
+        self._stats = stats
+
+    def read(self, size: int) -> str:
+        position = self._file.buffer.tell()
+        chunk = self._file.read(size)
+        self._stats.bytes_read += self._file.buffer.tell() - position
+        return chunk
+
+def _hand_texts(paths: Sequence[str], stats: ImportStats, chunk_size: int) -> Iterator[str]:
+    for path in paths:
+        with open(path, encoding="utf-8-sig", errors="replace") as f:
+            stats.files += 1
+            yield from iter_hand_texts(_CountingReader(f, stats), chunk_size)
+
+def _batches(items: Iterable[str], size: int) -> Iterator[List[str]]:
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+def _parse_batch(texts: List[str]) -> List[Tuple[Optional[HandResult], Optional[str]]]:
+    """Parse hands in a worker, with an error message in place of each bad one."""
+    parsed = []
+    for text in texts:
+        try:
+            parsed.append((parse_hand_history(text), None))
+        except HandHistoryError as e:
+            parsed.append((None, str(e)))
+    return parsed
+
+def _for_validation(result: HandResult) -> HandResult:
+    """Copy of a hand with unused cards standing in for hidden hole cards.
+
+    Histories only show the cards of the recorder and of showdowns, so the
+    stand-ins let the other rules be checked; they are never stored.
+    """
+    if all(player.cards for player in result.players):
+        return result
+    text = "".join(p.cards for p in result.players) + result.community_cards.replace(" ", "")
+    known = {text[i:i + 2] for i in range(0, len(text), 2)}
+    spare = iter(card for card in CARD_INDEX if card not in known)
+    players = [
+        player if player.cards else replace(player, cards=next(spare) + next(spare))
+        for player in result.players
+    ]
+    return replace(result, players=players)
+
+def import_files(
+    paths: Sequence[str],
+    load: Loader,
+    workers: Optional[int] = None,
+    batch_size: int = BATCH_SIZE,
+    validate: bool = True,
+    chunk_size: int = CHUNK_SIZE,
+    progress: Optional[Callable[[ImportStats], None]] = None,
+    progress_interval: float = 5.0
+) -> ImportStats:
+    """Parse, validate and load every hand in the given files.
+
+    load receives each batch of accepted hands and returns how many it
+    stored. workers=0 parses in this process; otherwise at most two
+    batches per worker are in flight, which bounds memory.
+    """
+    stats = ImportStats(total_bytes=sum(os.path.getsize(p) for p in paths))
+    last_report = time.monotonic()
+
+    def finish(parsed: List[Tuple[Optional[HandResult], Optional[str]]]) -> None:
+        nonlocal last_report
+        stats.hands += len(parsed)
+        results = []
+        for result, error in parsed:
+            if error:
+                stats.parse_errors += 1
+                stats.reject(error)
+            else:
+                results.append(result)
+
+        if validate:
+            checks = validate_hands([_for_validation(result) for result in results])
+        else:
+            checks = [None] * len(results)
+        accepted = []
+        for result, error in zip(results, checks):
+            error = error or row_error(hand_row(result))
+            if error:
+                stats.invalid += 1
+                stats.reject(f"{result.hand_id}: {error}")
+            else:
+                accepted.append(result)
+        if accepted:
+            stats.loaded += load(accepted)
+
+        if progress and time.monotonic() - last_report >= progress_interval:
+            last_report = time.monotonic()
+            progress(stats)
+
+    batches = _batches(_hand_texts(paths, stats, chunk_size), batch_size)
+    if workers == 0:
+        for batch in batches:
+            finish(_parse_batch(batch))
+    else:
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(workers) as pool:
+            max_pending = 2 * workers
+            pending = deque()
+            for batch in batches:
+                pending.append(pool.submit(_parse_batch, batch))
+                if len(pending) >= max_pending:
+                    finish(pending.popleft().result())
+            while pending:
+                finish(pending.popleft().result())
+
+    logger.info(f"Imported {len(paths)} files: {stats.summary()}")
+    return stats
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Import text hand histories into the hands table")
+    parser.add_argument("paths", nargs="+", help="hand history files")
+    parser.add_argument("--workers", type=int, help="parser processes, 0 to parse inline")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--no-validate", action="store_true", help="skip game rule validation")
+    parser.add_argument("--dry-run", action="store_true", help="parse and validate without loading")
+    args = parser.parse_args(argv)
+
+    def report(stats: ImportStats) -> None:
+        print(stats.summary(), file=sys.stderr)
+
+    if args.dry_run:
+        load = len
+        connection = None
+    else:
+        connection = get_db_connection()
+        if connection is None:
+            sys.exit("Could not connect to the database")
+        init_db(connection)
+
+        def load(results: List[HandResult]) -> int:
+            return save_evaluated_hands(connection, results)
+
+    try:
+        stats = import_files(
+            args.paths, load, args.workers, args.batch_size,
+            validate=not args.no_validate, progress=report
+        )
+    finally:
+        if connection is not None:
+            connection.close()
+    report(stats)
+    for error in stats.errors:
+        print(f"rejected {error}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
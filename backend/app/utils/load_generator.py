@@ -0,0 +1,346 @@
+"""Module for load testing the poker API with concurrent asyncio clients.
+
+Run against a local server, for example:
+
+    python -m app.utils.load_generator --url http://127.0.0.1:8000 --rate 200 --duration 30
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import time
+from array import array
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from app.game.cards import RANKS, SUITS
+
+# logs for debug
+logger = logging.getLogger(__name__)
+
+# endpoints driven by the generator and their default share of requests
+DEFAULT_MIX = {"create": 0.5, "list": 0.25, "get": 0.25}
+
+# latencies are kept with 64 linear sub-buckets per power of two, about 1.5% precision
+SUB_BUCKET_BITS = 6
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+BUCKET_COUNT = 42 * SUB_BUCKETS
+
+class LatencyHistogram:
+    """Log-linear latency histogram in microseconds, in the style of HdrHistogram."""
+
+    def __init__(self):
+        self.counts = array('Q', bytes(8 * BUCKET_COUNT))
+        self.count = 0
+        self.total = 0
+        self.min = 0
+        self.max = 0
+
+    @staticmethod
+    def _index(value: int) -> int:
+        if value < 2 * SUB_BUCKETS:
+            return value
+        shift = value.bit_length() - SUB_BUCKET_BITS - 1
+        return min(shift * SUB_BUCKETS + (value >> shift), BUCKET_COUNT - 1)
+
+    @staticmethod
+    def _highest(index: int) -> int:
+        """Largest value counted in a bucket."""
+        if index < 2 * SUB_BUCKETS:
+            return index
+        shift = index // SUB_BUCKETS - 1
+        sub = index - shift * SUB_BUCKETS
+        return ((sub + 1) << shift) - 1
+
+    def record(self, micros: int) -> None:
+        micros = max(0, int(micros))
+        self.counts[self._index(micros)] += 1
+        self.min = micros if not self.count else min(self.min, micros)
+        self.max = max(self.max, micros)
+        self.count += 1
+        self.total += micros
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        for i, count in enumerate(other.counts):
+            if count:
+                self.counts[i] += count
+        if other.count:
+            self.min = other.min if not self.count else min(self.min, other.min)
+            self.max = max(self.max, other.max)
+        self.count += other.count
+        self.total += other.total
+
+    def percentile(self, percent: float) -> int:
+        """Latency at or below which percent of the recorded values fall."""
+        if not self.count:
+            return 0
+        target = max(1, round(self.count * percent / 100))
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return min(self._highest(i), self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        """Percentiles in milliseconds."""
+        report = {"count": self.count}
+        if self.count:
+            report["min_ms"] = self.min / 1000
+            report["mean_ms"] = self.total / self.count / 1000
+            for percent in (50, 90, 99, 99.9):
+                report[f"p{percent}_ms"] = self.percentile(percent) / 1000
+            report["max_ms"] = self.max / 1000
+        return report
+
+class _EndpointStats:
+    """Counts and latencies of one endpoint."""
+
+    def __init__(self):
+        self.histogram = LatencyHistogram()
+        self.requests = 0
+        self.errors = 0
+        self.statuses: Dict[str, int] = {}
+
+    def record(self, status: Optional[int], micros: int) -> None:
+        self.requests += 1
+        self.histogram.record(micros)
+        key = str(status) if status is not None else "connection_error"
+        self.statuses[key] = self.statuses.get(key, 0) + 1
+        if status is None or status >= 400:
+            self.errors += 1
+
+    def summary(self, elapsed: float) -> Dict:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "error_rate": self.errors / self.requests if self.requests else 0.0,
+            "throughput": self.requests / elapsed if elapsed else 0.0,
+            "statuses": self.statuses,
+            "latency": self.histogram.summary()
+        }
+
+class _Connection:
+    """Keep-alive HTTP/1.1 connection over asyncio streams."""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    async def request(self, method: str, path: str, body: Optional[bytes] = None) -> Tuple[int, bytes]:
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        headers = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}"]
+        if body is not None:
+            headers += ["Content-Type: application/json", f"Content-Length: {len(body)}"]
+        self.writer.write(("\r\n".join(headers) + "\r\n\r\n").encode() + (body or b""))
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("Connection closed by server")
+        status = int(status_line.split()[1])
+        length, chunked, close = 0, False, False
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            name, value = name.strip().lower(), value.strip().lower()
+            if name == "content-length":
+                length = int(value)
+            elif name == "transfer-encoding" and "chunked" in value:
+                chunked = True
+            elif name == "connection" and value == "close":
+                close = True
+
+        if chunked:
+            parts = []
+            while True:
+                size = int((await self.reader.readline()).split(b";")[0], 16)
+                if not size:
+                    await self.reader.readline()
+                    break
+                parts.append(await self.reader.readexactly(size))
+                await self.reader.readline()
+            payload = b"".join(parts)
+        else:
+            payload = await self.reader.readexactly(length)
+        if close:
+            self.close()
+        return status, payload
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+def synthetic_hand(rng: random.Random, number: int) -> Dict:
+    """Random hand payload for POST /api/v1/hands."""
+    player_count = rng.randint(2, 6)
+    deck = [rank + suit for rank in RANKS for suit in SUITS]
+    rng.shuffle(deck)
+    positions = ["D", "SB", "BB", "UTG", "MP", "CO"][:player_count]
+    stack_size = 1000
+    players = [
+        {
+            "id": i + 1,
+            "cards": deck[2 * i] + deck[2 * i + 1],
+            "position": positions[i],
+            "stack": stack_size - (20 if positions[i] == "SB" else 40 if positions[i] == "BB" else 0)
+        }
+        for i in range(player_count)
+    ]
+    actions = [rng.choice("cfx") for _ in range(player_count)]
+    actions[-1] = "c"
+    return {
+        "hand_id": f"load-{number}-{rng.getrandbits(32):08x}",
+        "stack_size": stack_size,
+        "players": players,
+        "actions": ":".join(actions),
+        "community_cards": "".join(deck[2 * player_count:2 * player_count + 5]),
+        "stack_info": f"Stack {stack_size}",
+        "positions": "; ".join(f"Player {p['id']} {p['position']}" for p in players),
+        "hole_cards": "; ".join(f"Player {p['id']}: {p['cards']}" for p in players),
+        "pot": 60
+    }
+
+def load_payloads(path: str) -> List[Dict]:
+    """Recorded hand payloads from a JSON list or a file of JSON lines."""
+    with open(path) as f:
+        text = f.read().strip()
+    if text.startswith("["):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+async def run_load(
+    url: str,
+    rate: float,
+    duration: float,
+    concurrency: int = 32,
+    mix: Optional[Dict[str, float]] = None,
+    payloads: Optional[List[Dict]] = None,
+    seed: Optional[int] = None
+) -> Dict:
+    """Send requests at a fixed open-loop rate and report what happened.
+
+    Requests are started on schedule whether or not earlier ones finished,
+    and latency is measured from the scheduled start, so a slow server
+    shows up as queueing delay instead of a lower request rate.
+    """
+    parts = urlsplit(url)
+    host, port = parts.hostname or "127.0.0.1", parts.port or 80
+    base = parts.path.rstrip("/")
+    mix = mix or DEFAULT_MIX
+    rng = random.Random(seed)
+    kinds, weights = zip(*mix.items())
+
+    stats = {kind: _EndpointStats() for kind in kinds}
+    # ids of hands whose create succeeded, the only ones a get can find
+    known_ids: List[str] = []
+    pool: "asyncio.Queue[_Connection]" = asyncio.Queue()
+    for _ in range(concurrency):
+        pool.put_nowait(_Connection(host, port))
+
+    def next_request(number: int) -> Tuple[str, str, str, Optional[bytes], Optional[str]]:
+        kind = rng.choices(kinds, weights)[0]
+        if kind == "get" and not known_ids:
+            kind = "create"
+        if kind == "create":
+            payload = dict(payloads[number % len(payloads)]) if payloads else synthetic_hand(rng, number)
+            if payloads:
+                # replayed hands get fresh ids so each one is a new hand
+                payload["hand_id"] = f"{payload.get('hand_id', 'hand')}-{number}"
+            return kind, "POST", f"{base}/api/v1/hands", json.dumps(payload).encode(), payload["hand_id"]
+        if kind == "list":
+            return kind, "GET", f"{base}/api/v1/hands?limit=5", None, None
+        return kind, "GET", f"{base}/api/v1/hands/{rng.choice(known_ids)}", None, None
+
+    async def send(kind: str, method: str, path: str, body: Optional[bytes],
+                   created_id: Optional[str], scheduled: float) -> None:
+        connection = await pool.get()
+        status = None
+        try:
+            status, _ = await connection.request(method, path, body)
+        except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError) as e:
+            logger.debug(f"{method} {path} failed: {e}")
+            connection.close()
+        finally:
+            pool.put_nowait(connection)
+        stats[kind].record(status, (time.perf_counter() - scheduled) * 1e6)
+        if created_id is not None and status is not None and 200 <= status < 300:
+            known_ids.append(created_id)
+
+    start = time.perf_counter()
+    tasks = []
+    number = 0
+    while True:
+        scheduled = start + number / rate
+        if scheduled - start >= duration:
+            break
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(send(*next_request(number), scheduled)))
+        number += 1
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+
+    while not pool.empty():
+        pool.get_nowait().close()
+
+    overall = _EndpointStats()
+    for endpoint in stats.values():
+        overall.requests += endpoint.requests
+        overall.errors += endpoint.errors
+        overall.histogram.merge(endpoint.histogram)
+        for key, count in endpoint.statuses.items():
+            overall.statuses[key] = overall.statuses.get(key, 0) + count
+
+    return {
+        "url": url,
+        "target_rate": rate,
+        "duration": elapsed,
+        "concurrency": concurrency,
+        "overall": overall.summary(elapsed),
+        "endpoints": {kind: endpoint.summary(elapsed) for kind, endpoint in stats.items()}
+    }
+
+def _parse_mix(text: str) -> Dict[str, float]:
+    """Parse a mix like 'create=0.5,list=0.25,get=0.25'."""
+    mix = {}
+    for item in text.split(","):
+        kind, _, weight = item.partition("=")
+        if kind.strip() not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"Unknown endpoint in mix: {kind}")
+        mix[kind.strip()] = float(weight)
+    return mix
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Load test the poker API")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--rate", type=float, default=100.0, help="requests per second")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument("--concurrency", type=int, default=32, help="open connections")
+    parser.add_argument("--mix", type=_parse_mix, default=DEFAULT_MIX)
+    parser.add_argument("--payloads", help="JSON or JSON lines file of recorded hands")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    payloads = load_payloads(args.payloads) if args.payloads else None
+    report = asyncio.run(run_load(
+        args.url, args.rate, args.duration, args.concurrency, args.mix, payloads, args.seed
+    ))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    print(text)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""Module for sampling live stacks and rendering them as flame graphs.
+
+A background thread wakes every interval, reads the current frame of
+every other thread with sys._current_frames() and counts the stacks, so
+the cost is a few microseconds per sample and nothing is traced between
+samples. Stacks are reported in the collapsed format of flamegraph.pl,
+as an SVG flame graph, or as per-function and per-category totals.
+"""
+
+import logging
+import sys
+import threading
+import time
+import tracemalloc
+import zlib
+from collections import Counter
+from html import escape
+from types import CodeType
+from typing import Dict, List, Optional
+
+# logs for debug
+logger = logging.getLogger(__name__)
+
+# frames kept per stack, from the root
+MAX_DEPTH = 128
+# module prefixes whose time is totalled in the report
+CATEGORIES = {
+    "evaluation": ("app.game",),
+    "database": (
+        "app.database", "app.repositories", "app.game.list_hands", "app.utils.hand_archive",
+        "psycopg2", "sqlite3"
+    ),
+    "serialization": ("json", "pydantic", "fastapi.encoders", "starlette.responses", "app.game.hand_codec"),
+    "logging": ("logging",),
+}
+
+# flame graph geometry in pixels
+SVG_WIDTH = 1200
+FRAME_HEIGHT = 16
+MIN_FRAME_WIDTH = 0.1
+
+# longest prefix first, so app.game.hand_codec counts as serialization
+_PREFIXES = sorted(
+    ((prefix, name) for name, prefixes in CATEGORIES.items() for prefix in prefixes),
+    key=lambda item: -len(item[0])
+)
+
+def _category(label: str) -> Optional[str]:
+    module = label.split(":", 1)[0]
+    for prefix, name in _PREFIXES:
+        if module == prefix or module.startswith(prefix + "."):
+            return name
+    return None
+
+class SamplingProfiler:
+    """Counts the stacks of every thread at a fixed interval."""
+
+    def __init__(self, interval: float = 0.01, max_depth: int = MAX_DEPTH):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.duration = 0.0
+        self._labels: Dict[CodeType, str] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started = 0.0
+
+    def start(self) -> None:
+        self._started = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self.duration = time.monotonic() - self._started
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def _label(self, frame) -> str:
+        code = frame.f_code
+        label = self._labels.get(code)
+        if label is None:
+            module = frame.f_globals.get("__name__", "?")
+            label = self._labels[code] = f"{module}:{getattr(code, 'co_qualname', code.co_name)}"
+        return label
+
+    def sample(self) -> None:
+        """Record the current stack of every thread but the sampler."""
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        own = threading.get_ident()
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            stack = []
+            while frame is not None and len(stack) < self.max_depth:
+                stack.append(self._label(frame))
+                frame = frame.f_back
+            stack.append(names.get(ident, f"thread-{ident}"))
+            self.stacks[tuple(reversed(stack))] += 1
+        self.samples += 1
+
+    def collapsed(self) -> str:
+        """Stacks as "root;...;leaf count" lines, most frequent first."""
+        return "\n".join(f"{';'.join(stack)} {count}" for stack, count in self.stacks.most_common())
+
+    def functions(self, limit: int = 50) -> List[Dict]:
+        """Self and total samples of the functions seen most often."""
+        own, total = Counter(), Counter()
+        for stack, count in self.stacks.items():
+            own[stack[-1]] += count
+            for label in set(stack[1:]):
+                total[label] += count
+        seen = sum(self.stacks.values()) or 1
+        return [
+            {
+                "function": label,
+                "category": _category(label),
+                "self": own[label],
+                "total": count,
+                "self_pct": round(100 * own[label] / seen, 2),
+                "total_pct": round(100 * count / seen, 2)
+            }
+            for label, count in total.most_common(limit)
+        ]
+
+    def categories(self) -> Dict[str, Dict]:
+        """Samples whose stack is inside each category, counted once per stack."""
+        counts = Counter()
+        for stack, count in self.stacks.items():
+            for name in {_category(label) for label in stack[1:]} - {None}:
+                counts[name] += count
+        seen = sum(self.stacks.values()) or 1
+        return {
+            name: {"samples": counts[name], "pct": round(100 * counts[name] / seen, 2)}
+            for name in CATEGORIES
+        }
+
+def _color(name: str) -> str:
+    # warm colors, stable per function so graphs can be compared
+    h = zlib.crc32(name.encode())
+    return f"rgb({205 + h % 50},{(h >> 8) % 180 + 40},{(h >> 16) % 55})"
+
+def flame_graph_svg(stacks: Counter, title: str = "Flame graph") -> str:
+    """Render counted stacks as a flame graph SVG, roots at the bottom."""
+    tree: Dict = {"children": {}, "value": 0}
+    for stack, count in stacks.items():
+        tree["value"] += count
+        node = tree
+        for label in stack:
+            node = node["children"].setdefault(label, {"children": {}, "value": 0})
+            node["value"] += count
+    depth = max((len(stack) for stack in stacks), default=0)
+    height = (depth + 2) * FRAME_HEIGHT + 8
+    scale = SVG_WIDTH / max(tree["value"], 1)
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{SVG_WIDTH}" height="{height}" '
+        f'font-family="monospace" font-size="11">',
+        f'<text x="{SVG_WIDTH / 2}" y="14" text-anchor="middle" font-size="13">{escape(title)}</text>',
+    ]
+
+    def draw(node: Dict, x: float, level: int) -> None:
+        for label, child in node["children"].items():
+            width = child["value"] * scale
+            if width >= MIN_FRAME_WIDTH:
+                y = height - (level + 1) * FRAME_HEIGHT
+                pct = 100 * child["value"] / tree["value"]
+                text = label if len(label) * 7 <= width - 4 else label[:max(0, int((width - 4) / 7) - 2)] + ".."
+                parts.append(
+                    f'<g><title>{escape(label)} ({child["value"]} samples, {pct:.2f}%)</title>'
+                    f'<rect x="{x:.2f}" y="{y}" width="{width:.2f}" height="{FRAME_HEIGHT - 1}" '
+                    f'fill="{_color(label)}"/>'
+                    + (f'<text x="{x + 2:.2f}" y="{y + 11}">{escape(text)}</text>' if width > 21 else "")
+                    + '</g>'
+                )
+                draw(child, x, level + 1)
+            x += width
+
+    draw(tree, 0.0, 0)
+    parts.append("</svg>")
+    return "\n".join(parts)
+
+def _allocation_diff(before: tracemalloc.Snapshot, after: tracemalloc.Snapshot, limit: int) -> List[Dict]:
+    ignored = [
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, __file__),
+    ]
+    diff = after.filter_traces(ignored).compare_to(before.filter_traces(ignored), "lineno")
+    return [
+        {
+            "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+            "size_diff": stat.size_diff,
+            "count_diff": stat.count_diff,
+            "size": stat.size
+        }
+        for stat in diff[:limit]
+    ]
+
+class ProfileSession:
+    """One profiling run with an optional allocation snapshot diff."""
+
+    def __init__(self, interval: float = 0.01, allocations: bool = False, allocation_limit: int = 25):
+        self.profiler = SamplingProfiler(interval)
+        self.allocations = allocations
+        self.allocation_limit = allocation_limit
+        self._started_tracing = False
+        self._before: Optional[tracemalloc.Snapshot] = None
+        self.allocation_diff: Optional[List[Dict]] = None
+
+    def start(self) -> None:
+        if self.allocations:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+            self._before = tracemalloc.take_snapshot()
+        self.profiler.start()
+
+    def stop(self) -> None:
+        self.profiler.stop()
+        if self.allocations:
+            after = tracemalloc.take_snapshot()
+            if self._started_tracing:
+                tracemalloc.stop()
+            self.allocation_diff = _allocation_diff(self._before, after, self.allocation_limit)
+        logger.info(f"Profiled {self.profiler.samples} samples in {self.profiler.duration:.1f}s")
+
+    def report(self) -> Dict:
+        profiler = self.profiler
+        report = {
+            "duration": round(profiler.duration, 3),
+            "interval_ms": profiler.interval * 1000,
+            "samples": profiler.samples,
+            "categories": profiler.categories(),
+            "functions": profiler.functions(),
+            "stacks": profiler.collapsed().splitlines()
+        }
+        if self.allocation_diff is not None:
+            report["allocations"] = self.allocation_diff
+        return report
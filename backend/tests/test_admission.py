@@ -0,0 +1,111 @@
+"""Tests for admission control of the hand endpoints."""
+
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.admission import AdmissionLimiter, AdmissionMiddleware, AdmissionRejected, admission_rule
+
+client = TestClient(app)
+
+def test_limiter_queues_then_rejects():
+    """Test requests run up to the limit, queue up to the bound and are shed after."""
+    async def scenario():
+        limiter = AdmissionLimiter("test", max_concurrent=2, max_queue=1, queue_timeout=5)
+        await limiter.acquire()
+        await limiter.acquire()
+        queued = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        assert limiter.queued == 1
+
+        with pytest.raises(AdmissionRejected) as error:
+            await limiter.acquire()
+        assert error.value.status_code == 429
+        assert error.value.retry_after >= 1
+
+        # a released slot goes to the waiting request
+        limiter.release(0.01)
+        await queued
+        assert limiter.in_flight == 2
+        assert limiter.queued == 0
+        return limiter.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["admitted"] == 3
+    assert stats["rejected_queue_full"] == 1
+    assert stats["peak_queued"] == 1
+
+def test_limiter_times_out_waiters():
+    """Test a request that waits too long is rejected with 503 and leaves the queue."""
+    async def scenario():
+        limiter = AdmissionLimiter("test", max_concurrent=1, max_queue=4, queue_timeout=0.01)
+        await limiter.acquire()
+        with pytest.raises(AdmissionRejected) as error:
+            await limiter.acquire()
+        assert error.value.status_code == 503
+        assert limiter.queued == 0
+        limiter.release()
+        assert limiter.in_flight == 0
+        return limiter.stats()
+
+    assert asyncio.run(scenario())["rejected_timeout"] == 1
+
+def test_cancelled_waiter_leaves_queue():
+    """Test a client that goes away while queued does not hold a slot."""
+    async def scenario():
+        limiter = AdmissionLimiter("test", max_concurrent=1, max_queue=4, queue_timeout=5)
+        await limiter.acquire()
+        waiting = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        assert limiter.queued == 0
+        limiter.release()
+        assert limiter.in_flight == 0
+
+    asyncio.run(scenario())
+
+def test_middleware_sheds_with_retry_after():
+    """Test saturated budgets answer with Retry-After and other paths pass through."""
+    async def endpoint(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    limiter = AdmissionLimiter("write", max_concurrent=1, max_queue=0)
+    middleware = AdmissionMiddleware(endpoint, [admission_rule("POST", r"/api/v1/hands", limiter)])
+
+    async def call(method, path):
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+
+        async def receive():
+            return {"type": "http.request", "body": b""}
+
+        scope = {"type": "http", "method": method, "path": path, "headers": []}
+        await middleware(scope, receive, send)
+        return messages[0]
+
+    async def scenario():
+        assert (await call("POST", "/api/v1/hands"))["status"] == 200
+        assert limiter.in_flight == 0
+        await limiter.acquire()
+        shed = await call("POST", "/api/v1/hands")
+        passed = await call("GET", "/api/v1/hands")
+        return shed, passed
+
+    shed, passed = asyncio.run(scenario())
+    assert shed["status"] == 429
+    assert (b"retry-after", b"1") in shed["headers"]
+    assert passed["status"] == 200
+
+def test_admission_stats_and_health():
+    """Test queue depth metrics and the unlimited health check."""
+    assert client.get("/health").json() == {"status": "ok"}
+    stats = client.get("/api/v1/stats/admission").json()
+    assert set(stats) == {"read", "write"}
+    assert stats["write"]["max_concurrent"] == 8
+    assert stats["read"]["queued"] == 0
@@ -1,5 +1,9 @@
 """Test module for the poker game API endpoints."""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 from fastapi.testclient import TestClient
+from app import main
 from app.main import app
 
 client = TestClient(app)
@@ -126,4 +130,65 @@ def test_get_nonexistent_hand():
     """Test getting a hand that doesn't exist."""
     response = client.get("/api/v1/hands/nonexistent-id")
     assert response.status_code == 404
-    assert response.json()["detail"] == "Hand with ID nonexistent-id not found" 
\ No newline at end of file
+    assert response.json()["detail"] == "Hand with ID nonexistent-id not found" 
+
+def test_live_table_websocket():
+    """Test validating a live hand action by action."""
+    with client.websocket_connect("/ws/tables/table-1") as websocket:
+        websocket.send_json({"type": "start", "player_ids": [1, 2, 3]})
+        assert websocket.receive_json()["active_players"] == [1, 2, 3]
+
+        websocket.send_json({"type": "action", "action": "1:raise,50"})
+        assert websocket.receive_json()["last_raise"] == 50
+
+        websocket.send_json({"type": "action", "action": "2:raise,20"})
+        data = websocket.receive_json()
+        assert data["type"] == "error"
+        assert data["detail"] == "Invalid raise amount: 20"
+
+        websocket.send_json({"type": "action", "action": "2:fold"})
+        assert websocket.receive_json()["folded_players"] == [2]
+
+def test_live_table_websocket_bad_messages():
+    """Test malformed messages get error frames and a disconnect drops the hand."""
+    with client.websocket_connect("/ws/tables/table-2") as websocket:
+        websocket.send_text("not json")
+        assert websocket.receive_json()["type"] == "error"
+        websocket.send_json([1, 2])
+        assert websocket.receive_json()["detail"] == "Messages must be JSON objects"
+
+        websocket.send_json({"type": "start", "player_ids": [1, 2]})
+        assert websocket.receive_json()["type"] == "state"
+        assert "table-2" in main.live_tables
+    assert "table-2" not in main.live_tables
+
+def test_saves_off_loop_and_shuts_down(monkeypatch):
+    """Test created hands are saved on the writer thread and shutdown releases the pools."""
+    saved, shut_down = [], []
+    writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="hand-writer")
+    monkeypatch.setattr(main, "hand_writer", writer)
+    monkeypatch.setattr(main, "connection", object())
+    monkeypatch.setattr(
+        main, "save_evaluated_hand",
+        lambda connection, result: saved.append((result.hand_id, threading.current_thread().name))
+    )
+    monkeypatch.setattr(main.evaluation_executor, "shutdown", lambda: shut_down.append(True))
+    hand_info = {
+        "hand_id": "saved-off-loop",
+        "stack_size": 1000,
+        "players": [
+            {"id": 1, "cards": "AhKh", "position": "SB", "stack": 980},
+            {"id": 2, "cards": "QsJs", "position": "BB", "stack": 960}
+        ],
+        "actions": "1:fold",
+        "community_cards": "",
+        "stack_info": "",
+        "positions": "",
+        "hole_cards": "",
+        "pot": 60
+    }
+
+    with TestClient(app) as lifespan_client:
+        assert lifespan_client.post("/api/v1/hands", json=hand_info).status_code == 201
+    assert saved[0][0] == "saved-off-loop" and saved[0][1].startswith("hand-writer")
+    assert shut_down and writer._shutdown
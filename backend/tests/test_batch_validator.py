@@ -0,0 +1,79 @@
+"""Tests for vectorized batch validation."""
+
+from app.models import HandInfo, PlayerInfo
+from app.game.batch_validator import validate_hands
+from app.game.game_validator import GameValidationError, validate_hand_info
+
+def make_hand(hand_id: str = "batch_hand") -> HandInfo:
+    return HandInfo(
+        hand_id=hand_id,
+        stack_size=1000,
+        players=[
+            PlayerInfo(id=1, position="BTN", cards="AhKh", stack=950),
+            PlayerInfo(id=2, position="SB", cards="2d2c", stack=975),
+            PlayerInfo(id=3, position="BB", cards="JsQd", stack=950)
+        ],
+        actions="1:raise,50 2:call 3:call 1:check 2:check 3:check",
+        community_cards="7h 8h 9h",
+        pot=150,
+        stack_info="",
+        positions="",
+        hole_cards=""
+    )
+
+def scalar_error(hand_info: HandInfo):
+    try:
+        validate_hand_info(hand_info)
+    except (GameValidationError, ValueError) as e:
+        return str(e)
+    return None
+
+MUTATIONS = [
+    lambda h: None,
+    lambda h: setattr(h, "hand_id", ""),
+    lambda h: setattr(h, "players", h.players[:1]),
+    lambda h: setattr(h, "stack_size", 0),
+    lambda h: setattr(h.players[1], "id", 1),
+    lambda h: setattr(h.players[2], "stack", -1),
+    lambda h: setattr(h.players[0], "position", "XX"),
+    lambda h: setattr(h.players[2], "position", "SB"),
+    lambda h: setattr(h.players[1], "cards", "AhQc"),
+    lambda h: setattr(h.players[1], "cards", "2d2"),
+    lambda h: setattr(h.players[1], "cards", "2d2c|"),
+    lambda h: setattr(h.players[1], "cards", "1d2c"),
+    lambda h: setattr(h.players[1], "cards", "2D2C"),
+    lambda h: setattr(h, "community_cards", "7h8h9h"),
+    lambda h: setattr(h, "community_cards", "7h 8h Ah"),
+    lambda h: setattr(h, "community_cards", "7h 8h 9x"),
+    lambda h: setattr(h, "community_cards", "7h 8h 9h Tc"),
+    lambda h: setattr(h, "actions", "1:raise,50 1:call"),
+]
+
+def test_matches_single_hand_validator():
+    """Test every hand gets the error validate_hand_info would raise."""
+    hands = []
+    for mutate in MUTATIONS:
+        hand = make_hand()
+        mutate(hand)
+        hands.append(hand)
+
+    errors = validate_hands(hands)
+    assert errors == [scalar_error(hand) for hand in hands]
+    assert errors[0] is None
+    assert sum(error is None for error in errors) < len(errors) - 10
+
+def test_repeated_histories_and_empty_batch():
+    """Test identical action histories give identical results."""
+    hands = [make_hand(f"h{i}") for i in range(50)]
+    hands[7].players[0].cards = "AhAh"
+    errors = validate_hands(hands)
+    assert errors[7] == "Duplicate card: Ah"
+    assert errors.count(None) == 49
+    assert validate_hands([]) == []
+
+def test_out_of_range_values_fail_one_hand():
+    """Test a stack or id too large for the arrays fails only its hand."""
+    hands = [make_hand(f"h{i}") for i in range(3)]
+    hands[1].players[0].stack = 10 ** 20
+    hands[2].players[2].id = -10 ** 20
+    assert validate_hands(hands) == [None, "Stack out of range", "Player ID out of range"]
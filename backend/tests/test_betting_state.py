@@ -0,0 +1,59 @@
+"""Tests for incremental betting state validation."""
+
+import pytest
+from app.game.betting_state import BettingState
+from app.game.game_validator import GameValidationError
+
+def test_valid_actions_complete_round():
+    """Test a full betting round resets the raise amount."""
+    state = BettingState([1, 2, 3])
+    for action in "1:raise,50 2:call 3:call".split():
+        state.apply(action)
+
+    assert state.rounds == 1
+    assert state.last_raise == 0
+
+    state.apply("1:raise,20")
+    assert state.last_raise == 20
+
+def test_action_from_last_remaining_player():
+    """Test the last player left cannot act again."""
+    state = BettingState([1, 2, 3])
+    for action in "1:raise,50 2:fold 3:fold".split():
+        state.apply(action)
+
+    with pytest.raises(GameValidationError, match="Action from last remaining player: 1"):
+        state.apply("1:check")
+
+def test_rejected_action_leaves_state_unchanged():
+    """Test an invalid raise does not change the betting state."""
+    state = BettingState([1, 2])
+    state.apply("1:raise,100")
+
+    with pytest.raises(GameValidationError, match="Invalid raise amount"):
+        state.apply("2:raise,50")
+
+    assert state.actions == ["1:raise,100"]
+    assert state.last_raise == 100
+
+def test_too_many_rounds_leaves_state_unchanged():
+    """Test the action that would open a fifth round is rejected without being applied."""
+    state = BettingState([1, 2])
+    for _ in range(4):
+        state.apply("1:check")
+        state.apply("2:check")
+    state.apply("1:check")
+
+    with pytest.raises(GameValidationError, match="Too many betting rounds"):
+        state.apply("2:check")
+    assert state.rounds == 4
+    assert state.actions[-1] == "1:check"
+    assert state.round_actions == 1
+
+def test_action_from_folded_player():
+    """Test folded players cannot act."""
+    state = BettingState([1, 2, 3])
+    state.apply("1:fold")
+
+    with pytest.raises(GameValidationError, match="Action from folded player: 1"):
+        state.apply("1:call")
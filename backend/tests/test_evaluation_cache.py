@@ -0,0 +1,72 @@
+"""Tests for the content-addressed evaluation cache."""
+
+import pytest
+from app.models import HandInfo, PlayerInfo
+from app.game.evaluation_cache import EvaluationCache, hand_fingerprint
+from app.game.game_validator import GameValidationError
+from app.game.hand_evaluator import evaluate_hand
+
+def make_hand(hand_id: str, actions: str = "1:raise,50 2:call 3:call") -> HandInfo:
+    """Build a three player hand that goes to showdown preflop."""
+    return HandInfo(
+        hand_id=hand_id,
+        stack_size=1000,
+        players=[
+            PlayerInfo(id=1, position="BTN", cards="AhKh", stack=950),
+            PlayerInfo(id=2, position="SB", cards="2d2c", stack=950),
+            PlayerInfo(id=3, position="BB", cards="JsQd", stack=950)
+        ],
+        actions=actions,
+        community_cards="",
+        pot=150,
+        stack_info="",
+        positions="",
+        hole_cards=""
+    )
+
+def test_fingerprint_ignores_hand_id():
+    """Test hands differing only by ID share a fingerprint."""
+    assert hand_fingerprint(make_hand("a")) == hand_fingerprint(make_hand("b"))
+    assert hand_fingerprint(make_hand("a")) != hand_fingerprint(make_hand("a", "1:raise,60 2:call 3:call"))
+
+def test_fingerprint_separators_in_text():
+    """Test separators inside free text fields can not make different hands collide."""
+    first, second = make_hand("a", "1:call|7h"), make_hand("a", "1:call")
+    first.community_cards, second.community_cards = "8h", "7h|8h"
+    assert hand_fingerprint(first) != hand_fingerprint(second)
+
+    first, second = make_hand("a"), make_hand("a")
+    first.players[0].position, second.players[0].cards = "BTN;2,2d2c", "AhKh,BTN;2"
+    assert hand_fingerprint(first) != hand_fingerprint(second)
+
+def test_duplicate_hand_hits_cache():
+    """Test a repeated hand reuses payoffs and keeps its own ID."""
+    cache = EvaluationCache()
+    first = cache.evaluate(make_hand("a"))
+    second = cache.evaluate(make_hand("b"))
+
+    assert second.hand_id == "b"
+    assert second.payoffs == first.payoffs == evaluate_hand(make_hand("c")).payoffs
+    stats = cache.stats()
+    assert stats["evaluation_hits"] == 1
+    assert stats["evaluation_misses"] == 1
+    assert stats["evaluation_hit_rate"] == 0.5
+
+def test_validation_errors_are_cached():
+    """Test an invalid hand raises the same error from the cache."""
+    cache = EvaluationCache()
+    for hand_id in ("a", "b"):
+        with pytest.raises(GameValidationError, match="Invalid raise amount"):
+            cache.validate(make_hand(hand_id, "1:raise,100 2:raise,50"))
+
+    assert cache.stats()["validation_hits"] == 1
+
+def test_cache_is_bounded():
+    """Test the least recently used hand is evicted."""
+    cache = EvaluationCache(max_size=2)
+    for amount in (50, 60, 70):
+        cache.evaluate(make_hand("a", f"1:raise,{amount} 2:call 3:call"))
+
+    assert len(cache) == 2
+    cache.evaluate(make_hand("a", "1:raise,50 2:call 3:call"))
+    assert cache.stats()["evaluation_misses"] == 4
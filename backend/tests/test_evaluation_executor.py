@@ -0,0 +1,111 @@
+"""Tests for running evaluations off the event loop."""
+
+import asyncio
+
+import pytest
+from app.models import HandInfo, PlayerInfo
+from app.game.evaluation_cache import EvaluationCache
+from app.game.evaluation_executor import EvaluationExecutor, hand_cost
+from app.game.hand_evaluator import evaluate_hand
+
+def make_hand(hand_id: str, players: int = 3, actions: str = "1:raise,50 2:call 3:call") -> HandInfo:
+    """Build a hand that goes to showdown preflop."""
+    seats = [("BTN", "AhKh"), ("SB", "2d2c"), ("BB", "JsQd"), ("UTG", "9s9c"), ("MP", "7d6d"), ("CO", "TcTh")]
+    return HandInfo(
+        hand_id=hand_id,
+        stack_size=1000,
+        players=[
+            PlayerInfo(id=i + 1, position=position, cards=cards, stack=950)
+            for i, (position, cards) in enumerate(seats[:players])
+        ],
+        actions=actions,
+        community_cards="",
+        pot=50 * players,
+        stack_info="",
+        positions="",
+        hole_cards=""
+    )
+
+SIX_WAY = "1:raise,50 2:call 3:call 4:call 5:call 6:call " * 2
+
+def test_lane_by_cost():
+    """Test tiny hands run inline, larger ones in threads and the largest in processes."""
+    executor = EvaluationExecutor(processes=2, inline_max_cost=8, process_min_cost=40)
+    assert hand_cost(make_hand("a", 2, "1:raise,50 2:call")) == 6
+    assert executor.lane(make_hand("a", 2, "1:raise,50 2:call")) == "inline"
+    assert executor.lane(make_hand("b")) == "thread"
+    assert executor.lane(make_hand("c", 6, SIX_WAY.strip())) == "process"
+    # without a process pool the largest hands stay in threads
+    assert EvaluationExecutor(inline_max_cost=8, process_min_cost=40).lane(make_hand("c", 6, SIX_WAY.strip())) == "thread"
+
+def test_frontend_actions_are_counted():
+    """Test colon-separated actions count each action, so long hands leave the loop."""
+    long_hand = make_hand("d", 6, ":".join(["c", "f", "b40", "r80"] * 10))
+    assert hand_cost(long_hand) == 6 * 41
+    assert EvaluationExecutor().lane(long_hand) == "thread"
+    assert EvaluationExecutor(processes=1).lane(long_hand) == "process"
+
+def test_invalid_configuration():
+    """Test unknown strategies and a process strategy without processes are rejected."""
+    with pytest.raises(ValueError):
+        EvaluationExecutor(strategy="gpu")
+    with pytest.raises(ValueError):
+        EvaluationExecutor(strategy="process", processes=0)
+
+@pytest.mark.parametrize("strategy,processes", [("inline", 0), ("thread", 0), ("process", 1)])
+def test_every_lane_matches_evaluate_hand(strategy, processes):
+    """Test each lane returns the result of an inline evaluation and counts it."""
+    executor = EvaluationExecutor(strategy=strategy, processes=processes)
+    try:
+        hand = make_hand("a")
+        result = asyncio.run(executor.evaluate(hand))
+        assert result == evaluate_hand(hand)
+        lane = executor.stats()["lanes"][strategy]
+        assert lane["submitted"] == lane["completed"] == 1
+        assert lane["pending"] == 0
+    finally:
+        executor.shutdown()
+
+def test_cache_hits_skip_the_lanes():
+    """Test cached hands are answered without being queued."""
+    executor = EvaluationExecutor(EvaluationCache(), strategy="thread")
+    try:
+        async def scenario():
+            first = await executor.evaluate(make_hand("a"))
+            second = await executor.evaluate(make_hand("b"))
+            return first, second
+
+        first, second = asyncio.run(scenario())
+        assert second.hand_id == "b"
+        assert second.payoffs == first.payoffs
+        stats = executor.stats()
+        assert stats["cache_hits"] == 1
+        assert stats["lanes"]["thread"]["completed"] == 1
+    finally:
+        executor.shutdown()
+
+def test_thread_lane_keeps_loop_free():
+    """Test the event loop keeps running while hands are evaluated in threads."""
+    executor = EvaluationExecutor(strategy="thread", threads=2)
+    try:
+        async def scenario():
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    ticks += 1
+                    await asyncio.sleep(0)
+
+            task = asyncio.create_task(ticker())
+            hands = [make_hand(f"h{i}", 6, SIX_WAY.strip()) for i in range(50)]
+            results = await asyncio.gather(*(executor.evaluate(h) for h in hands))
+            task.cancel()
+            return results, ticks
+
+        results, ticks = asyncio.run(scenario())
+        assert len(results) == 50
+        assert ticks > 0
+        assert executor.stats()["lanes"]["thread"]["peak_pending"] > 1
+    finally:
+        executor.shutdown()
@@ -0,0 +1,215 @@
+"""Tests for archived hand segments."""
+
+import asyncio
+import os
+import threading
+import uuid
+from datetime import date, datetime, timezone
+
+import pytest
+from fastapi import HTTPException
+from app import main
+from app.database import ensure_partitions, init_db, month_start, partition_upper_bound
+from app.game import list_hands
+from app.game.list_hands import get_hand_by_id, get_hand_replay
+from app.utils import hand_archive
+from app.utils.hand_archive import HandArchive, Segment, write_segment
+
+CREATED = datetime(2024, 1, 15, 12, 30, 0, 123456, tzinfo=timezone.utc)
+
+def make_rows(count: int, prefix: str = "hand"):
+    for i in range(count):
+        yield (
+            i + 1, f"{prefix}-{i:06d}", 1000, "1 BTN, 2 BB", "AhKh", "2d2c", "", "", "", None,
+            "1:raise,50 2:call", "Player 1: +50; Player 2: -50", "7h 8h 9h", CREATED
+        )
+
+class NoRowsConnection:
+    """Connection whose hands table is empty."""
+
+    def cursor(self):
+        return self
+
+    def execute(self, query, params=None):
+        pass
+
+    def fetchone(self):
+        return None
+
+def test_segment_round_trip(tmp_path, monkeypatch):
+    """Test rows come back from a segment with several row groups."""
+    monkeypatch.setattr(hand_archive, "ROW_GROUP_SIZE", 40)
+    path = str(tmp_path / "hands_p202401.seg")
+    assert write_segment(path, make_rows(100), 100, "hands_p202401") == 100
+
+    segment = Segment(path)
+    assert segment.rows == 100
+    assert len(segment.groups) == 3
+    assert segment.partition == "hands_p202401"
+    row = segment.row(2, 5)
+    assert row["id"] == 86
+    assert row["hand_id"] == "hand-000085"
+    assert row["hand3"] == "" and row["hand6"] is None
+    assert row["created_at"] == CREATED
+
+def test_archive_find(tmp_path):
+    """Test lookups find hands in any segment and skip missing ones."""
+    write_segment(str(tmp_path / "hands_p202401.seg"), make_rows(50, "jan"), 50, "hands_p202401")
+    write_segment(str(tmp_path / "hands_p202402.seg"), make_rows(50, "feb"), 50, "hands_p202402")
+    archive = HandArchive(str(tmp_path))
+    assert [s.partition for s in archive.segments()] == ["hands_p202402", "hands_p202401"]
+    assert archive.find("jan-000049")["winnings"] == "Player 1: +50; Player 2: -50"
+    assert archive.find("feb-000000")["id"] == 1
+    assert archive.find("mar-000000") is None
+    assert HandArchive(str(tmp_path / "missing")).find("jan-000001") is None
+
+def test_archive_find_takes_the_oldest_row(tmp_path):
+    """Test a hand id in several segments resolves to its oldest row."""
+    write_segment(str(tmp_path / "hands_p202401.seg"), make_rows(5), 5, "hands_p202401")
+    newer = [(row[0] + 100,) + row[1:] for row in make_rows(5)]
+    write_segment(str(tmp_path / "hands_p202402.seg"), newer, 5, "hands_p202402")
+    assert HandArchive(str(tmp_path)).find("hand-000002")["id"] == 3
+
+def test_bloom_filter_skips_segments(tmp_path):
+    """Test absent hands rarely match the Bloom filter."""
+    path = str(tmp_path / "hands_p202401.seg")
+    write_segment(path, make_rows(1000), 1000)
+    segment = Segment(path)
+    assert all(segment.may_contain(f"hand-{i:06d}") for i in range(1000))
+    false_positives = sum(segment.may_contain(f"other-{i}") for i in range(1000))
+    assert false_positives < 50
+
+def test_get_hand_by_id_reads_archive(tmp_path):
+    """Test hands missing from the table are served from archived segments."""
+    write_segment(str(tmp_path / "hands_p202401.seg"), make_rows(10), 10)
+    archive = HandArchive(str(tmp_path))
+    entry = get_hand_by_id(NoRowsConnection(), "hand-000003", archive)
+    assert entry.hand_id == "hand-000003"
+    assert entry.hands == "AhKh;2d2c"
+    with pytest.raises(HTTPException) as error:
+        get_hand_by_id(NoRowsConnection(), "hand-999999", archive)
+    assert error.value.status_code == 404
+
+def test_replay_reads_the_hand_get_returns(tmp_path, monkeypatch):
+    """Test replays take the first stored row and fall back to the archive."""
+    write_segment(str(tmp_path / "hands_p202401.seg"), make_rows(10, "replayed"), 10)
+    monkeypatch.setattr(list_hands, "hand_archive", HandArchive(str(tmp_path)))
+    connection = NoRowsConnection()
+    queries = []
+    connection.execute = lambda query, params=None: queries.append(" ".join(query.split()))
+
+    state = get_hand_replay(connection, "replayed-000003", 0)
+    assert state["hand_id"] == "replayed-000003"
+    with pytest.raises(HTTPException):
+        get_hand_replay(connection, "live-only", 0)
+    assert queries == [
+        "SELECT hand_id, stack, positions, hand1, hand2, hand3, hand4, hand5, hand6, actions, community_cards "
+        "FROM hands WHERE hand_id = %s ORDER BY id LIMIT 1;"
+    ]
+
+def test_partition_bounds():
+    """Test monthly bounds and parsing of partition bound expressions."""
+    assert month_start(date(2024, 11, 20), 2) == datetime(2025, 1, 1, tzinfo=timezone.utc)
+    assert month_start(date(2024, 1, 5), -1) == datetime(2023, 12, 1, tzinfo=timezone.utc)
+    bound = "FOR VALUES FROM ('2024-01-01 00:00:00+00') TO ('2024-02-01 00:00:00+00')"
+    assert partition_upper_bound(bound) == datetime(2024, 2, 1, tzinfo=timezone.utc)
+    assert partition_upper_bound("DEFAULT") is None
+
+class PartitionConnection:
+    """Connection with some existing partitions, keeping every statement."""
+
+    def __init__(self, existing):
+        self.existing = existing
+        self.statements = []
+        self.result = None
+
+    def cursor(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def execute(self, query, params=None):
+        query = " ".join(query.split())
+        self.statements.append(query)
+        if query.startswith("SELECT to_regclass('hands_default')"):
+            self.result = ("hands_default" in self.existing,)
+        elif query.startswith("SELECT to_regclass"):
+            self.result = (params[0] in self.existing,)
+
+    def fetchone(self):
+        return self.result
+
+    def commit(self):
+        pass
+
+def test_new_partition_takes_rows_from_default():
+    """Test a missing month is filled from the default partition before it is attached."""
+    connection = PartitionConnection({"hands_default", "hands_p202401"})
+    names = ensure_partitions(connection, months_ahead=1, today=date(2024, 1, 15))
+    assert names == ["hands_p202401", "hands_p202402"]
+
+    created = [s for s in connection.statements if "hands_p202402" in s and not s.startswith("SELECT")]
+    assert created[0].startswith("CREATE TABLE hands_p202402 (LIKE hands")
+    assert "DELETE FROM hands_default" in created[1]
+    assert created[2].startswith("ALTER TABLE hands ATTACH PARTITION hands_p202402")
+    assert not any(s.startswith("CREATE TABLE hands_p202401") for s in connection.statements)
+
+def test_partitions_are_kept_ahead_while_running(monkeypatch):
+    """Test the app checks the coming partitions periodically on the writer thread."""
+    threads = []
+    def ensure(connection):
+        threads.append(threading.current_thread().name)
+        return []
+
+    monkeypatch.setattr(main, "ensure_partitions", ensure)
+
+    async def run():
+        task = asyncio.create_task(main.keep_partitions(interval=0.01))
+        while len(threads) < 2:
+            await asyncio.sleep(0.01)
+        task.cancel()
+
+    asyncio.run(asyncio.wait_for(run(), 5))
+    assert all(name.startswith("hand-writer") for name in threads)
+
+@pytest.mark.skipif(not os.environ.get("TEST_DATABASE_URL"), reason="needs TEST_DATABASE_URL of a PostgreSQL server")
+def test_partition_ddl_on_postgres():
+    """Test the partition DDL on a real server, in a throwaway schema."""
+    import psycopg2
+    connection = psycopg2.connect(os.environ["TEST_DATABASE_URL"])
+    schema = f"test_{uuid.uuid4().hex[:12]}"
+    cursor = connection.cursor()
+    cursor.execute(f"CREATE SCHEMA {schema}")
+    cursor.execute(f"SET search_path TO {schema}")
+    connection.commit()
+    try:
+        init_db(connection)
+        today = date.today()
+        # a month past the created partitions lands in the default partition
+        later = month_start(today, 6)
+        cursor.execute("INSERT INTO hands (hand_id, created_at) VALUES ('late', %s)", (later,))
+        connection.commit()
+        cursor.execute("SELECT tableoid::regclass::text FROM hands WHERE hand_id = 'late'")
+        assert cursor.fetchone()[0] == "hands_default"
+
+        names = ensure_partitions(connection, months_ahead=6, today=today)
+        assert names[-1] == f"hands_p{later:%Y%m}"
+        cursor.execute("SELECT tableoid::regclass::text FROM hands WHERE hand_id = 'late'")
+        assert cursor.fetchone()[0] == names[-1]
+        cursor.execute("SELECT count(*) FROM hands_default")
+        assert cursor.fetchone()[0] == 0
+
+        # running again is a no-op, and new rows go to their month
+        assert ensure_partitions(connection, months_ahead=6, today=today) == names
+        cursor.execute("INSERT INTO hands (hand_id) VALUES ('now') RETURNING tableoid::regclass::text")
+        assert cursor.fetchone()[0] == names[0]
+        connection.commit()
+    finally:
+        connection.rollback()
+        cursor.execute(f"DROP SCHEMA {schema} CASCADE")
+        connection.commit()
+        connection.close()
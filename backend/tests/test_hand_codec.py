@@ -0,0 +1,89 @@
+"""Tests for the binary hand encoding."""
+
+import dataclasses
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.models import HandInfo, HandResult, PlayerInfo
+from app.game.hand_codec import (
+    CONTENT_TYPE, HandCodecError, decode, decode_hand_info, encode_hand_info, encode_hand_result
+)
+
+client = TestClient(app)
+
+def make_result(**changes) -> HandResult:
+    result = HandResult(
+        hand_id="codec-hand-001",
+        stack_size=1000,
+        players=[
+            PlayerInfo(id=1, position="BTN", cards="AhKh", stack=950),
+            PlayerInfo(id=2, position="SB", cards="2d2c", stack=975),
+            PlayerInfo(id=3, position="BB", cards="JsQd", stack=950)
+        ],
+        actions="1:raise,50 2:call 3:call 1:check 2:check 3:check",
+        community_cards="7h 8h 9h",
+        stack_info="Stack 1000",
+        positions="",
+        hole_cards="",
+        pot=150,
+        payoffs=[100, -50, -50]
+    )
+    return dataclasses.replace(result, **changes)
+
+@pytest.mark.parametrize("changes", [
+    {},
+    {"actions": "f:x:c:b40:r80", "community_cards": "7h8h9hTc"},
+    {"actions": "1:raise", "community_cards": "7h  8h"},
+    {"players": [PlayerInfo(id=-7, position="Dealer", cards="Ah K", stack=-5)]},
+    {"hand_id": "ünïcode", "payoffs": [2 ** 40, -(2 ** 40)]},
+])
+def test_round_trip(changes):
+    """Test compact and fallback fields decode to the same hand."""
+    result = make_result(**changes)
+    encoded = encode_hand_result(result)
+    assert decode(encoded) == result
+    assert decode(memoryview(bytearray(encoded))) == result
+
+    fields = {name: getattr(result, name) for name in HandInfo.__dataclass_fields__}
+    assert decode_hand_info(encode_hand_info(HandInfo(**fields))) == HandInfo(**fields)
+
+def test_smaller_than_json():
+    """Test the encoding is several times smaller than JSON."""
+    result = make_result()
+    assert len(encode_hand_result(result)) * 5 < len(json.dumps(dataclasses.asdict(result)))
+
+def test_rejects_bad_data():
+    """Test truncated, concatenated and foreign data raise codec errors."""
+    encoded = encode_hand_result(make_result())
+    hand = encode_hand_info(make_result())
+    for data in (
+        b"", b"XX\x01\x01", encoded[:-3], encoded[:2] + b"\x09" + encoded[3:],
+        encoded + b"\x00", hand + hand
+    ):
+        with pytest.raises(HandCodecError):
+            decode(data)
+
+def test_binary_hand_endpoint():
+    """Test posting an encoded hand and receiving an encoded result."""
+    result = make_result(community_cards="7h8h9h")
+    fields = {name: getattr(result, name) for name in HandInfo.__dataclass_fields__}
+    response = client.post(
+        "/api/v1/hands",
+        content=encode_hand_info(HandInfo(**fields)),
+        headers={"Content-Type": CONTENT_TYPE, "Accept": CONTENT_TYPE}
+    )
+    assert response.status_code == 201
+    assert response.headers["content-type"] == CONTENT_TYPE
+    decoded = decode(response.content)
+    assert decoded.hand_id == result.hand_id
+    assert len(decoded.payoffs) == 3
+
+    # binary in, JSON out
+    response = client.post("/api/v1/hands", content=encode_hand_info(HandInfo(**fields)),
+                           headers={"Content-Type": CONTENT_TYPE})
+    assert response.json()["hand_id"] == result.hand_id
+
+    response = client.post("/api/v1/hands", content=b"garbage", headers={"Content-Type": CONTENT_TYPE})
+    assert response.status_code == 400
@@ -0,0 +1,51 @@
+"""Tests for lazily formatted hand results."""
+
+from app.models import HandInfo, HandResult, PlayerInfo
+from app.game.hand_formatter import format_hand_result
+from app.game.hand_codec import decode, encode_hand_result
+
+def make_hand(positions=("D", "SB", "BB")) -> HandInfo:
+    return HandInfo(
+        hand_id="lazy",
+        stack_size=1000,
+        players=[
+            PlayerInfo(id=i + 1, cards=cards, position=position, stack=1000)
+            for i, (position, cards) in enumerate(zip(positions, ("AhKh", "2c2d", "QsJs")))
+        ],
+        actions="1:call 2:call 3:check",
+        community_cards="",
+        stack_info="",
+        positions="1 BTN, 2 SB, 3 BB",
+        hole_cards="",
+        pot=120
+    )
+
+def test_display_strings_built_when_read():
+    """Test display strings are left out until read, then built once."""
+    result = format_hand_result(make_hand(), [0, 0, 0])
+    assert result.__dict__["stack_info"] is None
+    assert result.__dict__["hole_cards"] is None
+
+    assert result.stack_info == "Stack 1000"
+    assert result.positions == "Dealer: Player 1; Player 2 Small blind; Player 3 Big blind"
+    assert result.hole_cards == "Player 1: AhKh; Player 2: 2c2d; Player 3: QsJs"
+    assert result.__dict__["hole_cards"] == result.hole_cards
+
+def test_given_strings_and_fallback_positions():
+    """Test strings passed in are kept and hands without blind positions keep their string."""
+    result = format_hand_result(make_hand(("BTN", "SB", "BB")), [0, 0, 0])
+    assert result.positions == "1 BTN, 2 SB, 3 BB"
+
+    result = HandResult(
+        hand_id="given", stack_size=10, players=[], actions="", community_cards="",
+        stack_info="custom", pot=0
+    )
+    assert result.stack_info == "custom"
+    assert result.positions == ""
+
+def test_serialized_results_are_complete():
+    """Test encoding a lazy result writes the built strings."""
+    result = format_hand_result(make_hand(), [-40, 80, -40])
+    decoded = decode(encode_hand_result(result))
+    assert decoded.hole_cards == "Player 1: AhKh; Player 2: 2c2d; Player 3: QsJs"
+    assert decoded == result
@@ -0,0 +1,137 @@
+"""Tests for the text hand history parser and importer."""
+
+import io
+
+import pytest
+from app.game.hand_history_parser import HandHistoryError, iter_hand_texts, parse_hand_history
+from app.utils.hand_importer import import_files
+
+CASH_HAND = """PokerStars Hand #230000000001:  Hold'em No Limit ($0.05/$0.10 USD) - 2021/10/01 12:00:00 ET
+Table 'Alpha' 6-max Seat #1 is the button
+Seat 1: alice ($10 in chips)
+Seat 2: bob ($10.50 in chips)
+Seat 3: carol ($8 in chips)
+Seat 5: dave ($12 in chips) is sitting out
+bob: posts small blind $0.05
+carol: posts big blind $0.10
+*** HOLE CARDS ***
+Dealt to alice [Ah Kh]
+alice: raises $0.20 to $0.30
+bob: folds
+carol: calls $0.20
+*** FLOP *** [7h 8h 9c]
+carol: checks
+alice: bets $0.40
+carol: raises $0.80 to $1.20
+alice: calls $0.80
+*** TURN *** [7h 8h 9c] [Tc]
+carol: checks
+alice: checks
+*** RIVER *** [7h 8h 9c Tc] [2d]
+carol: bets $1
+alice: calls $1
+*** SHOW DOWN ***
+carol: shows [Jd Qd] (a straight, Eight to Queen)
+alice: mucks hand
+carol collected $4.93 from pot
+*** SUMMARY ***
+Total pot $5.05 | Rake $0.12
+Board [7h 8h 9c Tc 2d]
+Seat 1: alice (button) mucked [Ah Kh]
+Seat 2: bob (small blind) folded before Flop
+Seat 3: carol (big blind) showed [Jd Qd] and won ($4.93) with a straight
+"""
+
+HEADS_UP_HAND = """PokerStars Hand #230000000002:  Hold'em No Limit (10/20) - 2021/10/01 12:01:00 ET
+Table 'Beta' 6-max Seat #2 is the button
+Seat 1: erin (1,500 in chips)
+Seat 2: frank (2000 in chips)
+frank: posts small blind 10
+erin: posts big blind 20
+*** HOLE CARDS ***
+frank: raises 40 to 60
+erin: folds
+Uncalled bet (40) returned to frank
+frank collected 40 from pot
+*** SUMMARY ***
+Total pot 40 | Rake 0
+Seat 1: erin (big blind) folded before Flop
+Seat 2: frank (button) (small blind) collected (40)
+"""
+
+BROKEN_HAND = """PokerStars Hand #230000000003:  Hold'em No Limit (10/20) - 2021/10/01 12:02:00 ET
+Seat 1: erin (1500 in chips)
+"""
+
+def test_parse_cash_hand():
+    """Test a cash hand is parsed in cents with street-level raise totals."""
+    result = parse_hand_history(CASH_HAND)
+    assert result.hand_id == "PS-230000000001"
+    assert [(p.id, p.position, p.cards, p.stack) for p in result.players] == [
+        (1, "BTN", "AhKh", 1000), (2, "SB", "", 1050), (3, "BB", "JdQd", 800)
+    ]
+    assert result.actions == (
+        "1:raise,30 2:fold 3:call 3:check 1:raise,40 3:raise,120 1:call "
+        "3:check 1:check 3:raise,100 1:call"
+    )
+    assert result.community_cards == "7h 8h 9c Tc 2d"
+    assert result.pot == 505
+    # the rake is the only money leaving the table
+    assert result.payoffs == [-250, -5, 243]
+
+def test_parse_heads_up_uncalled_bet():
+    """Test uncalled bets go back to the raiser and heads-up positions."""
+    result = parse_hand_history(HEADS_UP_HAND)
+    assert [p.position for p in result.players] == ["BB", "BTN"]
+    assert result.players[0].stack == 1500
+    assert result.payoffs == [-20, 20]
+
+def test_parse_rejects_incomplete_hand():
+    """Test hands without a button are rejected."""
+    with pytest.raises(HandHistoryError):
+        parse_hand_history(BROKEN_HAND)
+
+def test_parse_rejects_full_ring_hand():
+    """Test tables with more seats than the API accepts are rejected by size."""
+    seats = "".join(f"Seat {i}: player{i} (1000 in chips)\n" for i in range(1, 10))
+    text = (
+        "PokerStars Hand #230000000004:  Hold'em No Limit (10/20) - 2021/10/01 12:03:00 ET\n"
+        "Table 'Gamma' 9-max Seat #1 is the button\n" + seats
+    )
+    with pytest.raises(HandHistoryError, match="has 9 players, unsupported table size"):
+        parse_hand_history(text)
+
+def test_split_hands_across_small_chunks():
+    """Test hands are split the same whatever the chunk size."""
+    text = CASH_HAND + "\n\n\n" + HEADS_UP_HAND + "\n\n" + BROKEN_HAND
+    expected = [CASH_HAND.strip(), HEADS_UP_HAND.strip(), BROKEN_HAND.strip()]
+    for chunk_size in (7, 100, 1 << 20):
+        assert list(iter_hand_texts(io.StringIO(text), chunk_size)) == expected
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_import_files(tmp_path, workers):
+    """Test an import counts parse errors and loads parsed hands in batches."""
+    path = tmp_path / "histories.txt"
+    path.write_text("\n\n".join([CASH_HAND, HEADS_UP_HAND, BROKEN_HAND] * 3))
+    batches = []
+
+    def load(results):
+        batches.append(results)
+        return len(results)
+
+    stats = import_files([str(path)], load, workers=workers, batch_size=2, validate=False)
+    assert stats.hands == 9
+    assert stats.parse_errors == 3
+    assert stats.loaded == 6
+    assert stats.bytes_read == stats.total_bytes
+    assert all(len(batch) <= 2 for batch in batches)
+    assert sorted(r.hand_id for batch in batches for r in batch) == ["PS-230000000001"] * 3 + ["PS-230000000002"] * 3
+
+def test_import_validates_with_hidden_cards(tmp_path):
+    """Test hidden hole cards do not fail validation and nothing is loaded for invalid hands."""
+    path = tmp_path / "histories.txt"
+    path.write_text(HEADS_UP_HAND)
+    loaded = []
+    stats = import_files([str(path)], lambda results: loaded.extend(results) or len(results), workers=0)
+    assert stats.invalid == 0
+    assert [p.cards for p in loaded[0].players] == ["", ""]
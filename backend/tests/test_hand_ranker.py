@@ -0,0 +1,41 @@
+"""Tests for poker hand ranking logic."""
+
+import pytest
+from app.game.hand_ranker import (
+    IncrementalHandEvaluator,
+    evaluate_player_hand,
+    get_hand_ranks,
+    parse_community_cards
+)
+
+def test_incremental_matches_full_evaluation():
+    """Test the incremental evaluator agrees with evaluate_player_hand on every street."""
+    evaluator = IncrementalHandEvaluator("AhKd")
+    board = []
+    for street in ["7h8hAs", "Kc", "2d"]:
+        evaluator.add_cards(street)
+        board.extend(parse_community_cards([street]))
+        expected = evaluate_player_hand(get_hand_ranks(["Ah", "Kd"], board))
+        assert evaluator.strength == expected
+
+    assert evaluator.street == "river"
+    assert evaluator.hand_class == "Two pair"
+    assert evaluator.strength == (2, [14, 13, 8])
+
+def test_incremental_street_progression():
+    """Test made-hand class and street after each card."""
+    evaluator = IncrementalHandEvaluator("QsQd")
+    assert evaluator.street == "preflop"
+    assert evaluator.hand_class == "One pair"
+
+    evaluator.add_cards("Qh 2c 5d")
+    assert evaluator.street == "flop"
+    assert evaluator.hand_class == "Three of a kind"
+    assert evaluator.strength == (3, [12, 5, 2])
+
+def test_incremental_rejects_sixth_board_card():
+    """Test the board cannot grow past the river."""
+    evaluator = IncrementalHandEvaluator("AhKd")
+    evaluator.add_cards("2c3c4c5c6c")
+    with pytest.raises(ValueError, match="more than 5 cards"):
+        evaluator.add_cards("7c")
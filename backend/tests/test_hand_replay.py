@@ -0,0 +1,54 @@
+"""Tests for replaying stored hands."""
+
+import pytest
+from app.game.hand_replay import HandReplay, parse_actions
+
+POSITIONS = "Dealer: Player 1; Player 2 Small blind; Player 3 Big blind"
+
+def test_parse_both_action_formats():
+    """Test frontend codes and validator style actions parse the same."""
+    assert parse_actions("c:f:r80") == [(None, 'call', 0), (None, 'fold', 0), (None, 'raise', 80)]
+    assert parse_actions("1:call 2:fold 3:raise,80") == [(0, 'call', 0), (1, 'fold', 0), (2, 'raise', 80)]
+
+def test_replay_states():
+    """Test stacks, pot, board and player to act after each step."""
+    replay = HandReplay("h1", 1000, 3, POSITIONS, "c:c:x:b100:f:c:x:x:x:x", "7h8h9hTcJd")
+
+    start = replay.to_dict(0)
+    assert start["stacks"] == [1000, 980, 960]
+    assert start["pot"] == 60
+    assert start["to_act"] == 1
+    assert start["board"] == []
+
+    flop = replay.to_dict(3)
+    assert flop["street"] == "flop"
+    assert flop["board"] == ["7h", "8h", "9h"]
+    assert flop["pot"] == 120
+    assert flop["to_act"] == 2
+
+    turn = replay.to_dict(6)
+    assert turn["street"] == "turn"
+    assert turn["active_players"] == [1, 2]
+    assert turn["stacks"] == [860, 860, 960]
+
+    river = replay.to_dict(10)
+    assert river["street"] == "river"
+    assert river["to_act"] is None
+
+def test_seek_matches_full_simulation():
+    """Test seeking from a checkpoint gives the same state as replaying from the start."""
+    actions = "c:c:x:" + ":".join(["b100", "r200", "r300", "r400", "r500", "r600", "c"])
+    without_checkpoints = HandReplay("h2", 1000, 3, POSITIONS, actions, checkpoint_interval=0)
+    assert len(without_checkpoints._checkpoints) == 1
+
+    for interval in (1, 2, 3):
+        with_checkpoints = HandReplay("h2", 1000, 3, POSITIONS, actions, checkpoint_interval=interval)
+        assert len(with_checkpoints._checkpoints) == 1 + len(with_checkpoints) // interval
+        for step in range(len(with_checkpoints) + 1):
+            assert with_checkpoints.to_dict(step) == without_checkpoints.to_dict(step)
+
+def test_step_out_of_range():
+    """Test seeking past the last action fails."""
+    replay = HandReplay("h3", 1000, 3, POSITIONS, "f:f")
+    with pytest.raises(ValueError, match="Step must be between 0 and 2"):
+        replay.state_at(3)
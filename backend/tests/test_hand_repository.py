@@ -0,0 +1,205 @@
+"""Tests for hand repositories."""
+
+import sqlite3
+import time
+
+import pytest
+from app.models import HandInfo, HandResult, PlayerInfo
+from app.repositories.hand_repository import ColumnarHandRepository, InMemoryHandRepository
+from app.repositories.log_hand_repository import LogHandRepository
+from app.repositories.repository_factory import create_hand_repository
+from app.repositories.sqlite_hand_repository import SQLiteHandRepository
+
+def make_hand(hand_id: str) -> HandInfo:
+    """Build a valid three player hand."""
+    return HandInfo(
+        hand_id=hand_id,
+        stack_size=1000,
+        players=[
+            PlayerInfo(id=1, position="BTN", cards="AhKh", stack=950),
+            PlayerInfo(id=2, position="SB", cards="2d2c", stack=975),
+            PlayerInfo(id=3, position="BB", cards="JsQd", stack=950)
+        ],
+        actions="1:raise,50 2:call 3:call",
+        community_cards="7h 8h 9h",
+        pot=125,
+        stack_info="Stack 1000",
+        positions="",
+        hole_cards="Player 1: AhKh; Player 2: 2d2c; Player 3: JsQd"
+    )
+
+@pytest.mark.parametrize("repository_class", [InMemoryHandRepository, ColumnarHandRepository])
+def test_save_and_find(repository_class):
+    """Test hands read back equal to the saved ones."""
+    repository = repository_class()
+    hands = [make_hand(f"hand-{i}") for i in range(3)]
+    for hand in hands:
+        repository.save(hand)
+
+    assert repository.find_one_by_id("hand-1") == hands[1]
+    assert repository.find_one_by_id("missing") is None
+    assert list(repository.find_all()) == hands
+
+@pytest.mark.parametrize("repository_class", [InMemoryHandRepository, ColumnarHandRepository])
+def test_save_and_find_result(repository_class):
+    """Test results read back with their payoffs."""
+    repository = repository_class()
+    hand = make_hand("hand-1")
+    result = HandResult(**vars(hand), payoffs=[-50, 100, -50])
+    repository.save_result("hand-1", result)
+
+    assert repository.find_result_by_id("hand-1") == result
+    assert repository.find_result_by_id("hand-2") is None
+
+def test_columnar_overwrite_keeps_latest():
+    """Test saving an existing ID replaces the hand."""
+    repository = ColumnarHandRepository()
+    repository.save(make_hand("hand-1"))
+    updated = make_hand("hand-1")
+    updated.pot = 300
+    repository.save(updated)
+
+    assert len(repository) == 1
+    assert repository.find_one_by_id("hand-1").pot == 300
+
+def test_columnar_rejects_bad_cards():
+    """Test a hand with unknown cards is not stored."""
+    repository = ColumnarHandRepository()
+    hand = make_hand("hand-1")
+    hand.players[0].cards = "XxKh"
+
+    with pytest.raises(ValueError, match="Invalid card: Xx"):
+        repository.save(hand)
+    assert repository.find_one_by_id("hand-1") is None
+
+def test_columnar_bad_hands_leave_columns_in_step():
+    """Test hands failing on positions or numbers add nothing to any column."""
+    repository = ColumnarHandRepository()
+    # SB, BB and 253 more positions leave room for one new name
+    for i in range(253):
+        hand = make_hand(f"hand-{i}")
+        hand.players[0].position = f"P{i}"
+        repository.save(hand)
+    columns = repository._hands
+    sizes = (len(columns.hand_ids), len(columns.pots), len(columns.player_ids), len(columns.text_offsets))
+
+    hand = make_hand("too-many")
+    hand.players[0].position, hand.players[1].position = "X1", "X2"
+    with pytest.raises(ValueError, match="Too many distinct positions"):
+        repository.save(hand)
+    hand = make_hand("too-big")
+    hand.players[2].stack = 1 << 70
+    with pytest.raises(ValueError, match="out of range"):
+        repository.save(hand)
+
+    assert (len(columns.hand_ids), len(columns.pots), len(columns.player_ids), len(columns.text_offsets)) == sizes
+    repository.save(make_hand("after"))
+    assert repository.find_one_by_id("after") == make_hand("after")
+
+def test_columnar_save_while_iterating_and_upper_suits():
+    """Test saving during find_all and storing cards with uppercase suits."""
+    repository = ColumnarHandRepository()
+    repository.save(make_hand("hand-1"))
+    for hand in repository.find_all():
+        repository.save(make_hand("hand-2"))
+    assert len(repository) == 2
+
+    hand = make_hand("hand-3")
+    hand.players[0].cards = "AHKH"
+    repository.save(hand)
+    assert repository.find_one_by_id("hand-3").players[0].cards == "AhKh"
+
+def test_log_repository_reopen(tmp_path):
+    """Test hands and results survive closing and reopening the log."""
+    hands = [make_hand(f"hand-{i}") for i in range(3)]
+    result = HandResult(**vars(hands[0]), payoffs=[-50, 100, -50])
+    with LogHandRepository(str(tmp_path)) as repository:
+        for hand in hands:
+            repository.save(hand)
+        repository.save_result("hand-0", result)
+        assert repository.find_one_by_id("hand-2") == hands[2]
+
+    with LogHandRepository(str(tmp_path)) as repository:
+        assert list(repository.find_all()) == hands
+        assert repository.find_result_by_id("hand-0") == result
+
+def test_log_repository_truncates_torn_tail(tmp_path):
+    """Test a partly written last record is dropped on recovery."""
+    with LogHandRepository(str(tmp_path)) as repository:
+        repository.save(make_hand("hand-1"))
+        repository.save(make_hand("hand-2"))
+
+    segment = tmp_path / "segment-000001.log"
+    data = segment.read_bytes()
+    segment.write_bytes(data[:-10])
+
+    with LogHandRepository(str(tmp_path)) as repository:
+        assert [h.hand_id for h in repository.find_all()] == ["hand-1"]
+        repository.save(make_hand("hand-3"))
+
+    with LogHandRepository(str(tmp_path)) as repository:
+        assert [h.hand_id for h in repository.find_all()] == ["hand-1", "hand-3"]
+
+def test_log_repository_rotates_segments(tmp_path):
+    """Test segments are rotated and still readable."""
+    with LogHandRepository(str(tmp_path), max_segment_bytes=600) as repository:
+        for i in range(5):
+            repository.save(make_hand(f"hand-{i}"))
+        assert repository.find_one_by_id("hand-0").hand_id == "hand-0"
+
+    assert len(list(tmp_path.glob("segment-*.log"))) > 1
+    with LogHandRepository(str(tmp_path)) as repository:
+        assert len(repository) == 5
+
+def test_sqlite_repository_batches_and_reopens(tmp_path):
+    """Test pending writes are readable and durable after close."""
+    path = str(tmp_path / "hands.db")
+    hands = [make_hand(f"hand-{i}") for i in range(5)]
+    result = HandResult(**vars(hands[0]), payoffs=[-50, 100, -50])
+    with SQLiteHandRepository(path, batch_size=2, commit_interval=60) as repository:
+        for hand in hands:
+            repository.save(hand)
+        repository.save_result("hand-0", result)
+        assert repository.find_one_by_id("hand-4") == hands[4]
+
+    with SQLiteHandRepository(path) as repository:
+        assert list(repository.find_all()) == hands
+        assert repository.find_result_by_id("hand-0") == result
+        assert repository.find_one_by_id("missing") is None
+
+def test_repository_from_config(tmp_path, monkeypatch):
+    """Test the repository is chosen by environment variables."""
+    monkeypatch.setenv("HAND_REPOSITORY", "sqlite")
+    monkeypatch.setenv("HAND_REPOSITORY_PATH", str(tmp_path / "hands.db"))
+    repository = create_hand_repository()
+    assert isinstance(repository, SQLiteHandRepository)
+    repository.close()
+
+    assert isinstance(create_hand_repository("columnar"), ColumnarHandRepository)
+    with pytest.raises(ValueError, match="Unknown hand repository"):
+        create_hand_repository("postgres")
+
+def test_sqlite_repository_commits_last_write_on_time(tmp_path):
+    """Test a lone pending write is committed by the timer without another write."""
+    path = str(tmp_path / "hands.db")
+    with SQLiteHandRepository(path, batch_size=100, commit_interval=0.05) as repository:
+        repository.save(make_hand("lone"))
+        reader = sqlite3.connect(path)
+        assert reader.execute("SELECT count(*) FROM hands").fetchone()[0] == 0
+        deadline = time.monotonic() + 2
+        while reader.execute("SELECT count(*) FROM hands").fetchone()[0] == 0:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        reader.close()
+
+def test_sqlite_repository_has_production_indexes(tmp_path):
+    """Test the SQLite tables carry the indexes of the production hands table."""
+    path = str(tmp_path / "hands.db")
+    SQLiteHandRepository(path).close()
+    reader = sqlite3.connect(path)
+    indexes = {
+        name: [column for _, _, column in reader.execute(f"PRAGMA index_info({name})")]
+        for name, in reader.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'hands'")
+    }
+    reader.close()
+    assert indexes == {"hands_pkey": ["id", "created_at"], "hands_hand_id_idx": ["hand_id"]}
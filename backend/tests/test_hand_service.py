@@ -0,0 +1,90 @@
+"""Tests for bulk operations of the hand service."""
+
+from app.models import HandInfo, PlayerInfo
+from app.repositories.hand_repository import InMemoryHandRepository
+from app.repositories.sqlite_hand_repository import SQLiteHandRepository
+from app.services.hand_service import HandService
+
+def make_hand(hand_id: str, cards: str = "JsQd") -> HandInfo:
+    """Build a three player hand that goes to showdown preflop."""
+    return HandInfo(
+        hand_id=hand_id,
+        stack_size=1000,
+        players=[
+            PlayerInfo(id=1, position="BTN", cards="AhKh", stack=950),
+            PlayerInfo(id=2, position="SB", cards="2d2c", stack=950),
+            PlayerInfo(id=3, position="BB", cards=cards, stack=950)
+        ],
+        actions="1:raise,50 2:call 3:call",
+        community_cards="",
+        pot=150,
+        stack_info="",
+        positions="",
+        hole_cards=""
+    )
+
+def test_create_hands_reports_invalid_hands():
+    """Test valid hands are saved and invalid ones reported by ID."""
+    service = HandService(InMemoryHandRepository())
+    result = service.create_hands([make_hand("h1"), make_hand("h2", cards="AhQd"), make_hand("h3")])
+
+    assert [h.hand_id for h in result.succeeded] == ["h1", "h3"]
+    assert len(result.errors) == 1
+    assert result.errors[0].hand_id == "h2"
+    assert "Duplicate card" in result.errors[0].error
+
+def test_get_hands_reports_missing_hands():
+    """Test found hands are returned in request order and missing ones reported."""
+    service = HandService(InMemoryHandRepository())
+    service.create_hands([make_hand("h1"), make_hand("h2")])
+
+    result = service.get_hands(["h2", "missing", "h1"])
+
+    assert [h.hand_id for h in result.succeeded] == ["h2", "h1"]
+    assert result.errors[0].error == "Hand not found: missing"
+
+def test_evaluate_and_save_results(tmp_path):
+    """Test hands are evaluated and their results saved in one batch."""
+    repository = SQLiteHandRepository(str(tmp_path / "hands.db"))
+    service = HandService(repository)
+    service.create_hands([make_hand("h1"), make_hand("h2")])
+
+    result = service.evaluate_and_save_results(["h1", "h2", "missing"])
+
+    assert [r.hand_id for r in result.succeeded] == ["h1", "h2"]
+    assert [e.hand_id for e in result.errors] == ["missing"]
+    assert repository.find_result_by_id("h1").payoffs == [-50, 100, -50]
+    repository.close()
+
+class FlakyRepository(InMemoryHandRepository):
+    """Repository whose batch writes fail and that refuses one hand."""
+
+    def save_many(self, hands):
+        raise RuntimeError("batch failed")
+
+    def save_results(self, results):
+        raise RuntimeError("batch failed")
+
+    def save(self, hand):
+        if hand.hand_id == "bad":
+            raise RuntimeError("disk full")
+        return super().save(hand)
+
+    def save_result(self, hand_id, result):
+        if hand_id == "bad":
+            raise RuntimeError("disk full")
+        return super().save_result(hand_id, result)
+
+def test_failed_batches_report_per_hand():
+    """Test a failing batch write falls back to single writes and reports only failed hands."""
+    repository = FlakyRepository()
+    service = HandService(repository)
+
+    result = service.create_hands([make_hand("h1"), make_hand("bad"), make_hand("h2")])
+    assert [h.hand_id for h in result.succeeded] == ["h1", "h2"]
+    assert [(e.hand_id, e.error) for e in result.errors] == [("bad", "Failed to save hand: disk full")]
+
+    InMemoryHandRepository.save(repository, make_hand("bad"))
+    result = service.evaluate_and_save_results(["h1", "bad"])
+    assert [r.hand_id for r in result.succeeded] == ["h1"]
+    assert [(e.hand_id, e.error) for e in result.errors] == [("bad", "Failed to save result: disk full")]
@@ -0,0 +1,117 @@
+"""Tests for conditional requests on the hand endpoints."""
+
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from app import main
+from app.main import app
+from app.models import HandHistoryEntry
+from app.game.list_hands import find_hand
+from app.routing import etag_matches, hand_etag
+from app.utils.hand_archive import HandArchive, write_segment
+
+client = TestClient(app)
+
+class LaterDuplicateConnection:
+    """Connection whose table holds a later row of every hand id."""
+
+    def cursor(self):
+        return self
+
+    def execute(self, query, params=None):
+        pass
+
+    def fetchone(self):
+        return (99, "dup-000001", 500, "", "AhKh", "", "", "", "", "", "", "")
+
+ENTRY = HandHistoryEntry(hand_id="hand-001", stack_info="Stack 1000", positions="", hands="AhKh;2d2c", actions=[])
+
+def test_get_hand_sends_validators(monkeypatch):
+    """Test hands are sent with a strong ETag of their id and cached for long."""
+    monkeypatch.setattr(main, "find_hand", lambda connection, hand_id: (7, ENTRY))
+    response = client.get("/api/v1/hands/hand-001")
+    assert response.status_code == 200
+    assert response.json()["hand_id"] == "hand-001"
+    assert response.headers["etag"] == hand_etag("hand-001")
+    assert not response.headers["etag"].startswith("W/")
+    assert response.headers["cache-control"] == "public, max-age=31536000, immutable"
+
+def test_get_hand_not_modified_without_reading(monkeypatch):
+    """Test a matching If-None-Match is answered with 304 and no body, without a lookup."""
+    def unreachable(connection, hand_id):
+        raise AssertionError("the hand was read")
+
+    monkeypatch.setattr(main, "find_hand", unreachable)
+    etag = hand_etag("hand-001")
+    response = client.get("/api/v1/hands/hand-001", headers={"If-None-Match": f'"other", {etag}'})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert response.headers["cache-control"] == "public, max-age=31536000, immutable"
+    assert response.content == b""
+    assert hand_etag("hand-001") != hand_etag("hand-002")
+
+def test_missing_hand_is_never_not_modified(monkeypatch):
+    """Test not found responses have no ETag, even for If-None-Match: *."""
+    def missing(connection, hand_id):
+        raise HTTPException(status_code=404, detail="not found")
+
+    monkeypatch.setattr(main, "find_hand", missing)
+    response = client.get("/api/v1/hands/missing", headers={"If-None-Match": "*"})
+    assert response.status_code == 404
+    assert "etag" not in response.headers
+
+def test_first_stored_row_is_the_hand(tmp_path):
+    """Test an archived row wins over a later row with the same id in the table."""
+    created = datetime(2024, 1, 15, tzinfo=timezone.utc)
+    rows = [
+        (i + 1, f"dup-{i:06d}", 1000, "", "AhKh", "2d2c", "", "", "", "", "", "", "", created)
+        for i in range(3)
+    ]
+    write_segment(str(tmp_path / "hands_p202401.seg"), rows, 3)
+    row_id, hand = find_hand(LaterDuplicateConnection(), "dup-000001", HandArchive(str(tmp_path)))
+    assert row_id == 2
+    assert hand.stack_info == "Stack 1000"
+
+def test_list_revalidates_on_latest_hand_id(monkeypatch):
+    """Test the list answers 304 until a new hand is added and renders each list once."""
+    latest = {"id": 41}
+    queries = []
+
+    def recent(connection, limit, fields=None):
+        queries.append(limit)
+        return {"hands": [{"hand_id": f"hand-{latest['id']}"}]}
+
+    monkeypatch.setattr(main, "get_latest_hand_id", lambda connection: latest["id"])
+    monkeypatch.setattr(main, "get_recent_hands", recent)
+    monkeypatch.setattr(main, "list_responses", main.ResponseCache())
+
+    first = client.get("/api/v1/hands?limit=3")
+    assert first.status_code == 200
+    assert first.json() == {"hands": [{"hand_id": "hand-41"}]}
+    assert first.headers["cache-control"] == "no-cache"
+    etag = first.headers["etag"]
+
+    assert client.get("/api/v1/hands?limit=3", headers={"If-None-Match": etag}).status_code == 304
+    # a client without the ETag gets the rendered list without a query
+    assert client.get("/api/v1/hands?limit=3").json() == first.json()
+    assert client.get("/api/v1/hands?limit=5").headers["etag"] != etag
+    assert queries == [3, 5]
+
+    latest["id"] = 42
+    changed = client.get("/api/v1/hands?limit=3", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.json() == {"hands": [{"hand_id": "hand-42"}]}
+
+@pytest.mark.parametrize("header,expected", [
+    (None, False),
+    ('"abc"', True),
+    ('W/"abc"', True),
+    ('"x", "abc"', True),
+    ("*", True),
+    ('"abcd"', False),
+])
+def test_etag_matches(header, expected):
+    """Test If-None-Match uses weak comparison over a list of tags."""
+    assert etag_matches(header, '"abc"') is expected
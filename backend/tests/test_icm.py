@@ -0,0 +1,75 @@
+"""Tests for the ICM tournament equity calculator."""
+
+import itertools
+
+import pytest
+from fastapi.testclient import TestClient
+from app import main
+from app.main import app
+from app.game.icm import icm_adjusted_payoffs, icm_equity, icm_equity_exact, icm_equity_sampled
+
+client = TestClient(app)
+
+def brute_force_icm(stacks, payouts):
+    """ICM by walking every finishing order."""
+    equity = [0.0] * len(stacks)
+    for order in itertools.permutations(range(len(stacks))):
+        chance, left = 1.0, sum(stacks)
+        for player in order:
+            chance *= stacks[player] / left
+            left -= stacks[player]
+        for place, player in enumerate(order[:len(payouts)]):
+            equity[player] += chance * payouts[place]
+    return equity
+
+@pytest.mark.parametrize("stacks, payouts", [
+    ([50, 30, 20], [70, 30]),
+    ([1000, 1000], [100]),
+    ([4000, 2500, 1200, 800, 300, 200], [50, 30, 20]),
+    ([10, 20, 30, 40, 50, 60, 70], [40, 25, 15, 10, 6, 4]),
+])
+def test_exact_matches_brute_force(stacks, payouts):
+    """Test the bitmask program against every finishing order."""
+    assert icm_equity_exact(stacks, payouts) == pytest.approx(brute_force_icm(stacks, payouts))
+
+def test_sampled_close_to_exact():
+    """Test the sampled approximation converges on the exact values."""
+    stacks, payouts = [4000, 2500, 1200, 800, 300, 200], [50, 30, 20]
+    sampled = icm_equity_sampled(stacks, payouts, samples=200000, seed=7)
+    assert sampled == pytest.approx(icm_equity_exact(stacks, payouts), abs=0.3)
+
+def test_large_field_is_sampled():
+    """Test big fields still hand out the whole prize pool."""
+    stacks = list(range(100, 2100, 100))
+    equity = icm_equity(stacks, [50, 30, 20])
+    assert sum(equity) == pytest.approx(100)
+    assert equity == sorted(equity)
+
+def test_busted_players_take_last_places():
+    """Test players without chips share the lowest prizes."""
+    assert icm_equity([0, 500, 500], [60, 40, 10]) == pytest.approx([10, 50, 50])
+
+def test_adjusted_payoffs():
+    """Test chips won are worth less than chips lost under ICM."""
+    adjusted = icm_adjusted_payoffs([1000, 1000, 1000], [500, -500, 0], [50, 30, 20])
+    assert sum(adjusted) == pytest.approx(0)
+    assert 0 < adjusted[0] < -adjusted[1]
+
+def test_icm_endpoint():
+    """Test equity and adjusted payoffs through the API."""
+    response = client.post("/api/v1/icm", json={"stacks": [1000, 1000], "payouts": [100]})
+    assert response.status_code == 200
+    assert response.json()["equity"] == pytest.approx([50, 50])
+
+    response = client.post("/api/v1/icm", json={"stacks": [-1, 10], "payouts": [100]})
+    assert response.status_code == 400
+
+    response = client.post("/api/v1/icm", json={"stacks": [1000] * 101, "payouts": [100]})
+    assert response.status_code == 422
+
+def test_icm_endpoint_runs_off_the_loop():
+    """Test the calculation runs in the thread lane of the evaluation executor."""
+    before = main.evaluation_executor.stats()["lanes"]["thread"]["completed"]
+    response = client.post("/api/v1/icm", json={"stacks": [1000] * 20, "payouts": [50, 30, 20]})
+    assert response.status_code == 200
+    assert main.evaluation_executor.stats()["lanes"]["thread"]["completed"] == before + 1
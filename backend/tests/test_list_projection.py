@@ -0,0 +1,87 @@
+"""Tests for field projection and compression of the hand list."""
+
+import gzip
+
+import pytest
+from fastapi.testclient import TestClient
+from app import main
+from app.main import app
+from app.game.list_hands import get_recent_hands, parse_list_fields
+from app.routing import compress_body, negotiate_encoding
+
+client = TestClient(app)
+
+class RecordingConnection:
+    """Connection returning fixed rows and keeping the last query."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.query = None
+
+    def cursor(self):
+        return self
+
+    def execute(self, query, params=None):
+        self.query = " ".join(query.split())
+
+    def fetchall(self):
+        return self.rows
+
+def test_parse_list_fields():
+    """Test fields keep the canonical order and unknown ones are rejected."""
+    assert parse_list_fields(None) == ["hand_id", "stack_size", "positions", "hands", "actions", "winnings"]
+    assert parse_list_fields("winnings, hand_id") == ["hand_id", "winnings"]
+    with pytest.raises(ValueError, match="Unknown fields: cards"):
+        parse_list_fields("hand_id,cards")
+
+def test_projection_narrows_select():
+    """Test only the columns of the requested fields are selected."""
+    connection = RecordingConnection([("hand-1", "AhKh", "2d2c", "", None, None, None, "Player 1: +5")])
+    result = get_recent_hands(connection, 10, ["hand_id", "hands", "winnings"])
+    assert connection.query.startswith(
+        "SELECT hand_id, hand1, hand2, hand3, hand4, hand5, hand6, winnings FROM hands"
+    )
+    assert result == {"hands": [{"hand_id": "hand-1", "hands": ["AhKh", "2d2c"], "winnings": "Player 1: +5"}]}
+
+@pytest.mark.parametrize("header,expected", [
+    (None, "identity"),
+    ("gzip, deflate, br", "gzip"),
+    ("gzip;q=0", "identity"),
+    ("*", "gzip"),
+    ("identity", "identity"),
+])
+def test_negotiate_encoding(header, expected, monkeypatch):
+    """Test Accept-Encoding negotiation without zstd support."""
+    monkeypatch.setattr("app.routing.zstandard", None)
+    assert negotiate_encoding(header) == expected
+
+def test_compress_body_threshold():
+    """Test small bodies are not compressed."""
+    assert compress_body(b"{}", "gzip") == (b"{}", "identity")
+    body = b'{"hands": [' + b'{"hand_id": "hand"},' * 200 + b'{}]}'
+    compressed, encoding = compress_body(body, "gzip")
+    assert encoding == "gzip"
+    assert gzip.decompress(compressed) == body
+    assert compress_body(body, "gzip")[0] == compressed
+
+def test_list_endpoint_fields_and_gzip(monkeypatch):
+    """Test the list endpoint projects fields and compresses large lists."""
+    rows = [(f"hand-{i:04d}", f"Player 1: +{i}") for i in range(100)]
+    monkeypatch.setattr(main, "connection", RecordingConnection(rows))
+    monkeypatch.setattr(main, "get_latest_hand_id", lambda connection: 100)
+    monkeypatch.setattr(main, "list_responses", main.ResponseCache())
+
+    response = client.get("/api/v1/hands?limit=100&fields=hand_id,winnings", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.json()["hands"][3] == {"hand_id": "hand-0003", "winnings": "Player 1: +3"}
+
+    plain = client.get("/api/v1/hands?limit=100&fields=hand_id,winnings", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert plain.headers["etag"] != response.headers["etag"]
+
+def test_list_endpoint_rejects_unknown_fields():
+    """Test unknown fields are a bad request."""
+    response = client.get("/api/v1/hands?fields=hand_id,secret")
+    assert response.status_code == 400
@@ -0,0 +1,62 @@
+"""Tests for the load generator."""
+
+import asyncio
+import random
+
+from app.utils.load_generator import LatencyHistogram, run_load, synthetic_hand
+
+def test_histogram_percentiles():
+    """Test percentiles stay within bucket precision of the exact values."""
+    histogram = LatencyHistogram()
+    values = list(range(1, 100001))
+    for value in values:
+        histogram.record(value)
+    for percent in (50, 90, 99):
+        exact = values[int(len(values) * percent / 100) - 1]
+        assert abs(histogram.percentile(percent) - exact) <= exact * 0.02
+    assert histogram.percentile(100) == 100000
+
+def test_synthetic_hand_cards_are_distinct():
+    """Test generated hands deal every card once."""
+    hand = synthetic_hand(random.Random(1), 7)
+    cards = "".join(p["cards"] for p in hand["players"]) + hand["community_cards"]
+    dealt = [cards[i:i + 2] for i in range(0, len(cards), 2)]
+    assert len(dealt) == len(set(dealt))
+
+async def load_local_server(status_of, **options):
+    """Run a short load against a local server answering with status_of(request)."""
+    async def handle(reader, writer):
+        while True:
+            request = await reader.readuntil(b"\r\n\r\n")
+            length = 0
+            for line in request.split(b"\r\n"):
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":")[1])
+            await reader.readexactly(length)
+            writer.write(b"HTTP/1.1 " + status_of(request) + b"\r\nContent-Length: 2\r\n\r\n{}")
+            await writer.drain()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        return await run_load(f"http://127.0.0.1:{port}", rate=200, duration=0.5, concurrency=4, seed=1, **options)
+
+def test_run_load_against_local_server():
+    """Test an open-loop run counts requests per endpoint and errors."""
+    report = asyncio.run(load_local_server(
+        lambda request: b"404 Not Found" if b"GET /api/v1/hands/" in request else b"200 OK"
+    ))
+    assert report["overall"]["requests"] == 100
+    assert report["endpoints"]["get"]["errors"] == report["endpoints"]["get"]["requests"]
+    assert report["endpoints"]["create"]["errors"] == 0
+    assert report["overall"]["latency"]["count"] == 100
+
+def test_gets_only_ask_for_created_hands():
+    """Test hands are only fetched after their create succeeded, and replayed ids are not."""
+    payloads = [synthetic_hand(random.Random(1), 0)]
+    report = asyncio.run(load_local_server(
+        lambda request: b"500 Internal Server Error" if request.startswith(b"POST") else b"200 OK",
+        payloads=payloads
+    ))
+    assert report["endpoints"]["create"]["requests"] > 0
+    assert report["endpoints"]["get"]["requests"] == 0
@@ -0,0 +1,77 @@
+"""Tests for the bitmask evaluator and outs calculation."""
+
+import pytest
+from fastapi.testclient import TestClient
+from app.models import OutsRequest, PlayerInfo
+from app.game.fast_evaluator import evaluate_cards, hand_category
+from app.game.outs_calculator import analyze_outs
+from app.main import app
+
+client = TestClient(app)
+
+@pytest.mark.parametrize("cards, category", [
+    ("9h 8h 7h 6h 5h 2c Kd", "Straight flush"),
+    ("9h 9d 9c 9s 5h 2c Kd", "Four of a kind"),
+    ("9h 9d 9c 5s 5h 5c Kd", "Full house"),
+    ("Ah Th 7h 6h 2h 2c Kd", "Flush"),
+    ("Ah 2d 3c 4s 5h 9c Kd", "Straight"),
+    ("9h 9d 9c 4s 5h 2c Kd", "Three of a kind"),
+    ("9h 9d 5c 5s 4h 4c Kd", "Two pair"),
+    ("9h 9d 5c 3s 4h Tc Kd", "One pair"),
+    ("9h 7d 5c 3s Jh Tc Kd", "High card"),
+])
+def test_hand_categories(cards, category):
+    """Test each made hand is recognised."""
+    assert hand_category(evaluate_cards(cards.split())) == category
+
+def test_kickers_and_wheel():
+    """Test kickers break ties and the wheel is the lowest straight."""
+    assert evaluate_cards("Ah Ad Kc 7s 5h".split()) > evaluate_cards("Ah Ad Qc 7s 5h".split())
+    assert evaluate_cards("Ah 2d 3c 4s 5h".split()) < evaluate_cards("2d 3c 4s 5h 6h".split())
+    # third pair only plays as a kicker
+    assert evaluate_cards("Kh Kd Qc Qs 2h 2d As".split()) > evaluate_cards("Kh Kd Qc Qs 3h 3d Js".split())
+
+def test_outs_by_draw_type():
+    """Test flush, overcard and straight outs against an overpair."""
+    spot = OutsRequest(
+        players=[
+            PlayerInfo(id=1, cards="AhKh", position="BTN", stack=1000),
+            PlayerInfo(id=2, cards="QsQd", position="BB", stack=1000),
+            PlayerInfo(id=3, cards="9c8c", position="SB", stack=1000)
+        ],
+        community_cards="2h7hTd"
+    )
+    flush_draw, overpair, straight_draw = analyze_outs({0, 1, 2}, spot)
+
+    assert overpair["winning"] and overpair["out_count"] == 0
+    assert flush_draw["draws"] == ["flush_draw", "overcards"]
+    assert len(flush_draw["outs"]["flush"]) == 9
+    assert sorted(flush_draw["outs"]["overcards"]) == ["Ac", "Ad", "As", "Kc", "Kd", "Ks"]
+    assert straight_draw["draws"] == ["open_ended"]
+    assert sorted(straight_draw["outs"]["straight"]) == ["6c", "6d", "6s", "Jc", "Jd", "Js"]
+
+def test_outs_need_flop_or_turn():
+    """Test outs are not calculated preflop or on the river."""
+    spot = OutsRequest(
+        players=[
+            PlayerInfo(id=1, cards="AhKh", position="BTN", stack=1000),
+            PlayerInfo(id=2, cards="QsQd", position="BB", stack=1000)
+        ],
+        community_cards="2h7hTd3c5c"
+    )
+    with pytest.raises(ValueError, match="flop or turn"):
+        analyze_outs({0, 1}, spot)
+
+def test_outs_endpoint_rejects_duplicate_cards():
+    """Test a card held twice, or in the hand and on the board, is a 400."""
+    players = [
+        {"id": 1, "cards": "AhKh", "position": "BTN", "stack": 1000},
+        {"id": 2, "cards": "AhQd", "position": "BB", "stack": 1000}
+    ]
+    response = client.post("/api/v1/outs", json={"players": players, "community_cards": "2h7hTd"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Duplicate card: Ah"
+
+    players[1]["cards"] = "QsQd"
+    response = client.post("/api/v1/outs", json={"players": players, "community_cards": "2h7hQd"})
+    assert response.status_code == 400
@@ -0,0 +1,99 @@
+"""Tests for the sampling profiler and its admin endpoint."""
+
+import threading
+import time
+from collections import Counter
+
+from fastapi.testclient import TestClient
+from app.main import app
+from app.utils.profiler import ProfileSession, SamplingProfiler, flame_graph_svg
+
+client = TestClient(app)
+
+def busy_loop(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(i * i for i in range(1000))
+
+def test_samples_other_threads():
+    """Test the stacks of a busy thread are counted by function and category."""
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_loop, args=(stop,), name="busy")
+    worker.start()
+    profiler = SamplingProfiler(interval=0.001)
+    profiler.start()
+    time.sleep(0.2)
+    profiler.stop()
+    stop.set()
+    worker.join()
+
+    assert profiler.samples > 10
+    busy = [stack for stack in profiler.stacks if stack[0] == "busy"]
+    assert busy and all(f"{__name__}:busy_loop" in stack for stack in busy)
+    # the sampler never samples itself
+    assert not any(stack[0] == "sampling-profiler" for stack in profiler.stacks)
+    line = profiler.collapsed().splitlines()[0]
+    assert ";" in line and line.rsplit(" ", 1)[1].isdigit()
+
+    functions = {f["function"]: f for f in profiler.functions(limit=1000)}
+    assert functions[f"{__name__}:busy_loop"]["total"] > 0
+
+def test_categories_and_flame_graph():
+    """Test time is attributed to categories once per stack and drawn as an SVG."""
+    profiler = SamplingProfiler()
+    profiler.stacks = Counter({
+        ("MainThread", "app.main:create_hand", "app.game.hand_evaluator:evaluate_hand"): 6,
+        ("MainThread", "app.main:create_hand", "app.database:save_evaluated_hand", "psycopg2.extras:execute"): 3,
+        ("MainThread", "app.game.hand_codec:encode_hand_result"): 1,
+    })
+    categories = profiler.categories()
+    assert categories["evaluation"]["samples"] == 6
+    assert categories["database"]["samples"] == 3
+    assert categories["serialization"] == {"samples": 1, "pct": 10.0}
+    assert categories["logging"]["samples"] == 0
+
+    svg = flame_graph_svg(profiler.stacks, "test")
+    assert svg.startswith("<svg") and svg.endswith("</svg>")
+    assert "app.database:save_evaluated_hand (3 samples, 30.00%)" in svg
+
+def test_allocation_diff():
+    """Test an allocation diff is reported when asked for."""
+    session = ProfileSession(interval=0.005, allocations=True)
+    session.start()
+    kept = [bytearray(1024) for _ in range(200)]
+    time.sleep(0.05)
+    session.stop()
+    report = session.report()
+    assert kept
+    assert report["allocations"]
+    assert sum(a["size_diff"] for a in report["allocations"]) > 100000
+
+def test_profile_endpoint_is_guarded(monkeypatch):
+    """Test the profile endpoint is hidden without ADMIN_TOKEN and needs the token."""
+    monkeypatch.delenv("ADMIN_TOKEN", raising=False)
+    assert client.get("/api/v1/admin/profile?seconds=0.1").status_code == 404
+
+    monkeypatch.setenv("ADMIN_TOKEN", "secret")
+    assert client.get("/api/v1/admin/profile?seconds=0.1").status_code == 403
+    response = client.get("/api/v1/admin/profile?seconds=0.1", headers={"X-Admin-Token": "wrong"})
+    assert response.status_code == 403
+
+def test_profile_endpoint_formats(monkeypatch):
+    """Test the profile endpoint returns JSON, collapsed stacks and SVG."""
+    monkeypatch.setenv("ADMIN_TOKEN", "secret")
+    headers = {"X-Admin-Token": "secret"}
+
+    response = client.get("/api/v1/admin/profile?seconds=0.1&interval_ms=5", headers=headers)
+    assert response.status_code == 200
+    report = response.json()
+    assert report["samples"] > 0
+    assert set(report["categories"]) == {"evaluation", "database", "serialization", "logging"}
+    assert report["stacks"] and report["functions"]
+    assert "allocations" not in report
+
+    response = client.get("/api/v1/admin/profile?seconds=0.1&format=collapsed", headers=headers)
+    assert response.headers["content-type"].startswith("text/plain")
+    response = client.get("/api/v1/admin/profile?seconds=0.1&format=svg", headers=headers)
+    assert response.headers["content-type"] == "image/svg+xml"
+
+    assert client.get("/api/v1/admin/profile?seconds=120", headers=headers).status_code == 400
+    assert client.get("/api/v1/admin/profile?seconds=1&format=pprof", headers=headers).status_code == 400
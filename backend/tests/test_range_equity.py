@@ -0,0 +1,77 @@
+"""Tests for range-vs-range equity."""
+
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.game.range_equity import parse_range, range_equity, result_cache
+
+client = TestClient(app)
+
+@pytest.mark.parametrize("text, count", [
+    ("22+", 78),
+    ("AJs+", 12),
+    ("KQo", 12),
+    ("AK", 16),
+    ("A2s-A5s", 16),
+    ("55-88", 24),
+    ("AhKh", 1),
+    ("22+, AJs+, KQo", 102),
+])
+def test_parse_range_counts(text, count):
+    """Test range tokens expand to the right number of combos."""
+    assert len(parse_range(text)) == count
+
+def test_parse_range_weights():
+    """Test weights from text and mappings, with later tokens winning."""
+    assert set(parse_range("AKs:0.5, AhKh").values()) == {0.5, 1.0}
+    assert set(parse_range({"QQ": 0.25}).values()) == {0.25}
+    with pytest.raises(ValueError):
+        parse_range("AKx")
+
+def test_exact_heads_up_with_card_removal():
+    """Test combo equities on the flop and that board cards are removed."""
+    result = range_equity(["AhAd", "KsKc"], "2h7c9d")
+    assert result["exact"]
+    # kings need one of two kings, minus runouts that also bring an ace
+    assert result["equity"][1] == pytest.approx(0.084, abs=0.002)
+    assert result["runouts"] == 1176
+
+    result = range_equity(["AA", "KK"], "Ah7c9d")
+    assert len(result["combos"][0]) == 3
+    assert sum(result["equity"]) == pytest.approx(1)
+
+def test_sampled_preflop_and_three_way():
+    """Test sampled spots land near known equities."""
+    assert range_equity(["AA", "KK"], seed=3)["equity"][0] == pytest.approx(0.82, abs=0.01)
+    result = range_equity(["AA", "KK", "QQ"], "2c7d9h", seed=3)
+    assert not result["exact"]
+    assert result["equity"][0] > result["equity"][1] > result["equity"][2]
+    assert sum(result["equity"]) == pytest.approx(1)
+
+def test_range_equity_endpoint():
+    """Test the range equity API and its errors."""
+    response = client.post("/api/v1/equity/ranges", json={"ranges": ["QQ+", {"AKs": 1.0}], "board": "2h7c9d"})
+    assert response.status_code == 200
+    assert len(response.json()["combos"][1]) == 4
+
+    response = client.post("/api/v1/equity/ranges", json={"ranges": ["QQ+"]})
+    assert response.status_code == 400
+
+    # the only combos share a card, so no deal is possible
+    response = client.post("/api/v1/equity/ranges", json={"ranges": ["AhAd", "AhKh"], "board": "2c3c4c"})
+    assert response.status_code == 400
+    assert "no combos left" in response.json()["detail"]
+
+def test_suit_renamed_spots_share_a_result():
+    """Test a spot with the suits renamed is answered from the cache in its own suits."""
+    result_cache.clear()
+    first = range_equity(["AhAd, QQ", "KsKc"], "2h7c9d")
+    second = range_equity(["AsAc, QQ", "KhKd"], "2s7d9c")
+    assert (result_cache.hits, result_cache.misses) == (1, 1)
+    assert second["equity"] == first["equity"]
+    assert second["combos"][0]["AsAc"] == first["combos"][0]["AdAh"]
+    assert set(second["combos"][1]) == {"KdKh"}
+
+    # a different suit structure is a different spot
+    range_equity(["AhAd, QQ", "KsKc"], "2h7h9d")
+    assert result_cache.misses == 2
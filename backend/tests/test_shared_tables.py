@@ -0,0 +1,77 @@
+"""Tests for lookup tables shared between processes."""
+
+import multiprocessing
+import os
+
+import numpy as np
+from app.game.shared_tables import shared_tables
+
+def build():
+    return {"squares": np.arange(100, dtype=np.int64) ** 2, "grid": np.eye(3, dtype=np.int32)}
+
+def counted_build(calls=[]):
+    calls.append(1)
+    return build()
+
+def _child_sum(directory, queue):
+    tables = shared_tables("test", 1, build, directory)
+    queue.put(int(tables["squares"].sum()))
+
+def test_tables_are_built_once_and_mapped(tmp_path):
+    """Test later loads map the file instead of building again."""
+    builds = counted_build.__defaults__[0]
+    first = shared_tables("test", 1, counted_build, str(tmp_path))
+    second = shared_tables("test", 1, counted_build, str(tmp_path))
+    assert len(builds) == 1
+    assert np.array_equal(first["squares"], second["squares"])
+    assert second["grid"].shape == (3, 3)
+    assert not second["squares"].flags.writeable
+
+def test_other_process_attaches(tmp_path):
+    """Test a separate process reads the tables without its own build."""
+    shared_tables("test", 1, build, str(tmp_path))
+    (path,) = tmp_path.glob("poker-test-v1-*.tables")
+    inode = os.stat(path).st_ino
+    queue = multiprocessing.get_context("spawn").Queue()
+    process = multiprocessing.get_context("spawn").Process(target=_child_sum, args=(str(tmp_path), queue))
+    process.start()
+    process.join(30)
+    assert queue.get(timeout=5) == sum(i * i for i in range(100))
+    # the file was mapped, not written again
+    assert os.stat(path).st_ino == inode
+
+def test_falls_back_to_private_tables(tmp_path):
+    """Test a missing directory still gives working tables, and corrupt files are rebuilt."""
+    tables = shared_tables("test", 1, build, str(tmp_path / "missing"))
+    assert tables["squares"][9] == 81
+
+    shared_tables("test", 2, build, str(tmp_path))
+    (path,) = tmp_path.glob("poker-test-v2-*.tables")
+    path.write_bytes(b"garbage")
+    assert shared_tables("test", 2, build, str(tmp_path))["squares"][9] == 81
+
+def test_rejects_tampered_and_unsafe_files(tmp_path):
+    """Test files with a bad checksum or loose permissions are rebuilt privately."""
+    shared_tables("test", 1, build, str(tmp_path))
+    (path,) = tmp_path.glob("poker-test-v1-*.tables")
+    assert os.stat(path).st_mode & 0o777 == 0o600
+
+    inode = os.stat(path).st_ino
+    data = bytearray(path.read_bytes())
+    data[-8] ^= 1
+    path.write_bytes(bytes(data))
+    assert shared_tables("test", 1, build, str(tmp_path))["squares"][99] == 99 * 99
+    # the bad file was replaced by a fresh one
+    assert os.stat(path).st_ino != inode
+
+    os.chmod(path, 0o666)
+    tables = shared_tables("test", 1, build, str(tmp_path))
+    assert tables["squares"][99] == 99 * 99
+    assert os.stat(path).st_mode & 0o777 == 0o600
+
+def test_file_name_follows_build_code(tmp_path):
+    """Test a different build does not map the tables of another."""
+    shared_tables("test", 1, build, str(tmp_path))
+    other = shared_tables("test", 1, lambda: {"squares": np.zeros(3)}, str(tmp_path))
+    assert other["squares"].tolist() == [0, 0, 0]
+    assert len(list(tmp_path.glob("poker-test-v1-*.tables"))) == 2
@@ -0,0 +1,32 @@
+"""Tests for suit-isomorphic canonicalization."""
+
+from itertools import permutations
+
+from app.game.suit_isomorphism import (
+    canonical_key,
+    canonicalize,
+    restore_cards
+)
+
+def relabel(cards: str, mapping: dict) -> str:
+    return "".join(cards[i] + mapping[cards[i + 1]] for i in range(0, len(cards), 2))
+
+def test_every_suit_permutation_has_same_key():
+    """Test all 24 suit renamings of a hand map to one class."""
+    hole, board = "AhKh", "7h8d9c"
+    keys = {
+        canonical_key(relabel(hole, dict(zip("hdcs", p))), relabel(board, dict(zip("hdcs", p))))
+        for p in permutations("hdcs")
+    }
+    assert len(keys) == 1
+
+def test_different_suit_structure_has_different_key():
+    """Test suited and offsuit hole cards stay apart."""
+    assert canonical_key("AhKh", "7h8d9c") != canonical_key("AhKd", "7h8d9c")
+    assert canonical_key("AhKh") == canonical_key("AsKs")
+
+def test_restore_round_trip():
+    """Test canonical cards map back to the original suits."""
+    hole, board, suit_map = canonicalize("QsJd", "2s 3c 4d")
+    assert sorted(restore_cards(hole, suit_map)) == ["Jd", "Qs"]
+    assert sorted(restore_cards(board, suit_map)) == ["2s", "3c", "4d"]
@@ -0,0 +1,116 @@
+"""Tests for the server-side table engine."""
+
+import random
+import threading
+
+import pytest
+from app import main
+from app.game.hand_evaluator import evaluate_hand
+from app.game.table_engine import Table, TableError, TableManager
+
+def play_to_showdown(manager, table_id):
+    """Call or check every decision until the hand ends."""
+    table = manager.get_table(table_id)
+    while True:
+        seat = table.to_act
+        action = 'check' if table.can_check(seat) else 'call'
+        result = manager.act(table_id, seat, action)
+        if result:
+            return result
+
+def test_blinds_and_first_to_act():
+    """Test blinds are posted and the player after the big blind acts first."""
+    table = Table("t1", seats=4, stack_size=1000)
+    table.start_hand(random.Random(1))
+
+    assert (table.dealer, table.sb, table.bb) == (0, 1, 2)
+    assert list(table.bets) == [0, 20, 40, 0]
+    assert table.to_act == 3
+    assert len(set(table.holes)) == 8
+
+def test_everyone_folds_to_big_blind():
+    """Test the big blind wins the blinds when everyone folds."""
+    persisted = []
+    manager = TableManager(persist=persisted.append, seed=7)
+    manager.open_table("t1", seats=3, stack_size=1000)
+
+    manager.act("t1", 0, 'fold')
+    result = manager.act("t1", 1, 'fold')
+
+    assert result.payoffs == [0, -20, 20]
+    assert persisted == [result]
+    # next hand is dealt with the button moved
+    assert manager.get_table("t1").hand_no == 2
+    assert manager.get_table("t1").dealer == 1
+
+def test_hand_played_to_showdown():
+    """Test a called down hand deals the full board and balances to zero."""
+    manager = TableManager(seed=3)
+    table = manager.open_table("t1", seats=3, stack_size=1000)
+
+    result = play_to_showdown(manager, "t1")
+
+    assert len(result.community_cards) == 10
+    assert result.pot == 120
+    assert sum(result.payoffs) == 0
+    assert sum(table.balances) == 0
+
+def test_invalid_actions():
+    """Test out of turn actions, checks facing a bet and small raises are rejected."""
+    manager = TableManager(seed=1)
+    manager.open_table("t1", seats=3, stack_size=1000)
+
+    with pytest.raises(TableError, match="cannot act now"):
+        manager.act("t1", 1, 'call')
+    with pytest.raises(TableError, match="cannot check"):
+        manager.act("t1", 0, 'check')
+    with pytest.raises(TableError, match="Raise must be at least 80"):
+        manager.act("t1", 0, 'raise', 60)
+
+def test_all_in_runs_out_board():
+    """Test an all-in and call settles the hand with a full board."""
+    manager = TableManager(seed=5)
+    manager.open_table("t1", seats=2, stack_size=500)
+
+    assert manager.act("t1", 0, 'raise', 500) is None
+    result = manager.act("t1", 1, 'call')
+
+    assert result.pot == 1000
+    assert len(result.community_cards) == 10
+    assert sum(result.payoffs) == 0
+
+def test_table_blinds_reach_settlement():
+    """Test a table's own blinds are posted and checked when its hand settles."""
+    manager = TableManager(seed=7)
+    manager.open_table("t1", seats=3, stack_size=1000, small_blind=5, big_blind=10)
+
+    manager.act("t1", 0, 'fold')
+    assert manager.act("t1", 1, 'fold').payoffs == [0, -5, 5]
+
+    table = manager.get_table("t1")
+    table.big_blind = 80
+    with pytest.raises(ValueError, match="less than the BB blind of 80"):
+        table._settle()
+
+def test_submitted_hands_skip_the_blind_check():
+    """Test hands posted to the API are evaluated whatever their blind seats put in."""
+    hand = TableManager(seed=7).open_table("t1", seats=3, stack_size=1000).hand_info()
+    assert len(evaluate_hand(hand, big_blind=80).payoffs) == 3
+
+def test_persist_runs_on_writer_thread(monkeypatch):
+    """Test the app saves finished table hands on its writer thread."""
+    saved = []
+    monkeypatch.setattr(main, "connection", object())
+    monkeypatch.setattr(
+        main, "save_evaluated_hand",
+        lambda connection, result: saved.append((result.hand_id, threading.current_thread().name))
+    )
+    manager = TableManager(persist=main.persist_hand_result, seed=7)
+    manager.open_table("t1", seats=3, stack_size=1000)
+    manager.act("t1", 0, 'fold')
+    manager.act("t1", 1, 'fold')
+
+    # wait for the writer to drain
+    main.hand_writer.submit(lambda: None).result()
+    assert len(saved) == 1
+    assert saved[0][0] == "t1-1" and saved[0][1].startswith("hand-writer")